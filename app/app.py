@@ -14,9 +14,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from app.__version__ import __version__
 from app.config.settings import Settings
-from app.controllers.simulation_controller import simulation_router
+from app.controllers.simulation_controller import simulation_router, job_service
 from app.controllers.metrics_controller import metrics_router
 from app.clients.database import Base, engine
+from app.clients.migrations import run_migrations
+from app.clients.write_behind import write_behind
 
 # Suppress unnecessary warnings
 warnings.filterwarnings('ignore', category=FutureWarning)
@@ -37,10 +39,14 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """
     # --- Startup tasks ---
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
     logger.info('Database is initialized and ready!')
     yield
     # --- Shutdown tasks ---
     logger.info('Shutting down application...')
+    job_service.shutdown()
+    # Results of finished jobs are saved before the database queue is drained
+    write_behind.close()
 
 # Create the FastAPI app instance
 app: FastAPI = FastAPI(title=Settings.APP_NAME, version=__version__, lifespan=lifespan)
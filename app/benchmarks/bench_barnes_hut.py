@@ -0,0 +1,77 @@
+"""
+bench_barnes_hut.py
+-------------------
+Accuracy-vs-speed benchmark of the Barnes-Hut solver against the direct
+all-pairs sum.
+
+For each body count N and opening angle theta, one force evaluation is
+timed with both solvers on a generated orbital scenario. The error is the
+relative acceleration error per body against the direct sum.
+
+Run with:
+    python -m app.benchmarks.bench_barnes_hut
+"""
+
+from typing import Dict, List, Tuple
+import numpy as np
+from app.benchmarks.timing import time_call
+from app.config.simulation_config import generate_bodies
+from app.utilities.physics.barnes_hut import accelerations_barnes_hut
+from app.utilities.physics.simulation_math import accelerations_direct
+
+SIZES: Tuple[int, ...] = (100, 300, 1000, 3000)
+THETAS: Tuple[float, ...] = (0.3, 0.5, 0.8, 1.0)
+
+
+def scenario(count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build position and mass arrays for a generated `count`-body scenario.
+    """
+    bodies = generate_bodies(count, seed=count)
+    positions = np.array([[b['position'][axis] for axis in 'xyz'] for b in bodies.values()])
+    masses = np.array([b['mass'] for b in bodies.values()])
+    return positions, masses
+
+
+def run(sizes: Tuple[int, ...] = SIZES, thetas: Tuple[float, ...] = THETAS) -> List[Dict[str, float]]:
+    """
+    Benchmark both solvers over every (N, theta) combination.
+
+    Returns
+    -------
+    list of dict
+        One row per combination with wall times, speedup and errors.
+    """
+    rows: List[Dict[str, float]] = []
+    for size in sizes:
+        positions, masses = scenario(size)
+        exact = accelerations_direct(positions, masses)
+        direct = time_call(lambda: accelerations_direct(positions, masses), reps=3)
+        for theta in thetas:
+            approx = accelerations_barnes_hut(positions, masses, theta)
+            tree = time_call(lambda: accelerations_barnes_hut(positions, masses, theta), reps=3)
+            error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+            rows.append({
+                'bodies': size,
+                'theta': theta,
+                'direct_s': direct['best'],
+                'barnes_hut_s': tree['best'],
+                'speedup': direct['best'] / tree['best'],
+                'median_error': float(np.median(error)),
+                'max_error': float(error.max()),
+            })
+    return rows
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print(f'{"bodies":>6} {"theta":>5} {"direct (s)":>10} {"BH (s)":>8} {"speedup":>8} {"median err":>10} {"max err":>9}')
+    for row in run():
+        print(
+            f'{row["bodies"]:>6} {row["theta"]:>5.1f} {row["direct_s"]:>10.4f} {row["barnes_hut_s"]:>8.4f} '
+            f'{row["speedup"]:>7.2f}x {row["median_error"]:>10.2e} {row["max_error"]:>9.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+bench_integrators.py
+--------------------
+Cost-per-accuracy comparison of the integrators.
+
+A light body is integrated over one period of an eccentric orbit
+(e = 0.5) around a unit mass at rest, with every integrator at several
+fixed step counts and with error-controlled RK45 at several tolerances.
+Cost is reported as acceleration evaluations and wall time; accuracy as
+the distance from the starting point after one period (the exact orbit
+closes) relative to the orbit size, and the largest relative energy error.
+
+Run with:
+    python -m app.benchmarks.bench_integrators
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, List, Tuple, Union
+import numpy as np
+from app.utilities.physics.simulation_math import (
+    integrate_euler, integrate_rk4, integrate_rk45, integrate_verlet, rk45_timestep
+)
+
+APOAPSIS: float = 10.0
+ECCENTRICITY: float = 0.5
+STEP_COUNTS: Tuple[int, ...] = (100, 300, 1000, 3000)
+TOLERANCES: Tuple[float, ...] = (1e-6, 1e-8, 1e-10)
+INTEGRATORS: Dict[str, Callable[..., Tuple[np.ndarray, ...]]] = {
+    'euler': integrate_euler,
+    'verlet': integrate_verlet,
+    'rk4': integrate_rk4,
+    'rk45': integrate_rk45,
+}
+
+
+def scenario() -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Initial position and velocity at apoapsis, and the orbital period.
+    """
+    semi_major = APOAPSIS / (1 + ECCENTRICITY)
+    speed = math.sqrt((1 - ECCENTRICITY) / APOAPSIS)
+    return np.array([APOAPSIS, 0.0, 0.0]), np.array([0.0, speed, 0.0]), 2 * math.pi * math.sqrt(semi_major ** 3)
+
+
+def energy(position: np.ndarray, velocity: np.ndarray) -> float:
+    """
+    Specific orbital energy around the unit mass.
+    """
+    return float(velocity @ velocity / 2 - 1 / np.linalg.norm(position))
+
+
+# Step function: (time step, position, velocity, acceleration) -> (step taken, position, velocity, next step)
+Stepper = Callable[[float, np.ndarray, np.ndarray, Any], Tuple[float, np.ndarray, np.ndarray, float]]
+
+
+def integrate(step: Stepper, first_step: float) -> Dict[str, float]:
+    """
+    Integrate one period with the given step function, counting the
+    acceleration evaluations it makes.
+
+    Returns
+    -------
+    dict
+        Steps, acceleration evaluations, wall time, closure and energy errors.
+    """
+    evaluations = 0
+
+    def acceleration(position: np.ndarray, offset: float) -> np.ndarray:
+        nonlocal evaluations
+        evaluations += 1
+        return -position / np.linalg.norm(position) ** 3
+
+    start_position, velocity, period = scenario()
+    position, initial = start_position, energy(start_position, velocity)
+    t, steps, energy_error, time_step = 0.0, 0, 0.0, first_step
+    start = time.perf_counter()
+    while period - t > 1e-9:
+        time_step = min(time_step, period - t)
+        taken, position, velocity, time_step = step(time_step, position, velocity, acceleration)
+        t += taken
+        steps += 1
+        energy_error = max(energy_error, abs(energy(position, velocity) / initial - 1))
+    return {
+        'steps': steps,
+        'evaluations': evaluations,
+        'wall_s': time.perf_counter() - start,
+        'closure_error': float(np.linalg.norm(position - start_position)) / APOAPSIS,
+        'energy_error': energy_error,
+    }
+
+
+def run() -> List[Dict[str, Union[str, float]]]:
+    """
+    Benchmark every integrator at fixed step counts, and error-controlled RK45.
+
+    Returns
+    -------
+    list of dict
+        One row per integrator and setting with cost and accuracy.
+    """
+    period = scenario()[2]
+    rows: List[Dict[str, Union[str, float]]] = []
+    for name, func in INTEGRATORS.items():
+        for count in STEP_COUNTS:
+            def fixed(
+                time_step: float, position: np.ndarray, velocity: np.ndarray, acceleration: Any, func: Any = func
+            ) -> Tuple[float, np.ndarray, np.ndarray, float]:
+                position, velocity = func(time_step, position, velocity, acceleration)[:2]
+                return time_step, position, velocity, time_step
+            rows.append({'integrator': name, 'setting': f'n={count}', **integrate(fixed, period / count)})
+    for tolerance in TOLERANCES:
+        def controlled(
+            time_step: float, position: np.ndarray, velocity: np.ndarray, acceleration: Any, tolerance: float = tolerance
+        ) -> Tuple[float, np.ndarray, np.ndarray, float]:
+            position, velocity, error = integrate_rk45(time_step, position, velocity, acceleration, tolerance)
+            return time_step, position, velocity, float(rk45_timestep(time_step, error, 1e-6, period))
+        rows.append({'integrator': 'rk45', 'setting': f'tol={tolerance:g}', **integrate(controlled, period / 100)})
+    return rows
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print(f'{"integrator":>10} {"setting":>10} {"steps":>6} {"evals":>6} {"wall (s)":>8} {"closure err":>11} {"energy err":>10}')
+    for row in run():
+        print(
+            f'{row["integrator"]:>10} {row["setting"]:>10} {row["steps"]:>6} {row["evaluations"]:>6} '
+            f'{row["wall_s"]:>8.4f} {row["closure_error"]:>11.2e} {row["energy_error"]:>10.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+bench_qrange_store.py
+---------------------
+Microbenchmark comparing the indexed QRangeStore against the original
+list-scan implementation.
+
+The workload mimics `SimulationProcessor.simulate`: two agents append
+consecutive [t, t + dt) records and each insert is followed by a point
+lookup just behind the current time. `cases` additionally times inserts
+and lookups on their own at growing store sizes for the benchmark suite.
+
+Run with:
+    python -m app.benchmarks.bench_qrange_store
+"""
+
+import random
+from typing import Any, Dict, List, Tuple
+from app.benchmarks.timing import measure, time_call
+from app.utilities.structures.qrange_store import QRangeStore
+
+SIZES: Tuple[int, ...] = (250, 500, 1000, 2000, 4000)
+# Store sizes of the insert and lookup cases (full run, quick run)
+CASE_SIZES: Tuple[int, ...] = (1000, 10000, 50000)
+QUICK_CASE_SIZES: Tuple[int, ...] = (1000, 10000)
+AGENTS: Tuple[str, ...] = ('Body1', 'Body2')
+
+
+class ListRangeStore:
+    """
+    The original QRangeStore lookup: a linear scan over every stored range.
+    Kept here only as the benchmark baseline.
+    """
+
+    def __init__(self) -> None:
+        self._store: List[Tuple[float, float, str]] = []
+
+    def __setitem__(self, rng: Tuple[float, float], value: str) -> None:
+        low, high = rng
+        self._store.append((low, high, value))
+
+    def __getitem__(self, key: float) -> List[str]:
+        ret = [v for (l, h, v) in self._store if l <= key < h]
+        if not ret:
+            raise IndexError('Not found.')
+        return ret
+
+
+def simulate_workload(store_cls: type, iterations: int) -> None:
+    """
+    Replay the simulation's insert/lookup pattern for `iterations` steps.
+    """
+    store = store_cls()
+    store[-1e9, 0.0] = 'init'
+    for step in range(iterations):
+        t = step * 100.0
+        for agent in AGENTS:
+            store[t - 0.001]
+            store[t, t + 100.0] = agent
+
+
+def run(sizes: Tuple[int, ...] = SIZES) -> List[Dict[str, float]]:
+    """
+    Benchmark both stores over increasing run lengths.
+
+    Returns
+    -------
+    list of dict
+        One row per size with best wall times and the speedup.
+    """
+    rows: List[Dict[str, float]] = []
+    for size in sizes:
+        indexed = time_call(lambda: simulate_workload(QRangeStore, size), reps=3)
+        scanned = time_call(lambda: simulate_workload(ListRangeStore, size), reps=3)
+        rows.append({
+            'iterations': size,
+            'records': size * len(AGENTS) + 1,
+            'list_s': scanned['best'],
+            'indexed_s': indexed['best'],
+            'speedup': scanned['best'] / indexed['best'],
+        })
+    return rows
+
+
+def cases(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Time inserts and point lookups at growing store sizes.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Use smaller sizes for a fast run.
+
+    Returns
+    -------
+    list of dict
+        Benchmark cases as produced by `measure`.
+    """
+    results: List[Dict[str, Any]] = []
+    for size in QUICK_CASE_SIZES if quick else CASE_SIZES:
+        ranges = [(t * 100.0, t * 100.0 + 100.0) for t in range(size)]
+        rng = random.Random(size)
+        shuffled = rng.sample(ranges, size)
+
+        def insert(order: List[Tuple[float, float]]) -> QRangeStore[int]:
+            store: QRangeStore[int] = QRangeStore()
+            for index, (low, high) in enumerate(order):
+                store[low, high] = index
+            return store
+
+        store = insert(ranges)
+        keys = [rng.uniform(0, size * 100.0) for _ in range(1000)]
+
+        def lookup() -> None:
+            for key in keys:
+                store[key]
+
+        results.append(measure('qrange_store.insert_append', lambda: insert(ranges), {'records': size}, reps=3))
+        results.append(measure('qrange_store.insert_shuffled', lambda: insert(shuffled), {'records': size}, reps=3))
+        results.append(measure('qrange_store.lookup_1000', lookup, {'records': size}, reps=5))
+    return results
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print(f'{"iterations":>10} {"records":>8} {"list (s)":>10} {"indexed (s)":>12} {"speedup":>8}')
+    for row in run():
+        print(
+            f'{row["iterations"]:>10} {row["records"]:>8} {row["list_s"]:>10.4f} '
+            f'{row["indexed_s"]:>12.4f} {row["speedup"]:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
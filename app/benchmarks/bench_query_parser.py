@@ -0,0 +1,62 @@
+"""
+bench_query_parser.py
+---------------------
+Microbenchmark of `parse_query` on the queries of the agent configuration.
+
+Cached parses measure the hot path used while compiling plans; uncached
+parses measure the tokenizer and recursive-descent parser themselves.
+
+Run with:
+    python -m app.benchmarks.bench_query_parser
+"""
+
+from typing import Any, Dict, List
+from app.benchmarks.timing import measure, print_cases
+from app.config.simulation_config import agents
+from app.utilities.queries.query_parser import _parse_cached, parse_query
+
+# Every consumed and produced query of the agent configuration
+QUERIES: List[str] = sorted({
+    query for sms in agents.values() for sm in sms for query in (sm['consumed'], sm['produced'])
+})
+
+
+def cases(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Time cached and uncached parsing of all configured queries.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Fewer repetitions for a fast run.
+
+    Returns
+    -------
+    list of dict
+        Benchmark cases as produced by `measure`.
+    """
+    reps = 3 if quick else 10
+    parse_uncached = _parse_cached.__wrapped__
+
+    def cached() -> None:
+        for query in QUERIES:
+            parse_query(query)
+
+    def uncached() -> None:
+        for query in QUERIES:
+            parse_uncached(query)
+
+    params = {'queries': len(QUERIES)}
+    return [
+        measure('query_parser.parse_cached', cached, params, warmups=1, reps=reps),
+        measure('query_parser.parse_uncached', uncached, params, warmups=1, reps=reps),
+    ]
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print_cases(cases())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+bench_serialization.py
+----------------------
+Microbenchmark of result serialization for responses.
+
+Compares the standard library JSON encoder, the previous response path,
+with the encoders of `result_encoding`: optimized JSON, MessagePack when
+installed, gzip and zstd compression, and rounding to 6 significant digits.
+Every case also reports the size of its body in bytes.
+
+Run with:
+    python -m app.benchmarks.bench_serialization
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Tuple
+from app.benchmarks.timing import measure, print_cases
+from app.config.simulation_config import default_data, generate_bodies
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.simulation_processor import SimulationProcessor
+from app.utilities.structures import result_encoding
+from app.utilities.structures.compact_state import json_default
+from app.utilities.structures.result_encoding import compress, encode_json, encode_msgpack, quantize
+
+# Significant digits of the rounded cases
+PRECISION: int = 6
+
+
+def encoders() -> List[Tuple[str, Callable[[Any], bytes]]]:
+    """
+    Return the named encoders to compare, skipping unavailable ones.
+    """
+    cases: List[Tuple[str, Callable[[Any], bytes]]] = [
+        ('json_stdlib', lambda content: json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(',', ':'), default=json_default
+        ).encode('utf-8')),
+        ('json', encode_json),
+        ('json_gzip', lambda content: compress(encode_json(content), 'gzip')),
+        ('json_rounded', lambda content: encode_json(quantize(content, PRECISION))),
+        ('json_rounded_gzip', lambda content: compress(encode_json(quantize(content, PRECISION)), 'gzip')),
+    ]
+    if 'zstd' in result_encoding.ENCODINGS:
+        cases.append(('json_zstd', lambda content: compress(encode_json(content), 'zstd')))
+    if 'msgpack' in result_encoding.FORMATS:
+        cases.append(('msgpack', encode_msgpack))
+        cases.append(('msgpack_rounded', lambda content: encode_msgpack(quantize(content, PRECISION), single_float=True)))
+    return cases
+
+
+def cases(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Time every encoder on the results of both engines.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Fewer repetitions and smaller results for a fast run.
+
+    Returns
+    -------
+    list of dict
+        Benchmark cases as produced by `measure`, with the body size in
+        bytes under 'bytes'.
+    """
+    reps = 3 if quick else 5
+    iterations = 100 if quick else 500
+    results: Dict[str, Any] = {
+        'agents': SimulationProcessor().run(default_data, iterations=iterations),
+        'vectorized': NBodyProcessor().run(generate_bodies(100), iterations=iterations // 10),
+    }
+    benchmarks: List[Dict[str, Any]] = []
+    for engine, records in results.items():
+        for name, encode in encoders():
+            case = measure(
+                f'serialization.{name}', lambda: encode(records), {'engine': engine, 'records': len(records)}, reps=reps
+            )
+            benchmarks.append({**case, 'bytes': len(encode(records))})
+    return benchmarks
+
+
+def main() -> None:
+    """Print the benchmark table and the body sizes."""
+    benchmarks = cases()
+    print_cases(benchmarks)
+    print()
+    print(f'{"case":<40} {"engine":<12} {"bytes":>12}')
+    for case in benchmarks:
+        print(f'{case["name"]:<40} {case["params"]["engine"]:<12} {case["bytes"]:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+bench_simulation.py
+-------------------
+Microbenchmark of the simulation processors and the SimulationService.
+
+Covers a single `SimulationProcessor.step`, full runs of the agent engine
+across iteration counts, the vectorized engine across body counts, and
+`SimulationService.run` on the cache-miss path and on cache hits served from
+memory and from the database. Service cases use a temporary SQLite database,
+so the application database is left untouched.
+
+Run with:
+    python -m app.benchmarks.bench_simulation
+"""
+
+import copy
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from sqlalchemy import create_engine
+from app.benchmarks.timing import measure, print_cases
+from app.clients.database import Base, SessionLocal, engine
+from app.clients.write_behind import WriteBehindQueue
+from app.config.simulation_config import default_data, generate_bodies
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.simulation_processor import SimulationProcessor
+from app.services.simulation_service import SimulationService
+
+ITERATIONS: Tuple[int, ...] = (100, 500, 2000)
+QUICK_ITERATIONS: Tuple[int, ...] = (100, 500)
+BODY_COUNTS: Tuple[int, ...] = (2, 10, 100, 250)
+QUICK_BODY_COUNTS: Tuple[int, ...] = (2, 10, 100)
+# Steps per timed batch of `SimulationProcessor.step`
+STEPS: int = 1000
+
+
+@contextmanager
+def temporary_database() -> Iterator[None]:
+    """
+    Bind all sessions to a fresh SQLite database for the duration of the block.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        bench_engine = create_engine(f'sqlite:///{directory}/bench.db', connect_args={'check_same_thread': False})
+        Base.metadata.create_all(bind=bench_engine)
+        SessionLocal.configure(bind=bench_engine)
+        try:
+            yield
+        finally:
+            SessionLocal.configure(bind=engine)
+            bench_engine.dispose()
+
+
+def cases(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Time the processors and the service.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Fewer repetitions and smaller sizes for a fast run.
+
+    Returns
+    -------
+    list of dict
+        Benchmark cases as produced by `measure`.
+    """
+    reps = 3 if quick else 5
+    results: List[Dict[str, Any]] = []
+
+    run = SimulationProcessor().start(default_data)
+    list(run.simulate(iterations=1))
+    universe = run.snapshot.at(run.times['Body2'] - 0.001)
+
+    def steps() -> None:
+        for _ in range(STEPS):
+            run.step('Body2', universe)
+
+    results.append(measure('simulation_processor.step', steps, {'steps': STEPS}, warmups=1, reps=reps))
+
+    for iterations in QUICK_ITERATIONS if quick else ITERATIONS:
+        results.append(measure(
+            'simulation_processor.simulate',
+            lambda: SimulationProcessor().run(default_data, iterations=iterations),
+            {'iterations': iterations, 'bodies': len(default_data)}, reps=reps,
+        ))
+
+    for count in QUICK_BODY_COUNTS if quick else BODY_COUNTS:
+        bodies = generate_bodies(count)
+        results.append(measure(
+            'nbody_processor.simulate',
+            lambda: NBodyProcessor().run(bodies, iterations=100),
+            {'iterations': 100, 'bodies': count}, reps=reps,
+        ))
+
+    with temporary_database():
+        service = SimulationService()
+        # Rows must be written before the temporary database is removed
+        service.writer = WriteBehindQueue(SessionLocal)
+        variants = iter(range(10 ** 9))
+
+        def miss() -> None:
+            params = copy.deepcopy(default_data)
+            params['Body2']['mass'] += next(variants) * 1e-12
+            service.run(params)
+
+        def hit_database() -> None:
+            service.cache.clear()
+            service.run(default_data)
+
+        try:
+            results.append(measure('simulation_service.run_miss', miss, {'iterations': 500}, reps=reps))
+            service.run(default_data)
+            results.append(measure('simulation_service.run_hit_memory', lambda: service.run(default_data), reps=reps))
+            # Database hits must not be served from rows still waiting to be written
+            service.writer.flush()
+            results.append(measure('simulation_service.run_hit_database', hit_database, reps=reps))
+        finally:
+            service.writer.close()
+    return results
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print_cases(cases())
+
+
+if __name__ == '__main__':
+    main()
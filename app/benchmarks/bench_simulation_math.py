@@ -0,0 +1,81 @@
+"""
+bench_simulation_math.py
+------------------------
+Microbenchmark of the propagators in `simulation_math`.
+
+The scalar propagators are timed over a batch of calls, as the agent engine
+invokes them once per body and step; the vectorized all-pairs acceleration
+is timed at growing body counts.
+
+Run with:
+    python -m app.benchmarks.bench_simulation_math
+"""
+
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from app.benchmarks.timing import measure, print_cases
+from app.utilities.physics.simulation_math import (
+    accelerations_direct,
+    adaptive_timestep_manager,
+    propagate_position,
+    propagate_velocity,
+    time_manager,
+    timestep_manager,
+)
+
+# Calls per timed batch of the scalar propagators
+CALLS: int = 1000
+BODY_COUNTS: Tuple[int, ...] = (10, 100, 1000)
+QUICK_BODY_COUNTS: Tuple[int, ...] = (10, 100)
+
+
+def cases(quick: bool = False) -> List[Dict[str, Any]]:
+    """
+    Time each propagator.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Fewer repetitions and smaller body counts for a fast run.
+
+    Returns
+    -------
+    list of dict
+        Benchmark cases as produced by `measure`.
+    """
+    reps = 3 if quick else 10
+    position = {'x': 60.34, 'y': 0.0, 'z': 0.0}
+    velocity = {'x': 0.0, 'y': 0.13, 'z': 0.0}
+    other = {'x': -0.73, 'y': 0.0, 'z': 0.0}
+    other_velocity = {'x': 0.0, 'y': -0.0015, 'z': 0.0}
+    scalar = {
+        'propagate_velocity': lambda: propagate_velocity(100.0, position, velocity, other, 1.0),
+        'propagate_position': lambda: propagate_position(100.0, position, velocity),
+        'timestep_manager': lambda: timestep_manager(velocity),
+        'adaptive_timestep_manager': lambda: adaptive_timestep_manager(position, velocity, 0.123, other, other_velocity, 1.0),
+        'time_manager': lambda: time_manager(0.0, 100.0),
+    }
+    results: List[Dict[str, Any]] = []
+    for name, func in scalar.items():
+        def batch(func: Any = func) -> None:
+            for _ in range(CALLS):
+                func()
+        results.append(measure(f'simulation_math.{name}', batch, {'calls': CALLS}, warmups=1, reps=reps))
+
+    rng = np.random.default_rng(0)
+    for count in QUICK_BODY_COUNTS if quick else BODY_COUNTS:
+        positions, masses = rng.normal(size=(count, 3)), rng.uniform(size=count)
+        results.append(measure(
+            'simulation_math.accelerations_direct',
+            lambda: accelerations_direct(positions, masses), {'bodies': count}, warmups=1, reps=reps,
+        ))
+    return results
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print_cases(cases())
+
+
+if __name__ == '__main__':
+    main()
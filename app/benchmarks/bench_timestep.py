@@ -0,0 +1,111 @@
+"""
+bench_timestep.py
+-----------------
+Steps, wall time and energy error of adaptive against fixed timesteps.
+
+A light body is integrated over one full period of an eccentric orbit
+(e = 0.9) around a heavy body at rest, with the semi-implicit Euler scheme
+of the agent configuration. Fixed stepping has to use a uniformly small
+step to resolve periapsis; the adaptive controller only shrinks the step
+there. The error is the largest relative deviation of the specific orbital
+energy from its initial value.
+
+Run with:
+    python -m app.benchmarks.bench_timestep
+"""
+
+import math
+import time
+from typing import Callable, Dict, List, Tuple, Union
+from app.utilities.physics.simulation_math import (
+    adaptive_timestep_manager, propagate_position, propagate_velocity
+)
+
+# Orbit of the light body around a unit mass: apoapsis distance and eccentricity
+APOAPSIS: float = 60.0
+ECCENTRICITY: float = 0.9
+FIXED_STEPS: Tuple[float, ...] = (2.0, 1.0, 0.5, 0.2, 0.1)
+TOLERANCES: Tuple[float, ...] = (0.02, 0.01, 0.005, 0.002)
+
+Vector = Dict[str, float]
+
+
+def scenario() -> Tuple[Vector, Vector, float]:
+    """
+    Initial state of the light body at apoapsis, and the orbital period.
+    """
+    semi_major = APOAPSIS / (1 + ECCENTRICITY)
+    speed = math.sqrt((1 - ECCENTRICITY) / APOAPSIS)
+    period = 2 * math.pi * math.sqrt(semi_major ** 3)
+    return {'x': APOAPSIS, 'y': 0.0, 'z': 0.0}, {'x': 0.0, 'y': speed, 'z': 0.0}, period
+
+
+def energy(position: Vector, velocity: Vector) -> float:
+    """
+    Specific orbital energy of the light body around the unit mass.
+    """
+    speed_sq = velocity['x'] ** 2 + velocity['y'] ** 2 + velocity['z'] ** 2
+    return speed_sq / 2 - 1 / math.sqrt(position['x'] ** 2 + position['y'] ** 2 + position['z'] ** 2)
+
+
+def integrate(next_step: Callable[[Vector, Vector], float]) -> Dict[str, float]:
+    """
+    Integrate one orbital period with the given timestep function.
+
+    Returns
+    -------
+    dict
+        Number of steps, wall time in seconds and maximum relative energy error.
+    """
+    center = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+    position, velocity, period = scenario()
+    initial = energy(position, velocity)
+    t, steps, error = 0.0, 0, 0.0
+    start = time.perf_counter()
+    time_step = next_step(position, velocity)
+    while t < period:
+        velocity = propagate_velocity(time_step, position, velocity, center, 1.0)
+        position = propagate_position(time_step, position, velocity)
+        t += time_step
+        steps += 1
+        error = max(error, abs(energy(position, velocity) / initial - 1))
+        time_step = next_step(position, velocity)
+    return {'steps': steps, 'wall_s': time.perf_counter() - start, 'energy_error': error}
+
+
+def run() -> List[Dict[str, Union[str, float]]]:
+    """
+    Benchmark fixed steps and adaptive tolerances over the same interval.
+
+    Returns
+    -------
+    list of dict
+        One row per fixed step or tolerance with steps, wall time and error.
+    """
+    center = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+    rows: List[Dict[str, Union[str, float]]] = []
+    for step in FIXED_STEPS:
+        def fixed(position: Vector, velocity: Vector, step: float = step) -> float:
+            return step
+        rows.append({'control': 'fixed', 'setting': step, **integrate(fixed)})
+    for tolerance in TOLERANCES:
+        def adaptive(position: Vector, velocity: Vector, tolerance: float = tolerance) -> float:
+            return adaptive_timestep_manager(
+                position, velocity, 0.0, center, center, 1.0, tolerance=tolerance, min_step=0.001, max_step=100.0
+            )
+        rows.append({'control': 'adaptive', 'setting': tolerance, **integrate(adaptive)})
+    return rows
+
+
+def main() -> None:
+    """Print the benchmark table."""
+    print(f'{"control":>8} {"setting":>7} {"steps":>7} {"wall (s)":>8} {"energy err":>10}')
+    for row in run():
+        print(
+            f'{row["control"]:>8} {row["setting"]:>7} {row["steps"]:>7} '
+            f'{row["wall_s"]:>8.3f} {row["energy_error"]:>10.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+suite.py
+--------
+Runs the microbenchmark suite and writes its results as JSON.
+
+The output records the environment (commit, Python and NumPy versions,
+platform) next to every case, so results of different commits can be
+compared. With `--compare`, cases that got slower than a baseline file by
+more than the threshold are reported and the run exits with status 1.
+
+Run with:
+    python -m app.benchmarks.suite --output bench.json
+    python -m app.benchmarks.suite --quick --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from app.benchmarks import (
+    bench_qrange_store, bench_query_parser, bench_serialization, bench_simulation, bench_simulation_math
+)
+from app.benchmarks.timing import print_cases
+
+# Benchmark groups of the suite, by name
+GROUPS: Dict[str, Callable[[bool], List[Dict[str, Any]]]] = {
+    'qrange_store': bench_qrange_store.cases,
+    'query_parser': bench_query_parser.cases,
+    'simulation_math': bench_simulation_math.cases,
+    'simulation': bench_simulation.cases,
+    'serialization': bench_serialization.cases,
+}
+# Relative slowdown of the best time that counts as a regression
+REGRESSION_THRESHOLD: float = 0.25
+
+
+def run_suite(groups: Optional[List[str]] = None, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run the selected benchmark groups.
+
+    Parameters
+    ----------
+    groups : list of str, optional
+        Names of the groups to run; all groups by default.
+    quick : bool, optional
+        Use fewer repetitions and smaller sizes.
+
+    Returns
+    -------
+    dict
+        Environment metadata and the list of benchmark cases.
+    """
+    cases: List[Dict[str, Any]] = []
+    for name in groups or list(GROUPS):
+        cases.extend(GROUPS[name](quick))
+    return {'metadata': _metadata(quick), 'cases': cases}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare the best times of matching cases.
+
+    Parameters
+    ----------
+    baseline, current : dict
+        Suite results as written by `run_suite`.
+    threshold : float, optional
+        Relative slowdown above which a case is a regression.
+
+    Returns
+    -------
+    list of dict
+        Name, parameters, both best times and the ratio of every case that
+        exists in both runs, with a `regression` flag.
+    """
+    reference = {_key(case): case for case in baseline['cases']}
+    rows = []
+    for case in current['cases']:
+        before = reference.get(_key(case))
+        if before is None:
+            continue
+        ratio = case['best'] / before['best'] if before['best'] > 0 else float('inf')
+        rows.append({
+            'name': case['name'],
+            'params': case['params'],
+            'baseline': before['best'],
+            'current': case['best'],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+    return rows
+
+
+def _key(case: Dict[str, Any]) -> str:
+    """
+    Identity of a case across runs: its name and parameters.
+    """
+    return json.dumps([case['name'], case['params']], sort_keys=True)
+
+
+def _metadata(quick: bool) -> Dict[str, Any]:
+    """
+    Describe the environment the suite ran in.
+    """
+    try:
+        commit: Optional[str] = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'quick': quick,
+    }
+
+
+def main() -> None:
+    """Run the suite, print and write the results, and optionally compare them."""
+    parser = argparse.ArgumentParser(description='Run the Sedaro Nano microbenchmark suite.')
+    parser.add_argument('--output', default='benchmark-results.json', help='path of the JSON results file')
+    parser.add_argument('--group', action='append', choices=list(GROUPS), help='group to run (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='fewer repetitions and smaller sizes')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='regression threshold')
+    args = parser.parse_args()
+
+    results = run_suite(args.group, args.quick)
+    print_cases(results['cases'])
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'\nWrote {len(results["cases"])} cases to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as file:
+            rows = compare(json.load(file), results, args.threshold)
+        print(f'\n{"case":<40} {"params":<32} {"ratio":>7}')
+        for row in rows:
+            params = ' '.join(f'{key}={value}' for key, value in row['params'].items())
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f'{row["name"]:<40} {params:<32} {row["ratio"]:>6.2f}x{flag}')
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+timing.py
+---------
+Shared timing helpers for the Sedaro Nano microbenchmarks.
+
+Warm-up and repetition counts default to the values in `General`.
+Benchmark cases are reported as flat dicts so the suite runner can write
+them as JSON and compare runs.
+"""
+
+import gc
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.utilities.constants.general import General
+
+
+def time_call(
+    func: Callable[[], Any],
+    warmups: int = General.NO_OF_WARMUPS,
+    reps: int = General.NO_OF_REPS,
+) -> Dict[str, float]:
+    """
+    Time repeated calls of a zero-argument callable.
+
+    Parameters
+    ----------
+    func : callable
+        Function to benchmark.
+    warmups : int, optional
+        Number of untimed calls before measuring.
+    reps : int, optional
+        Number of timed calls.
+
+    Returns
+    -------
+    dict
+        Best, mean and total wall time in seconds over the timed calls.
+    """
+    for _ in range(warmups):
+        func()
+    samples = []
+    for _ in range(max(reps, 1)):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        'best': min(samples),
+        'mean': sum(samples) / len(samples),
+        'total': sum(samples),
+    }
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    params: Optional[Dict[str, Any]] = None,
+    warmups: int = General.NO_OF_WARMUPS,
+    reps: int = General.NO_OF_REPS,
+) -> Dict[str, Any]:
+    """
+    Time a benchmark case and describe it as a machine-readable record.
+
+    Garbage from earlier cases is collected first so it is not charged to
+    this case.
+
+    Parameters
+    ----------
+    name : str
+        Dotted case name, e.g. 'qrange_store.insert'.
+    func : callable
+        Function to benchmark.
+    params : dict, optional
+        Case parameters such as sizes; part of the case identity.
+    warmups : int, optional
+        Number of untimed calls before measuring.
+    reps : int, optional
+        Number of timed calls.
+
+    Returns
+    -------
+    dict
+        Name, parameters, repetition count and best/mean/total seconds.
+    """
+    gc.collect()
+    return {'name': name, 'params': params or {}, 'reps': max(reps, 1), **time_call(func, warmups, reps)}
+
+
+def print_cases(cases: List[Dict[str, Any]]) -> None:
+    """
+    Print benchmark cases as a table of best and mean wall times.
+    """
+    print(f'{"case":<40} {"params":<32} {"best (ms)":>10} {"mean (ms)":>10}')
+    for case in cases:
+        params = ' '.join(f'{key}={value}' for key, value in case['params'].items())
+        print(f'{case["name"]:<40} {params:<32} {case["best"] * 1e3:>10.3f} {case["mean"] * 1e3:>10.3f}')
@@ -3,13 +3,23 @@ database.py
 -----------
 Defines the database engine, session factory, and declarative base for ORM models.
 This module acts as the database client, providing connectivity to the SQLite database.
+
+SQLite files are opened in WAL mode, so readers do not block on the writer,
+and blocking database calls of request handlers run on a dedicated executor
+via `run_db`, off the event loop.
 """
 
-from sqlalchemy import create_engine
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from app.config.settings import Settings
 
+T = TypeVar('T')
+
 
 class Base(DeclarativeBase):
     """
@@ -21,11 +31,44 @@ class Base(DeclarativeBase):
     pass
 
 
+def _engine_options(url: str) -> Dict[str, Any]:
+    """
+    Connection and pool options for a database URL.
+
+    SQLite connections are shared between threads and wait for locks
+    instead of failing; file databases get a pool of `DB_POOL_SIZE`
+    connections (in-memory databases keep their single shared connection).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite':
+        return {'pool_size': Settings.DB_POOL_SIZE, 'pool_pre_ping': True}
+    options: Dict[str, Any] = {
+        'connect_args': {'check_same_thread': False, 'timeout': Settings.SQLITE_BUSY_TIMEOUT},
+    }
+    if parsed.database not in (None, '', ':memory:'):
+        options.update(pool_size=Settings.DB_POOL_SIZE, max_overflow=Settings.DB_POOL_SIZE)
+    return options
+
+
 # Create the SQLAlchemy engine
-engine: Engine = create_engine(
-    Settings.BACKEND_DATABASE_URL,
-    connect_args={'check_same_thread': False} if Settings.BACKEND_DATABASE_URL.startswith('sqlite') else {}
-)
+engine: Engine = create_engine(Settings.BACKEND_DATABASE_URL, **_engine_options(Settings.BACKEND_DATABASE_URL))
+
+
+@event.listens_for(engine, 'connect')
+def _configure_sqlite(dbapi_connection: Any, connection_record: Any) -> None:
+    """
+    Switch SQLite files to write-ahead logging on every new connection.
+
+    In WAL mode reads proceed while a write is in progress, and commits only
+    append to the log, so `synchronous=NORMAL` is still crash-safe.
+    """
+    if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
 
 # Session factory bound to the engine
 SessionLocal: sessionmaker[Session] = sessionmaker(
@@ -33,3 +76,25 @@ SessionLocal: sessionmaker[Session] = sessionmaker(
     autoflush=False,
     bind=engine
 )
+
+# Threads that run blocking database calls for request handlers, one per pooled connection
+db_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=Settings.DB_POOL_SIZE, thread_name_prefix='db')
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking call that accesses the database on `db_executor`.
+
+    Parameters
+    ----------
+    func : callable
+        Function to call, e.g. a service method.
+    *args, **kwargs
+        Arguments of the call.
+
+    Returns
+    -------
+    any
+        The result of the call; its exceptions propagate.
+    """
+    return await asyncio.get_running_loop().run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,195 @@
+"""
+migrations.py
+-------------
+Brings existing databases up to the current ORM schema.
+
+`Base.metadata.create_all` only creates missing tables, so changes to
+existing tables are applied here. Every migration is idempotent and runs at
+application startup after the tables have been created.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict
+from sqlalchemy import Integer, LargeBinary, String, Table, delete, func, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from app.config.simulation_config import RunOptions, default_options
+from app.models.simulation_model import KEY_VERSION, Simulation
+from app.services.cache_key import cache_key
+from app.utilities.structures.columnar_results import encode_results
+
+logger = logging.getLogger('uvicorn')
+
+# Number of legacy rows converted per transaction
+MIGRATION_BATCH_SIZE: int = 100
+# Number of iterations of every run saved before it was a run option
+LEGACY_ITERATIONS: int = 500
+# Table of the Simulation model; taken from the metadata, which types it as a Table
+SIMULATIONS: Table = Simulation.metadata.tables[Simulation.__tablename__]
+
+
+def run_migrations(bind: Engine) -> None:
+    """
+    Apply all schema and data migrations.
+
+    Parameters
+    ----------
+    bind : Engine
+        Engine of the database to migrate.
+    """
+    _add_results_blob(bind)
+    _convert_results_json(bind)
+    _add_prefix_columns(bind)
+    _unique_params_hash(bind)
+    _rekey_simulations(bind)
+
+
+def _add_results_blob(bind: Engine) -> None:
+    """
+    Add the `results_blob` column to simulations tables created before it existed.
+    """
+    table = SIMULATIONS
+    columns = {column['name'] for column in inspect(bind).get_columns(table.name)}
+    if 'results_blob' in columns:
+        return
+    column_type = LargeBinary().compile(dialect=bind.dialect)
+    with bind.begin() as connection:
+        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN results_blob {column_type}'))
+    logger.info('Added results_blob column to %s', table.name)
+
+
+def _convert_results_json(bind: Engine) -> None:
+    """
+    Re-encode legacy JSON results into the columnar format, in batches.
+
+    Converted rows keep an empty `results_json`.
+    """
+    table = SIMULATIONS
+    pending = (
+        select(table.c.id, table.c.results_json)
+        .where(table.c.results_blob.is_(None), table.c.results_json != '')
+        .limit(MIGRATION_BATCH_SIZE)
+    )
+    converted = 0
+    while True:
+        with bind.begin() as connection:
+            rows = connection.execute(pending).all()
+            for row_id, results_json in rows:
+                if not isinstance(results_json, (str, bytes)):
+                    raise TypeError(f'Results of simulation {row_id} are not JSON text')
+                connection.execute(
+                    update(table)
+                    .where(table.c.id == row_id)
+                    .values(results_blob=encode_results(json.loads(results_json)), results_json='')
+                )
+        converted += len(rows)
+        if len(rows) < MIGRATION_BATCH_SIZE:
+            break
+    if converted:
+        logger.info('Converted %d simulation results to the columnar format', converted)
+
+
+def _add_prefix_columns(bind: Engine) -> None:
+    """
+    Add the `base_hash` and `iterations` columns and fill them for older rows.
+
+    Older rows all ran the default number of iterations, which is not part
+    of their params_hash, so their base hash is their params_hash.
+    """
+    table = SIMULATIONS
+    columns = {column['name'] for column in inspect(bind).get_columns(table.name)}
+    added = [
+        (name, column_type.compile(dialect=bind.dialect))
+        for name, column_type in (('base_hash', String(64)), ('iterations', Integer()))
+        if name not in columns
+    ]
+    with bind.begin() as connection:
+        for name, column_type in added:
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}'))
+        filled = connection.execute(
+            update(table)
+            .where(table.c.base_hash.is_(None))
+            .values(base_hash=table.c.params_hash, iterations=LEGACY_ITERATIONS)
+        ).rowcount
+    for index in table.indexes:
+        if 'base_hash' in index.columns:
+            index.create(bind, checkfirst=True)
+    if added:
+        logger.info('Added %s columns to %s', ', '.join(name for name, _ in added), table.name)
+    if filled:
+        logger.info('Filled prefix columns of %d simulations', filled)
+
+
+def _unique_params_hash(bind: Engine) -> None:
+    """
+    Remove duplicate rows of every parameters hash and make the hash unique.
+
+    Before the hash was unique, identical requests computed concurrently
+    could each store a row; only the most recent row of every hash is kept.
+    """
+    table = SIMULATIONS
+    (index,) = [index for index in table.indexes if list(index.columns.keys()) == ['params_hash']]
+    existing = {entry['name']: entry.get('unique', False) for entry in inspect(bind).get_indexes(table.name)}
+    if existing.get(index.name):
+        return
+    latest = select(func.max(table.c.id)).group_by(table.c.params_hash)
+    with bind.begin() as connection:
+        removed = connection.execute(delete(table).where(table.c.id.not_in(latest))).rowcount
+        if index.name in existing:
+            index.drop(connection)
+        index.create(connection)
+    logger.info('Made params_hash of %s unique, removing %d duplicate rows', table.name, removed)
+
+
+def _rekey_simulations(bind: Engine) -> None:
+    """
+    Recompute the hashes of rows saved before `cache_key`, in batches.
+
+    Those rows are keyed by the hash of the request as sent, and every one
+    of them ran the default options for `LEGACY_ITERATIONS` iterations, so
+    they get the `cache_key` of that run. A row whose hash is not the hash
+    of its parameters keeps it; no request produces it any more, so the row
+    is only found by id. A row whose new hash is already stored, e.g. the
+    same run spelled differently, is removed.
+    """
+    table = SIMULATIONS
+    columns = {column['name'] for column in inspect(bind).get_columns(table.name)}
+    if 'key_version' not in columns:
+        with bind.begin() as connection:
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN key_version {Integer().compile(dialect=bind.dialect)}'))
+        logger.info('Added key_version column to %s', table.name)
+    options: RunOptions = {**default_options, 'iterations': LEGACY_ITERATIONS}
+    pending = (
+        select(table.c.id, table.c.params_json, table.c.params_hash)
+        .where(table.c.key_version.is_(None))
+        .limit(MIGRATION_BATCH_SIZE)
+    )
+    rekeyed = removed = 0
+    while True:
+        with bind.begin() as connection:
+            rows = connection.execute(pending).all()
+            for row_id, params_json, params_hash in rows:
+                values: Dict[str, Any] = {'key_version': KEY_VERSION}
+                try:
+                    if not isinstance(params_json, (str, bytes)):
+                        raise TypeError(f'Parameters of simulation {row_id} are not JSON text')
+                    params = json.loads(params_json)
+                    if hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest() == params_hash:
+                        values['params_hash'] = cache_key(params, options)
+                        values['base_hash'] = cache_key(params, {**options, 'iterations': default_options['iterations']})
+                except (TypeError, ValueError, AttributeError):
+                    logger.warning('Kept the legacy hash of simulation %d with unreadable parameters', row_id)
+                duplicate = 'params_hash' in values and connection.execute(
+                    select(table.c.id).where(table.c.params_hash == values['params_hash'], table.c.id != row_id)
+                ).first()
+                if duplicate:
+                    connection.execute(delete(table).where(table.c.id == row_id))
+                    removed += 1
+                    continue
+                connection.execute(update(table).where(table.c.id == row_id).values(**values))
+                rekeyed += 'params_hash' in values
+        if len(rows) < MIGRATION_BATCH_SIZE:
+            break
+    if rekeyed or removed:
+        logger.info('Recomputed the hashes of %d simulations, removing %d duplicate rows', rekeyed, removed)
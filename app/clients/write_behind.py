@@ -0,0 +1,249 @@
+"""
+write_behind.py
+---------------
+Write-behind queue for database inserts.
+
+Components
+----------
+- WriteBehindQueue : Accepts ORM rows without blocking, and inserts them
+  from a background thread in batches, one transaction per batch. Rows are
+  readable through the queue until their batch is committed.
+- insert_rows : Inserts ORM rows, skipping rows that duplicate a unique key.
+- write_behind : The queue of the application database.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.config.settings import Settings
+from app.clients.database import SessionLocal
+
+logger = logging.getLogger('uvicorn')
+
+# Write-behind queue metrics
+db_write_queue_depth = Gauge(
+    'simulation_db_write_queue_depth',
+    'Number of rows waiting to be written to the database'
+)
+db_write_batch_rows = Histogram(
+    'simulation_db_write_batch_rows',
+    'Number of rows written per database transaction',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+db_write_seconds = Histogram(
+    'simulation_db_write_seconds',
+    'Time to write one batch of rows to the database in seconds',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+db_write_failures_total = Counter(
+    'simulation_db_write_failures_total',
+    'Total number of rows that could not be written to the database'
+)
+
+# Pending write: key, ORM row and the value readers get for the key
+Entry = Tuple[str, Any, Any]
+
+# Queue item that stops the writer thread
+_STOP = object()
+
+# Insert constructs of the dialects that support ON CONFLICT DO NOTHING
+_INSERTS: Dict[str, Callable[..., Any]] = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def insert_rows(session: Session, rows: List[Any]) -> None:
+    """
+    Insert ORM rows, skipping rows that duplicate a unique key.
+
+    Rows with a unique key that is already stored, e.g. the results of a
+    run that another process saved first, are skipped instead of failing
+    the transaction. Dialects without ON CONFLICT DO NOTHING add the rows
+    through the session, where duplicates raise.
+
+    Parameters
+    ----------
+    session : Session
+        Session of the transaction to insert in.
+    rows : list
+        ORM instances to insert.
+    """
+    insert = _INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        session.add_all(rows)
+        return
+    tables: Dict[Any, List[Any]] = {}
+    for row in rows:
+        tables.setdefault(row.__table__, []).append(row)
+    for table, group in tables.items():
+        # Columns left unset on every row get their defaults
+        keys = [column.key for column in table.columns if any(getattr(row, column.key) is not None for row in group)]
+        session.execute(
+            insert(table).on_conflict_do_nothing(),
+            [{key: getattr(row, key) for key in keys} for row in group],
+        )
+
+
+class WriteBehindQueue:
+    """
+    Batches database inserts on a background thread.
+
+    `put` only enqueues a row, so callers never wait for the database. The
+    writer thread collects rows for up to `max_delay` seconds or
+    `batch_size` rows and inserts them in one transaction; if the
+    transaction fails, the rows are retried one by one so a single bad row
+    does not lose the batch. Rows whose unique key is already stored are
+    skipped, see `insert_rows`. Until a row is committed, its value is served
+    by `get` and `pending`, so reads never miss a write in flight. Rows are
+    not expired on commit, so their attributes stay readable.
+
+    Attributes
+    ----------
+    session_factory : callable
+        Creates the sessions rows are written with, e.g. a sessionmaker.
+    batch_size : int
+        Maximum number of rows per transaction.
+    max_delay : float
+        Maximum time in seconds to wait for more rows before writing a batch.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[..., Session],
+        batch_size: int = Settings.DB_WRITE_BATCH_SIZE,
+        max_delay: float = Settings.DB_WRITE_MAX_DELAY,
+    ) -> None:
+        """
+        Initialize the queue; the writer thread starts with the first row.
+        """
+        self.session_factory: Callable[..., Session] = session_factory
+        self.batch_size: int = batch_size
+        self.max_delay: float = max_delay
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: Dict[str, Entry] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, key: str, row: Any, value: Any = None) -> None:
+        """
+        Enqueue a row for insertion.
+
+        Parameters
+        ----------
+        key : str
+            Key the row is read by, e.g. its parameters hash.
+        row : object
+            ORM instance to insert.
+        value : any, optional
+            Value returned by `get(key)` until the row is committed.
+        """
+        entry: Entry = (key, row, value)
+        with self._lock:
+            # Re-inserted so `pending` stays in enqueue order
+            self._pending.pop(key, None)
+            self._pending[key] = entry
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+                self._thread.start()
+            self._queue.put(entry)
+            db_write_queue_depth.set(len(self._pending))
+
+    def get(self, key: str) -> Any:
+        """
+        Return the value of a row that is not committed yet.
+
+        Returns
+        -------
+        any
+            The value enqueued with the latest uncommitted row of `key`, or
+            None if there is none.
+        """
+        entry = self._pending.get(key)
+        return entry[2] if entry is not None else None
+
+    def pending(self) -> List[Tuple[Any, Any]]:
+        """
+        Return the (row, value) pairs of all uncommitted rows, oldest first.
+        """
+        with self._lock:
+            return [(row, value) for _, row, value in self._pending.values()]
+
+    def flush(self) -> None:
+        """
+        Wait until every row enqueued so far is written.
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Write the remaining rows and stop the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        """
+        Writer loop: collect a batch, write it, repeat until stopped.
+        """
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: List[Entry] = []
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Entry]) -> None:
+        """
+        Insert a batch in one transaction, falling back to one transaction
+        per row if it fails, then release the batch's pending entries.
+        """
+        try:
+            with db_write_seconds.time(), self.session_factory(expire_on_commit=False) as session:
+                insert_rows(session, [row for _, row, _ in batch])
+                session.commit()
+            db_write_batch_rows.observe(len(batch))
+        except Exception:
+            logger.exception('Batch insert of %d rows failed, retrying row by row', len(batch))
+            for _, row, _ in batch:
+                try:
+                    with self.session_factory(expire_on_commit=False) as session:
+                        insert_rows(session, [row])
+                        session.commit()
+                except Exception:
+                    logger.exception('Dropped database row %r', row)
+                    db_write_failures_total.inc()
+        finally:
+            with self._lock:
+                for entry in batch:
+                    if self._pending.get(entry[0]) is entry:
+                        del self._pending[entry[0]]
+                db_write_queue_depth.set(len(self._pending))
+            for _ in batch:
+                self._queue.task_done()
+
+
+# Write-behind queue of the application database
+write_behind: WriteBehindQueue = WriteBehindQueue(SessionLocal)
+atexit.register(write_behind.close)
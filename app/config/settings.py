@@ -29,6 +29,45 @@ class Settings:
         'QUERY_BIN_PATH',
         os.path.abspath(os.path.join(os.path.dirname(__file__), '../../queries/target/release/sedaro-nano-queries'))
     )
+    # Connections per database pool, and threads of the database executor
+    DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', '8'))
+    # Write-behind batches: maximum rows per transaction and seconds to wait for more rows
+    DB_WRITE_BATCH_SIZE: int = int(os.getenv('DB_WRITE_BATCH_SIZE', '32'))
+    DB_WRITE_MAX_DELAY: float = float(os.getenv('DB_WRITE_MAX_DELAY', '0.05'))
+    # Seconds a SQLite connection waits for a lock held by another connection
+    SQLITE_BUSY_TIMEOUT: float = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))
+    QUERY_CACHE_SIZE: int = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+    PLAN_CACHE_SIZE: int = int(os.getenv('PLAN_CACHE_SIZE', '64'))
+
+    # Simulation configuration
+    # Below this body count the Barnes-Hut solver falls back to the direct sum
+    BARNES_HUT_MIN_BODIES: int = int(os.getenv('BARNES_HUT_MIN_BODIES', '1000'))
+    # Upper bound of the iterations run option
+    MAX_ITERATIONS: int = int(os.getenv('MAX_ITERATIONS', '100000'))
+    # Iterations the vectorized engine integrates per batch of streamed records
+    STREAM_BATCH_ITERATIONS: int = int(os.getenv('STREAM_BATCH_ITERATIONS', '64'))
+    # Adaptive timesteps: fraction of the shortest orbital time scale per step, and step bounds
+    TIMESTEP_TOLERANCE: float = float(os.getenv('TIMESTEP_TOLERANCE', '0.05'))
+    TIMESTEP_MIN: float = float(os.getenv('TIMESTEP_MIN', '0.1'))
+    TIMESTEP_MAX: float = float(os.getenv('TIMESTEP_MAX', '100.0'))
+    # Absolute and relative local error per step targeted by the adaptive RK45 integrator
+    RK45_TOLERANCE: float = float(os.getenv('RK45_TOLERANCE', '1e-6'))
+    # Largest number of times an adaptive RK45 step beyond the tolerance is rejected and retried
+    RK45_MAX_RETRIES: int = int(os.getenv('RK45_MAX_RETRIES', '10'))
+
+    # Job execution configuration
+    SIMULATION_WORKERS: int = int(os.getenv('SIMULATION_WORKERS', '2'))
+    JOB_QUEUE_MAX: int = int(os.getenv('JOB_QUEUE_MAX', '64'))
+    JOB_RETENTION: int = int(os.getenv('JOB_RETENTION', '256'))
+
+    # Result cache configuration
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '128'))
+
+    # Result responses: smallest body to compress, and gzip and zstd compression levels
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv('RESPONSE_GZIP_LEVEL', '1'))
+    RESPONSE_ZSTD_LEVEL: int = int(os.getenv('RESPONSE_ZSTD_LEVEL', '3'))
 
     # Frontend configuration
     FRONTEND_URL: str = os.getenv('FRONTEND_URL', 'http://localhost:3030')
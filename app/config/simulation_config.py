@@ -5,13 +5,21 @@ Defines agent configurations and default initial conditions
 for Sedaro Nano simulations.
 """
 
-from typing import Callable, Dict, List, Union, TypedDict
+import copy
+import math
+import random
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union, TypedDict
 from app.utilities.physics.simulation_math import (
     propagate_velocity,
     propagate_position,
     propagate_mass,
     identity,
     timestep_manager,
+    adaptive_timestep_manager,
+    verlet_step,
+    rk4_step,
+    rk45_step,
+    rk45_controlled_step,
     time_manager,
 )
 
@@ -25,13 +33,14 @@ class AgentConfig(TypedDict):
     consumed : str
         Query expression for values consumed by this step.
     produced : str
-        Name of the value produced by this step.
+        Name of the value, or tuple of values, produced by this step.
     function : Callable
-        Function used to compute the produced value.
+        Function used to compute the produced value; a tuple for a tuple
+        of produced values.
     """
     consumed: str
     produced: str
-    function: Callable[..., Union[Dict[str, float], float]]
+    function: Callable[..., Union[Dict[str, float], float, Tuple[Any, ...]]]
 
 
 class BodyState(TypedDict, total=False):
@@ -58,24 +67,130 @@ class BodyState(TypedDict, total=False):
     mass: float
 
 
-# Agent configuration
-agents: Dict[str, List[AgentConfig]] = {
-    'Body1': [
-        {'consumed': '( prev!(velocity), )', 'produced': 'velocity', 'function': identity},
-        {'consumed': '( prev!(timeStep), prev!(position), velocity, )', 'produced': 'position', 'function': propagate_position},
-        {'consumed': '( prev!(mass), )', 'produced': 'mass', 'function': propagate_mass},
-        {'consumed': '( prev!(time), timeStep )', 'produced': 'time', 'function': time_manager},
-        {'consumed': '( velocity, )', 'produced': 'timeStep', 'function': timestep_manager},
-    ],
-    'Body2': [
-        {'consumed': '( prev!(timeStep), prev!(position), prev!(velocity), agent!(Body1).position, agent!(Body1).mass, )', 'produced': 'velocity', 'function': propagate_velocity},
-        {'consumed': '( prev!(timeStep), prev!(position), velocity, )', 'produced': 'position', 'function': propagate_position},
-        {'consumed': '( prev!(mass), )', 'produced': 'mass', 'function': propagate_mass},
-        {'consumed': '( prev!(time), timeStep )', 'produced': 'time', 'function': time_manager},
-        {'consumed': '( velocity, )', 'produced': 'timeStep', 'function': timestep_manager},
-    ],
+class RunOptions(TypedDict, total=False):
+    """
+    Defines the per-run options accepted alongside the initial conditions.
+
+    Attributes
+    ----------
+    engine : str
+        Simulation backend: 'agents' steps each body through its state
+        managers, 'vectorized' advances all bodies at once as N-body arrays.
+    solver : str
+        Gravity solver of the vectorized engine: 'direct' or 'barnes_hut'.
+    theta : float
+        Barnes-Hut opening angle; smaller is more accurate and slower.
+    timestep : str
+        Timestep control: 'fixed' steps of `FIXED_TIME_STEP`, or 'adaptive'
+        steps scaled to the orbital time scales of the bodies (for 'rk45',
+        to its local error estimate).
+    integrator : str
+        Integration scheme: 'euler' (semi-implicit), 'verlet' (leapfrog),
+        'rk4' or 'rk45' (Dormand-Prince).
+    iterations : int
+        Number of iterations to simulate.
+    record : str
+        Recording policy: 'all' steps, every `record_every`-th step of each
+        body ('stride'), one step per `record_every` units of simulated
+        time ('cadence'), or only the 'final' state of each body.
+    record_every : float
+        Stride in steps or cadence in simulated time of the recording policy.
+    """
+    engine: str
+    solver: str
+    theta: float
+    timestep: str
+    integrator: str
+    iterations: int
+    record: str
+    record_every: float
+
+
+# State manager integrating Body2 around Body1 with each higher-order integrator
+PAIR_CONSUMED: str = '( prev!(timeStep), prev!(position), prev!(velocity), agent!(Body1).position, agent!(Body1).velocity, agent!(Body1).mass, )'
+# The error-controlled RK45 state manager also produces the time of the step it kept
+CONTROLLED_CONSUMED: str = '( prev!(time), prev!(timeStep), prev!(position), prev!(velocity), agent!(Body1).position, agent!(Body1).velocity, agent!(Body1).mass, )'
+PAIR_STEPS: Dict[str, Callable[..., Any]] = {
+    'verlet': verlet_step,
+    'rk4': rk4_step,
+    'rk45': rk45_step,
 }
 
+
+def build_agents(integrator: str = 'euler', timestep: str = 'fixed') -> Dict[str, List[AgentConfig]]:
+    """
+    Build the agent configuration of the two-body scenario.
+
+    Parameters
+    ----------
+    integrator : str, optional
+        'euler' (default) propagates Body2's velocity and position in two
+        state managers; 'verlet', 'rk4' and 'rk45' produce both in a single
+        state manager. Body1 moves at constant velocity, which every
+        integrator propagates exactly, so it always uses Euler.
+    timestep : str, optional
+        'fixed' (default) or 'adaptive'. Adaptive timestep managers consume
+        the body's new state and the other body's latest state; with 'rk45',
+        Body2's integrator produces its time and next step from the error
+        estimate, retrying rejected steps. Adaptive time advances by the step
+        that was integrated.
+
+    Returns
+    -------
+    dict
+        State managers of each agent, keyed by agent id.
+
+    Raises
+    ------
+    ValueError
+        If the integrator or the timestep control is unknown.
+    """
+    if integrator not in INTEGRATORS:
+        raise ValueError(f'Unknown integrator: {integrator}')
+    if timestep not in TIMESTEPS:
+        raise ValueError(f'Unknown timestep control: {timestep}')
+    # Adaptive steps vary, so time advances by the step that was integrated
+    clock: AgentConfig = {
+        'consumed': '( prev!(time), prev!(timeStep) )' if timestep == 'adaptive' else '( prev!(time), timeStep )',
+        'produced': 'time',
+        'function': time_manager,
+    }
+    timesteps: Dict[str, AgentConfig] = {
+        agent_id: (
+            {'consumed': f'( position, velocity, mass, agent!({other}).position, agent!({other}).velocity, agent!({other}).mass, )', 'produced': 'timeStep', 'function': adaptive_timestep_manager}
+            if timestep == 'adaptive' else
+            {'consumed': '( velocity, )', 'produced': 'timeStep', 'function': timestep_manager}
+        )
+        for agent_id, other in (('Body1', 'Body2'), ('Body2', 'Body1'))
+    }
+    motion: List[AgentConfig]
+    stepping: List[AgentConfig] = [clock, timesteps['Body2']]
+    if integrator == 'euler':
+        motion = [
+            {'consumed': '( prev!(timeStep), prev!(position), prev!(velocity), agent!(Body1).position, agent!(Body1).mass, )', 'produced': 'velocity', 'function': propagate_velocity},
+            {'consumed': '( prev!(timeStep), prev!(position), velocity, )', 'produced': 'position', 'function': propagate_position},
+        ]
+    elif integrator == 'rk45' and timestep == 'adaptive':
+        motion = [{'consumed': CONTROLLED_CONSUMED, 'produced': '( position, velocity, time, timeStep, )', 'function': rk45_controlled_step}]
+        stepping = []
+    else:
+        motion = [{'consumed': PAIR_CONSUMED, 'produced': '( position, velocity, )', 'function': PAIR_STEPS[integrator]}]
+    return {
+        'Body1': [
+            {'consumed': '( prev!(velocity), )', 'produced': 'velocity', 'function': identity},
+            {'consumed': '( prev!(timeStep), prev!(position), velocity, )', 'produced': 'position', 'function': propagate_position},
+            {'consumed': '( prev!(mass), )', 'produced': 'mass', 'function': propagate_mass},
+            clock,
+            timesteps['Body1'],
+        ],
+        'Body2': [
+            *motion,
+            {'consumed': '( prev!(mass), )', 'produced': 'mass', 'function': propagate_mass},
+            *stepping,
+        ],
+    }
+
+
 # Default initial conditions
 default_data: Dict[str, BodyState] = {
     'Body1': {
@@ -93,3 +208,95 @@ default_data: Dict[str, BodyState] = {
         'mass': 0.123,
     },
 }
+
+# Default run options
+default_options: RunOptions = {
+    'engine': 'agents',
+    'solver': 'direct',
+    'theta': 0.5,
+    'timestep': 'fixed',
+    'integrator': 'euler',
+    'iterations': 500,
+    'record': 'all',
+    'record_every': 1,
+}
+
+# Supported simulation backends, gravity solvers, timestep controls, integrators and recording policies
+ENGINES: List[str] = ['agents', 'vectorized']
+SOLVERS: List[str] = ['direct', 'barnes_hut']
+TIMESTEPS: List[str] = ['fixed', 'adaptive']
+INTEGRATORS: List[str] = ['euler', 'verlet', 'rk4', 'rk45']
+RECORDINGS: List[str] = ['all', 'stride', 'cadence', 'final']
+
+# Agent configuration of the default run options
+agents: Dict[str, List[AgentConfig]] = build_agents(default_options['integrator'], default_options['timestep'])
+
+
+def merge_params(params: Dict[str, Any], defaults: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Merge user-provided initial conditions into the default initial state.
+
+    The fields given for a body replace its default fields; bodies without
+    defaults are taken as given.
+
+    Parameters
+    ----------
+    params : dict
+        User-specified initial conditions.
+    defaults : mapping, optional
+        Default initial state; `default_data` if omitted.
+
+    Returns
+    -------
+    dict
+        Full initial state, sharing no objects with the defaults or `params`.
+    """
+    merged: Dict[str, Any] = {**(default_data if defaults is None else defaults)}
+    for body, overrides in params.items():
+        if body in merged:
+            merged[body] = {**merged[body], **overrides}
+        else:
+            merged[body] = overrides
+    return copy.deepcopy(merged)
+
+
+def generate_bodies(count: int, seed: int = 0) -> Dict[str, BodyState]:
+    """
+    Generate initial conditions for `count` bodies on roughly circular orbits
+    around a heavy central body, for large-N scenarios of the vectorized engine.
+
+    Parameters
+    ----------
+    count : int
+        Total number of bodies, including the central body.
+    seed : int, optional
+        Seed for the random generator, so scenarios are reproducible.
+
+    Returns
+    -------
+    dict
+        Initial conditions keyed Body1..BodyN.
+    """
+    rng = random.Random(seed)
+    bodies: Dict[str, BodyState] = {
+        'Body1': {
+            'timeStep': 0.01,
+            'time': 0.0,
+            'position': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'velocity': {'x': 0.0, 'y': 0.0, 'z': 0.0},
+            'mass': 1.0,
+        }
+    }
+    for i in range(2, count + 1):
+        radius = rng.uniform(20.0, 100.0)
+        angle = rng.uniform(0.0, 2 * math.pi)
+        speed = (1.0 / radius) ** 0.5
+        x, y = radius * math.cos(angle), radius * math.sin(angle)
+        bodies[f'Body{i}'] = {
+            'timeStep': 0.01,
+            'time': 0.0,
+            'position': {'x': x, 'y': y, 'z': rng.uniform(-1.0, 1.0)},
+            'velocity': {'x': -speed * y / radius, 'y': speed * x / radius, 'z': 0.0},
+            'mass': rng.uniform(1e-6, 1e-4),
+        }
+    return bodies
@@ -3,19 +3,118 @@ simulator_controller.py
 -----------------------
 Defines the FastAPI routes for simulation tasks.
 Handles simulation requests from the frontend and delegates processing
-to the SimulatorService.
+to the SimulatorService, with cache misses running as asynchronous jobs.
+Results can also be streamed as NDJSON or Server-Sent Events while a
+simulation runs. Result responses are JSON or MessagePack, optionally
+compressed and rounded, as negotiated in `result_encoding`.
+
+Handlers never block the event loop: database lookups run on the database
+executor (`run_db`), and synchronous simulations and the encoding and
+compression of results on the thread pool.
 """
 
+import functools
+import json
 import traceback
-from typing import List, Tuple, Dict, Any
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from typing import List, Tuple, Dict, Any, Callable, Coroutine, Iterator, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import Histogram
+from app.clients.database import run_db
 from app.utilities.messages.error_messages import ErrorMessages
-from app.services.simulation_service import SimulationService
+from app.services.simulation_service import SimulationNotFoundError, SimulationService, simulation_serialization_seconds
+from app.services.job_service import JobQueueFullError, JobService
+from app.config.simulation_config import RunOptions
+from app.utilities.structures.result_encoding import encode_json, encode_response
 
-# Create router and service instance
+# Create router and service instances
 simulation_router = APIRouter()
 simulation_service = SimulationService()
+job_service = JobService(simulation_service)
+
+# End-to-end latency of the result endpoints
+simulation_request_seconds = Histogram(
+    'simulation_request_seconds',
+    'End-to-end request latency in seconds',
+    ['endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+simulation_response_bytes = Histogram(
+    'simulation_response_bytes',
+    'Size in bytes of result response bodies by format and content encoding',
+    ['format', 'encoding'],
+    buckets=(1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7, 3e7, 1e8)
+)
+
+# Significant digits of the `precision` parameter of result endpoints
+Precision = Query(None, ge=1, le=17)
+
+# Signature of an async route handler
+Handler = Callable[..., Coroutine[Any, Any, Any]]
+
+# Media type of each supported stream format
+STREAM_MEDIA_TYPES: Dict[str, str] = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+
+def _timed(endpoint: str) -> Callable[[Handler], Handler]:
+    """
+    Record the latency of an endpoint in `simulation_request_seconds`,
+    including failed requests.
+    """
+    def decorator(handler: Handler) -> Handler:
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with simulation_request_seconds.labels(endpoint=endpoint).time():
+                return await handler(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ResultsResponse(Response):
+    """
+    Response for simulation results encoded by `encode_response`.
+
+    The body is JSON, or MessagePack if the client prefers it, compressed
+    with gzip or zstd if the client accepts it, with floats rounded to
+    `precision` significant digits if given.
+    """
+
+    def __init__(self, body: bytes, media_type: str, encoding: Optional[str], status_code: int = 200) -> None:
+        """
+        Initialize the response from an encoded body, its media type and content encoding.
+        """
+        headers = {'Vary': 'Accept, Accept-Encoding'}
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        simulation_response_bytes.labels(format=media_type.split('/')[-1], encoding=encoding or 'identity').observe(len(body))
+        super().__init__(content=body, status_code=status_code, headers=headers, media_type=media_type)
+
+
+def _encode_results(
+    result: Any, accept: Optional[str], accept_encoding: Optional[str], precision: Optional[int]
+) -> Tuple[bytes, str, Optional[str]]:
+    """
+    Encode simulation results as negotiated, recording the time spent
+    serializing them.
+    """
+    with simulation_serialization_seconds.labels(operation='response').time():
+        return encode_response(result, accept, accept_encoding, precision)
+
+
+async def _results_response(result: Any, request: Request, precision: Optional[int] = None) -> Response:
+    """
+    Build the response for simulation results, encoding and compressing
+    them on the thread pool.
+    """
+    body, media_type, encoding = await run_in_threadpool(
+        _encode_results, result, request.headers.get('accept'), request.headers.get('accept-encoding'), precision
+    )
+    return ResultsResponse(body, media_type, encoding)
 
 
 @simulation_router.get('/')
@@ -35,27 +134,310 @@ async def health_check() -> JSONResponse:
 
 
 @simulation_router.post('/run')
-async def run_simulation(params: Dict[str, Any]) -> JSONResponse:
+@_timed('/run')
+async def run_simulation(
+    request: Request,
+    params: Dict[str, Any],
+    engine: str = 'agents',
+    solver: str = 'direct',
+    theta: float = 0.5,
+    timestep: str = 'fixed',
+    integrator: str = 'euler',
+    iterations: int = 500,
+    record: str = 'all',
+    record_every: float = 1,
+    profile: bool = False,
+    precision: Optional[int] = Precision,
+) -> Response:
     """
     Run a simulation with caching.
 
     If identical parameters exist in the database, the cached results
-    are returned. Otherwise, a new simulation is executed, persisted,
-    and the results are returned.
+    are returned with status 200. Otherwise, the simulation is submitted
+    as a job to the worker pool and its id is returned with status 202;
+    poll `/jobs/{job_id}` and fetch `/jobs/{job_id}/result` when done.
+    A run that extends a cached run with fewer iterations resumes from its
+    final state.
+
+    With `profile=true`, the simulation is always computed synchronously and
+    the response is `{'results': [...], 'profile': {...}}`, with call counts,
+    total and mean seconds per phase, agent and state manager.
 
     Parameters
     ----------
     params : dict
         Dictionary containing initial conditions for the simulation.
+    engine : str, optional
+        Simulation backend, 'agents' (default) or 'vectorized'.
+    solver : str, optional
+        Gravity solver of the vectorized engine, 'direct' (default) or 'barnes_hut'.
+    theta : float, optional
+        Barnes-Hut opening angle (default = 0.5).
+    timestep : str, optional
+        Timestep control, 'fixed' (default) or 'adaptive'.
+    integrator : str, optional
+        Integrator, 'euler' (default), 'verlet', 'rk4' or 'rk45'.
+    iterations : int, optional
+        Number of iterations to run (default = 500).
+    record : str, optional
+        Steps to return and store: 'all' (default), every `record_every`-th
+        step ('stride'), one step per `record_every` units of simulated time
+        ('cadence') or the 'final' state of each body.
+    record_every : float, optional
+        Stride or cadence of the recording policy (default = 1).
+    profile : bool, optional
+        Profile the run and return the profile with the results (default = False).
+    precision : int, optional
+        Significant digits to round floats of the results to (1-17); full
+        precision by default.
+
+    Returns
+    -------
+    Response
+        Cached simulation results, the submitted job's id and status, or
+        the profiled results.
+    """
+    options: RunOptions = {
+        'engine': engine,
+        'solver': solver,
+        'theta': theta,
+        'timestep': timestep,
+        'integrator': integrator,
+        'iterations': iterations,
+        'record': record,
+        'record_every': record_every,
+    }
+    try:
+        if profile:
+            results, run_profile = await run_in_threadpool(simulation_service.run_profiled, params, options)
+            return await _results_response({'results': results, 'profile': run_profile}, request, precision)
+        result, job = await run_db(job_service.submit, params, options)
+        if job is None:
+            return await _results_response(result, request, precision)
+        return JSONResponse(content=job.describe(), status_code=202)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=ErrorMessages.RUN_FAILED)
+
+
+@simulation_router.post('/run/stream')
+@_timed('/run/stream')
+async def stream_simulation(
+    params: Dict[str, Any],
+    format: str = 'ndjson',
+    engine: str = 'agents',
+    solver: str = 'direct',
+    theta: float = 0.5,
+    timestep: str = 'fixed',
+    integrator: str = 'euler',
+    iterations: int = 500,
+    record: str = 'all',
+    record_every: float = 1,
+) -> StreamingResponse:
+    """
+    Run a simulation with caching, streaming records while they are computed.
+
+    Each (low, high, state_dict) record is sent as one JSON array: one line
+    per record for NDJSON, one `data:` event per record for Server-Sent
+    Events, followed by an `end` event. Cached results are replayed; new
+    results are persisted once the run completes.
+
+    Parameters
+    ----------
+    params : dict
+        Dictionary containing initial conditions for the simulation.
+    format : str, optional
+        Stream format, 'ndjson' (default) or 'sse'.
+    engine : str, optional
+        Simulation backend, 'agents' (default) or 'vectorized'.
+    solver : str, optional
+        Gravity solver of the vectorized engine, 'direct' (default) or 'barnes_hut'.
+    theta : float, optional
+        Barnes-Hut opening angle (default = 0.5).
+    timestep : str, optional
+        Timestep control, 'fixed' (default) or 'adaptive'.
+    integrator : str, optional
+        Integrator, 'euler' (default), 'verlet', 'rk4' or 'rk45'.
+    iterations : int, optional
+        Number of iterations to run (default = 500).
+    record : str, optional
+        Steps to return and store: 'all' (default), every `record_every`-th
+        step ('stride'), one step per `record_every` units of simulated time
+        ('cadence') or the 'final' state of each body.
+    record_every : float, optional
+        Stride or cadence of the recording policy (default = 1).
+
+    Returns
+    -------
+    StreamingResponse
+        Simulation records in the requested format.
+    """
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=ErrorMessages.INVALID_STREAM_FORMAT)
+    try:
+        records = await run_db(simulation_service.stream, params, {
+            'engine': engine,
+            'solver': solver,
+            'theta': theta,
+            'timestep': timestep,
+            'integrator': integrator,
+            'iterations': iterations,
+            'record': record,
+            'record_every': record_every,
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=ErrorMessages.RUN_FAILED)
+    # The synchronous generator is iterated in a worker thread, off the event loop
+    return StreamingResponse(_encode_stream(records, format), media_type=STREAM_MEDIA_TYPES[format])
+
+
+def _encode_stream(records: Iterator[Tuple[float, float, Dict[str, Any]]], format: str) -> Iterator[str]:
+    """
+    Encode streamed records as NDJSON lines or Server-Sent Events.
+
+    A failure after the response has started is reported in-band, as an
+    `error` event or a final `{"error": ...}` line.
+    """
+    try:
+        for record in records:
+            data = encode_json(record).decode('utf-8')
+            yield f'data: {data}\n\n' if format == 'sse' else f'{data}\n'
+    except Exception:
+        traceback.print_exc()
+        error = json.dumps({'error': ErrorMessages.RUN_FAILED})
+        yield f'event: error\ndata: {error}\n\n' if format == 'sse' else f'{error}\n'
+        return
+    if format == 'sse':
+        yield 'event: end\ndata: null\n\n'
+
+
+@simulation_router.get('/jobs/{job_id}')
+async def get_job(job_id: str) -> JSONResponse:
+    """
+    Retrieve the status of a simulation job.
+
+    Parameters
+    ----------
+    job_id : str
+        Identifier returned by `/run`.
 
     Returns
     -------
     JSONResponse
-        Simulation results as JSON data.
+        Job id, status ('queued', 'running', 'succeeded' or 'failed'),
+        timestamps and error, if any.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=ErrorMessages.JOB_NOT_FOUND)
+    return JSONResponse(content=job.describe(), status_code=200)
+
+
+@simulation_router.get('/jobs/{job_id}/result')
+@_timed('/jobs/{job_id}/result')
+async def get_job_result(request: Request, job_id: str, precision: Optional[int] = Precision) -> Response:
+    """
+    Retrieve the results of a simulation job.
+
+    Parameters
+    ----------
+    job_id : str
+        Identifier returned by `/run`.
+    precision : int, optional
+        Significant digits to round floats of the results to (1-17); full
+        precision by default.
+
+    Returns
+    -------
+    Response
+        Simulation results once the job succeeded, or the job status with
+        status 202 while it is still queued or running.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=ErrorMessages.JOB_NOT_FOUND)
+    if job.status == 'failed':
+        raise HTTPException(status_code=500, detail=f'{ErrorMessages.JOB_FAILED} {job.error}')
+    if job.status != 'succeeded':
+        return JSONResponse(content=job.describe(), status_code=202)
+    result: List[Tuple[float, float, Dict[str, Any]]] = await run_db(simulation_service._fetch, job.params_hash)
+    if not result:
+        raise HTTPException(status_code=404, detail=ErrorMessages.SIMULATION_NOT_FOUND)
+    return await _results_response(result, request, precision)
+
+
+@simulation_router.post('/run/ensemble')
+@_timed('/run/ensemble')
+async def run_ensemble(
+    request: Request,
+    params_list: List[Dict[str, Any]],
+    solver: str = 'direct',
+    theta: float = 0.5,
+    timestep: str = 'fixed',
+    integrator: str = 'euler',
+    iterations: int = 500,
+    record: str = 'all',
+    record_every: float = 1,
+    precision: Optional[int] = Precision,
+) -> Response:
+    """
+    Run an ensemble of simulations on the vectorized engine.
+
+    All members share the same bodies and differ only in their initial
+    conditions. Each member is cached under its own parameters, and the
+    members without cached results are advanced together in one run.
+
+    Parameters
+    ----------
+    params_list : list of dict
+        Initial conditions of each ensemble member.
+    solver : str, optional
+        Gravity solver, 'direct' (default) or 'barnes_hut'.
+    theta : float, optional
+        Barnes-Hut opening angle (default = 0.5).
+    timestep : str, optional
+        Timestep control, 'fixed' (default) or 'adaptive'.
+    integrator : str, optional
+        Integrator, 'euler' (default), 'verlet', 'rk4' or 'rk45'.
+    iterations : int, optional
+        Number of iterations to run (default = 500).
+    record : str, optional
+        Steps to return and store: 'all' (default), every `record_every`-th
+        step ('stride'), one step per `record_every` units of simulated time
+        ('cadence') or the 'final' state of each body.
+    record_every : float, optional
+        Stride or cadence of the recording policy (default = 1).
+    precision : int, optional
+        Significant digits to round floats of the results to (1-17); full
+        precision by default.
+
+    Returns
+    -------
+    Response
+        Simulation results of each member, in request order.
     """
     try:
-        result: List[Tuple[float, float, Dict[str, Any]]] = simulation_service.run(params)
-        return JSONResponse(content=result, status_code=200)
+        result: List[List[Tuple[float, float, Dict[str, Any]]]] = await run_in_threadpool(
+            simulation_service.run_ensemble,
+            params_list,
+            {
+                'solver': solver,
+                'theta': theta,
+                'timestep': timestep,
+                'integrator': integrator,
+                'iterations': iterations,
+                'record': record,
+                'record_every': record_every,
+            },
+        )
+        return await _results_response(result, request, precision)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -63,19 +445,76 @@ async def run_simulation(params: Dict[str, Any]) -> JSONResponse:
         raise HTTPException(status_code=500, detail=ErrorMessages.RUN_FAILED)
 
 
+@simulation_router.get('/simulations/{simulation}/query')
+@_timed('/simulations/{simulation}/query')
+async def query_simulation(
+    request: Request,
+    simulation: str,
+    t_start: Optional[float] = None,
+    t_end: Optional[float] = None,
+    bodies: Optional[List[str]] = Query(None),
+    fields: Optional[List[str]] = Query(None),
+    stride: int = 1,
+    precision: Optional[int] = Precision,
+) -> Response:
+    """
+    Retrieve a slice of a stored simulation.
+
+    Parameters
+    ----------
+    simulation : str
+        Simulation id, or its parameters hash (as reported by `/jobs/{job_id}`).
+    t_start, t_end : float, optional
+        Time window; records whose interval overlaps [t_start, t_end) are returned.
+    bodies : list of str, optional
+        Bodies to include, e.g. `bodies=Body1&bodies=Body2`; all by default.
+    fields : list of str, optional
+        Fields to include, e.g. `fields=position` or `fields=position.x`; all by default.
+    stride : int, optional
+        Return every `stride`-th record of each body (default = 1).
+    precision : int, optional
+        Significant digits to round floats of the results to (1-17); full
+        precision by default.
+
+    Returns
+    -------
+    Response
+        Selected (low, high, state_dict) records in simulation order.
+    """
+    try:
+        result: List[Tuple[float, float, Dict[str, Any]]] = await run_db(
+            simulation_service.query, simulation, t_start, t_end, bodies, fields, stride
+        )
+        return await _results_response(result, request, precision)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SimulationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=ErrorMessages.FETCH_FAILED)
+
+
 @simulation_router.get('/latest')
-async def get_latest_simulation() -> JSONResponse:
+@_timed('/latest')
+async def get_latest_simulation(request: Request, precision: Optional[int] = Precision) -> Response:
     """
     Retrieve the most recent simulation result.
 
+    Parameters
+    ----------
+    precision : int, optional
+        Significant digits to round floats of the results to (1-17); full
+        precision by default.
+
     Returns
     -------
-    JSONResponse
-        JSON data of the most recent simulation, or empty dict if none exists.
+    Response
+        Records of the most recent simulation, or an empty list if none exists.
     """
     try:
-        result: List[Tuple[float, float, Dict[str, Any]]] = simulation_service.get_latest()
-        return JSONResponse(content=result, status_code=200)
+        result: List[Tuple[float, float, Dict[str, Any]]] = await run_db(simulation_service.get_latest)
+        return await _results_response(result, request, precision)
     except Exception:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=ErrorMessages.LATEST_FAILED)
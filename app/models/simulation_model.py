@@ -5,10 +5,14 @@ Defines the Object Relational Mapping (ORM) schema for storing simulation runs i
 """
 
 from datetime import datetime
-from sqlalchemy import String, Text, DateTime, func
+from typing import Optional
+from sqlalchemy import Integer, String, Text, DateTime, LargeBinary, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.clients.database import Base
 
+# Scheme of the parameters hash of new rows, `cache_key`; rows keyed by the request as sent have none
+KEY_VERSION: int = 1
+
 
 class Simulation(Base):
     """
@@ -16,6 +20,12 @@ class Simulation(Base):
     ----------
     ORM model representing a simulation run.
     Stores parameters, their hash for caching, results, and timestamp.
+    Results are stored in the columnar binary format of `columnar_results`;
+    rows written before that format keep their results as JSON. Runs that
+    differ only in their number of iterations share a `base_hash`, so a
+    longer run can resume from the results of a shorter one. Every
+    parameters hash is stored once; `key_version` records the scheme it
+    was computed with.
     """
 
     __tablename__ = 'simulations'
@@ -23,10 +33,18 @@ class Simulation(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     # Input parameters (as JSON string)
     params_json: Mapped[str] = mapped_column(Text, nullable=False)
-    # Deterministic hash of parameters for caching
-    params_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
-    # Simulation results (as JSON string)
-    results_json: Mapped[str] = mapped_column(Text, nullable=False)
+    # Deterministic hash of parameters for caching, one row per hash
+    params_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
+    # Hash of parameters and options except the number of iterations
+    base_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    # Number of iterations the results cover
+    iterations: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Scheme of params_hash and base_hash, NULL for rows keyed before it was recorded
+    key_version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=KEY_VERSION)
+    # Legacy simulation results (as JSON string), empty once stored in results_blob
+    results_json: Mapped[str] = mapped_column(Text, nullable=False, default='')
+    # Simulation results (columnar binary format)
+    results_blob: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     # Timestamp for creation
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -0,0 +1,314 @@
+"""
+execution_plan.py
+-----------------
+Compiles an agent's state managers into a static ExecutionPlan.
+
+Compilation parses each state manager's consumed/produced queries once,
+orders the state managers so every current-step value is produced before it
+is consumed, and turns each query into an accessor closure. Running a plan is
+then a straight sequence of state-manager calls, with no query interpretation
+or dependency retries per step. Compiled plans are cached per agent
+configuration, so repeated runs reuse them.
+"""
+
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple, TypedDict
+from app.config.settings import Settings
+from app.processors.run_profile import RunProfile
+from app.utilities.queries.query_parser import parse_query
+
+# Accessor signatures: getter(universe, new_state) and putter(universe, new_state, value)
+Getter = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+Putter = Callable[[Dict[str, Any], Dict[str, Any], Any], None]
+# State manager function, called with the values of its consumed queries
+StateManager = Callable[..., Any]
+# Compiled step of a plan: (function, getters, putter)
+Step = Tuple[StateManager, Tuple[Getter, ...], Putter]
+
+
+class _Node(TypedDict):
+    """
+    A compiled state manager and its current-step dependencies, while ordering.
+    """
+
+    func: StateManager
+    getters: Tuple[Getter, ...]
+    putter: Putter
+    requires: Set[str]
+    provides: Set[str]
+
+
+class ExecutionPlan:
+    """
+    ExecutionPlan
+    -------------
+    A topologically ordered, precompiled list of state managers for one agent.
+
+    Attributes
+    ----------
+    agent_id : str
+        Identifier of the agent this plan steps.
+    steps : tuple
+        (function, getters, putter) triples in execution order.
+    """
+
+    __slots__ = ('agent_id', 'steps')
+
+    def __init__(self, agent_id: str, steps: Sequence[Step]) -> None:
+        """
+        Initialize the plan with its ordered, compiled steps.
+        """
+        self.agent_id: str = agent_id
+        self.steps: Tuple[Step, ...] = tuple(steps)
+
+    def run(self, universe: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run every state manager of the agent once.
+
+        Parameters
+        ----------
+        universe : dict
+            Universe state the agent reads previous values from.
+
+        Returns
+        -------
+        dict
+            New state produced by this step, keyed by agent identifier.
+        """
+        new_state: Dict[str, Any] = {}
+        for func, getters, putter in self.steps:
+            putter(universe, new_state, func(*[get(universe, new_state) for get in getters]))
+        return new_state
+
+    def run_profiled(self, universe: Dict[str, Any], profile: RunProfile) -> Dict[str, Any]:
+        """
+        Run every state manager of the agent once, recording timings.
+
+        Per state manager, the function call is recorded under
+        ('state_managers', agent, name) and the query resolution of its
+        consumed and produced values under ('query_resolution', agent, name).
+
+        Parameters
+        ----------
+        universe : dict
+            Universe state the agent reads previous values from.
+        profile : RunProfile
+            Profile the timings are added to.
+
+        Returns
+        -------
+        dict
+            New state produced by this step, keyed by agent identifier.
+        """
+        clock = time.perf_counter
+        new_state: Dict[str, Any] = {}
+        for func, getters, putter in self.steps:
+            start = clock()
+            args = [get(universe, new_state) for get in getters]
+            resolved = clock()
+            value = func(*args)
+            computed = clock()
+            putter(universe, new_state, value)
+            stored = clock()
+            profile.add(('state_managers', self.agent_id, func.__name__), computed - resolved)
+            profile.add(('query_resolution', self.agent_id, func.__name__), (resolved - start) + (stored - computed))
+        return new_state
+
+    @property
+    def order(self) -> List[str]:
+        """
+        Names of the state-manager functions in execution order.
+        """
+        return [func.__name__ for func, _, _ in self.steps]
+
+
+def compile_plan(agent_id: str, state_managers: Sequence[Mapping[str, Any]]) -> ExecutionPlan:
+    """
+    Compile an agent's state managers into an ExecutionPlan.
+
+    Plans are cached on the agent identifier and the (consumed, produced,
+    function) triples of its state managers.
+
+    Parameters
+    ----------
+    agent_id : str
+        Identifier of the agent.
+    state_managers : sequence of dict
+        Agent configuration entries with consumed, produced and function.
+
+    Returns
+    -------
+    ExecutionPlan
+        The compiled plan.
+
+    Raises
+    ------
+    RuntimeError
+        If the state managers' current-step dependencies form a cycle or
+        consume values that no state manager produces.
+    """
+    key = tuple((sm['consumed'], sm['produced'], sm['function']) for sm in state_managers)
+    return _compile_cached(agent_id, key)
+
+
+@lru_cache(maxsize=Settings.PLAN_CACHE_SIZE)
+def _compile_cached(agent_id: str, key: Tuple[Tuple[str, str, StateManager], ...]) -> ExecutionPlan:
+    """
+    Compile and memoize a plan for a hashable agent configuration.
+    """
+    nodes: List[_Node] = []
+    for consumed, produced, func in key:
+        consumed_ast = parse_query(consumed)['content']
+        produced_ast = parse_query(produced)
+        nodes.append({
+            'func': func,
+            'getters': tuple(_compile_getter(agent_id, q) for q in consumed_ast),
+            'putter': _compile_putter(agent_id, produced_ast),
+            'requires': set().union(*(_dependencies(q) for q in consumed_ast)),
+            'provides': _products(produced_ast),
+        })
+
+    # Order exactly as repeated in-order passes would: a state manager runs
+    # as soon as everything it reads from the current step has been produced
+    ordered: List[_Node] = []
+    produced_fields: Set[str] = set()
+    remaining = nodes
+    while remaining:
+        pending: List[_Node] = []
+        for node in remaining:
+            if node['requires'] <= produced_fields:
+                ordered.append(node)
+                produced_fields |= node['provides']
+            else:
+                pending.append(node)
+        if len(pending) == len(remaining):
+            raise RuntimeError(
+                f'Cyclic or unsatisfied dependencies between state managers for agent {agent_id}. '
+                f'Remaining: {[node["func"].__name__ for node in remaining]}'
+            )
+        remaining = pending
+
+    return ExecutionPlan(agent_id, [(node['func'], node['getters'], node['putter']) for node in ordered])
+
+
+def _dependencies(query: Dict[str, Any], prev: bool = False) -> Set[str]:
+    """
+    Collect the current-step fields a consumed query reads.
+    """
+    match query['kind']:
+        case 'Base':
+            return set() if prev else {query['content']}
+        case 'Prev':
+            return _dependencies(query['content'], prev=True)
+        case 'Access':
+            return _dependencies(query['content']['base'], prev)
+        case 'Tuple':
+            return set().union(*(_dependencies(q, prev) for q in query['content']))
+        case _:
+            return set()
+
+
+def _products(query: Dict[str, Any]) -> Set[str]:
+    """
+    Collect the fields a produced query writes.
+    """
+    match query['kind']:
+        case 'Base':
+            return {query['content']}
+        case 'Access':
+            return _products(query['content']['base'])
+        case 'Tuple':
+            return set().union(*(_products(q) for q in query['content']))
+        case _:
+            return set()
+
+
+def _compile_getter(agent_id: str, query: Dict[str, Any], prev: bool = False) -> Getter:
+    """
+    Compile a consumed query into an accessor closure.
+
+    Supports Base, Prev, Root, Agent, Access, Tuple.
+    """
+    match query['kind']:
+        case 'Base':
+            name = query['content']
+            if prev:
+                return lambda universe, new_state: universe[agent_id][name]
+            return lambda universe, new_state: new_state[agent_id][name]
+        case 'Prev':
+            return _compile_getter(agent_id, query['content'], prev=True)
+        case 'Root':
+            if prev:
+                return lambda universe, new_state: universe[agent_id]
+            return lambda universe, new_state: new_state
+        case 'Agent':
+            other = query['content']
+            return lambda universe, new_state: universe[other]
+        case 'Access':
+            base = _compile_getter(agent_id, query['content']['base'], prev)
+            field = query['content']['field']
+            return lambda universe, new_state: base(universe, new_state).get(field)
+        case 'Tuple':
+            items = tuple(_compile_getter(agent_id, q, prev) for q in query['content'])
+            return lambda universe, new_state: [get(universe, new_state) for get in items]
+        case _:
+            raise RuntimeError(f'Cannot consume query {query}')
+
+
+def _compile_putter(agent_id: str, query: Dict[str, Any]) -> Putter:
+    """
+    Compile a produced query into a closure that stores the produced value.
+
+    Supports Base, Access, Tuple; Root and Agent productions are no-ops.
+    A Tuple production stores each item of the produced sequence with the
+    putter of the corresponding query.
+    """
+    match query['kind']:
+        case 'Base':
+            name = query['content']
+
+            def put_base(universe: Dict[str, Any], new_state: Dict[str, Any], data: Any) -> None:
+                agent_state = new_state.get(agent_id)
+                if agent_state is None:
+                    agent_state = new_state[agent_id] = {}
+                agent_state[name] = data
+            return put_base
+        case 'Access':
+            base_query = query['content']['base']
+            get_base = _compile_getter(agent_id, base_query)
+            put_base_value = _compile_putter(agent_id, base_query)
+            field = query['content']['field']
+
+            def put_access(universe: Dict[str, Any], new_state: Dict[str, Any], data: Any) -> None:
+                base: Optional[Dict[str, Any]] = _get_or_none(get_base, universe, new_state)
+                if base is None:
+                    base = {}
+                    put_base_value(universe, new_state, base)
+                base[field] = data
+            return put_access
+        case 'Root' | 'Agent':
+            return lambda universe, new_state, data: None
+        case 'Tuple':
+            putters = tuple(_compile_putter(agent_id, q) for q in query['content'])
+
+            def put_tuple(universe: Dict[str, Any], new_state: Dict[str, Any], data: Any) -> None:
+                if len(data) != len(putters):
+                    raise RuntimeError(f'Expected {len(putters)} produced values for {agent_id}, got {len(data)}')
+                for put, value in zip(putters, data):
+                    put(universe, new_state, value)
+            return put_tuple
+        case 'Prev':
+            raise RuntimeError(f'Cannot produce prev query {query}')
+        case _:
+            raise RuntimeError(f'Cannot produce query {query}')
+
+
+def _get_or_none(get: Getter, universe: Dict[str, Any], new_state: Dict[str, Any]) -> Any:
+    """
+    Evaluate a getter, treating values that do not exist yet as None.
+    """
+    try:
+        return get(universe, new_state)
+    except (KeyError, AttributeError):
+        return None
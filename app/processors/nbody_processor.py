@@ -0,0 +1,509 @@
+"""
+nbody_processor.py
+------------------
+Defines the NBodyProcessor, a vectorized struct-of-arrays simulation backend.
+
+Instead of stepping each agent through its state managers, the processor
+holds positions, velocities and masses of all bodies as (N, 3) / (N,) arrays
+and advances every body at once. Gravity is computed either as an all-pairs
+direct sum in a single broadcast per step, or with a Barnes-Hut octree for
+large N. Results use the same (low, high, state) record format as the
+agent-based SimulationProcessor.
+"""
+
+import copy
+import itertools
+from array import array
+from time import perf_counter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from app.config.settings import Settings
+from app.config.simulation_config import default_data, merge_params
+from app.processors.recording import RecordingPolicy
+from app.processors.run_profile import RunProfile
+from app.utilities.messages.error_messages import ErrorMessages
+from app.utilities.physics.barnes_hut import accelerations_barnes_hut
+from app.utilities.physics.simulation_math import (
+    Acceleration,
+    accelerations_direct,
+    batch_adaptive_timestep_manager,
+    batch_timestep_manager,
+    integrate_euler,
+    integrate_rk4,
+    integrate_rk45,
+    integrate_verlet,
+    rk45_timestep,
+)
+from app.utilities.structures.compact_state import CompactState, state_layout
+
+# Leaf paths of a body state, in the order of the state dicts of the agent-based processor
+STATE_PATHS: Tuple[Tuple[str, ...], ...] = (
+    ('velocity', 'x'), ('velocity', 'y'), ('velocity', 'z'),
+    ('position', 'x'), ('position', 'y'), ('position', 'z'),
+    ('mass',), ('timeStep',), ('time',),
+)
+
+# Integrators of the vectorized engine, by name; 'rk45' drops the error estimate
+INTEGRATORS: Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray, Acceleration], Tuple[np.ndarray, ...]]] = {
+    'euler': integrate_euler,
+    'verlet': integrate_verlet,
+    'rk4': integrate_rk4,
+    'rk45': lambda *args: integrate_rk45(*args)[:2],
+}
+
+# Fields every body needs in the vectorized engine
+VECTOR_FIELDS: Tuple[str, ...] = ('position', 'velocity')
+SCALAR_FIELDS: Tuple[str, ...] = ('mass', 'time', 'timeStep')
+AXES: Tuple[str, ...] = ('x', 'y', 'z')
+
+
+class NBodyProcessor:
+    """
+    Vectorized N-body runtime.
+
+    Uses the same integrators and timestep management as the agent
+    configuration, but every body feels the gravity of every other body (the
+    agent configuration keeps Body1 on a fixed velocity). All bodies advance
+    one step per iteration; adaptive timesteps are shared by all bodies of a
+    member, so they stay on a common time grid. It offers the same `run`,
+    `stream` and `resume` methods as the SimulationProcessor, with the options
+    of the vectorized engine, but compiles no agent plans.
+
+    Attributes
+    ----------
+    default_data : mapping
+        Read-only default initial state for all bodies.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the processor with a private copy of the defaults.
+        """
+        self.default_data: Mapping[str, Any] = MappingProxyType(copy.deepcopy(default_data))
+
+    def run(
+        self,
+        params: Dict[str, Any],
+        iterations: int = 500,
+        solver: str = 'direct',
+        theta: float = 0.5,
+        profile: Optional[RunProfile] = None,
+        timestep: str = 'fixed',
+        integrator: str = 'euler',
+        recording: Optional[RecordingPolicy] = None,
+    ) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Run the simulation with given parameters.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for each body.
+        iterations : int, optional
+            Number of iterations to run the simulation (default = 500).
+        solver : str, optional
+            'direct' (default) or 'barnes_hut'. Barnes-Hut falls back to the
+            direct sum below `Settings.BARNES_HUT_MIN_BODIES` bodies.
+        theta : float, optional
+            Barnes-Hut opening angle (default = 0.5).
+        profile : RunProfile, optional
+            If given, timings of the run's phases are recorded into it.
+        timestep : str, optional
+            'fixed' (default) or 'adaptive' timestep control.
+        integrator : str, optional
+            'euler' (default), 'verlet', 'rk4' or 'rk45'.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
+
+        Returns
+        -------
+        list of tuple
+            Simulation history as (low, high, state) records.
+
+        Raises
+        ------
+        ValueError
+            If a body is missing any of the required state fields.
+        """
+        return self.run_ensemble([params], iterations, solver, theta, profile, timestep, integrator, recording)[0]
+
+    def stream(
+        self,
+        params: Dict[str, Any],
+        iterations: int = 500,
+        solver: str = 'direct',
+        theta: float = 0.5,
+        timestep: str = 'fixed',
+        integrator: str = 'euler',
+        recording: Optional[RecordingPolicy] = None,
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Run the simulation and yield its records while it is integrated.
+
+        Iterations are integrated in batches of
+        `Settings.STREAM_BATCH_ITERATIONS`, and the records of each batch are
+        yielded before the next batch is integrated.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for each body.
+        iterations : int, optional
+            Number of iterations to run the simulation (default = 500).
+        solver : str, optional
+            'direct' (default) or 'barnes_hut'.
+        theta : float, optional
+            Barnes-Hut opening angle (default = 0.5).
+        timestep : str, optional
+            'fixed' (default) or 'adaptive' timestep control.
+        integrator : str, optional
+            'euler' (default), 'verlet', 'rk4' or 'rk45'.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
+
+        Yields
+        ------
+        tuple
+            (low, high, state) records in the order of `run`.
+        """
+        init = self._merge_params(params)
+        batches = self._integrate(
+            [init], iterations, solver, theta, None, timestep, integrator, perf_counter(), Settings.STREAM_BATCH_ITERATIONS
+        )
+        yield from self._to_records(init, (batch[0] for batch in batches), recording)
+
+    def run_ensemble(
+        self,
+        params_list: List[Dict[str, Any]],
+        iterations: int = 500,
+        solver: str = 'direct',
+        theta: float = 0.5,
+        profile: Optional[RunProfile] = None,
+        timestep: str = 'fixed',
+        integrator: str = 'euler',
+        recording: Optional[RecordingPolicy] = None,
+    ) -> List[List[Tuple[float, float, Dict[str, Any]]]]:
+        """
+        Run several initial conditions of the same scenario at once.
+
+        All members are stacked along a leading ensemble axis, so positions
+        and velocities are (E, N, 3) arrays and each step advances every
+        member with the same array operations.
+
+        Parameters
+        ----------
+        params_list : list of dict
+            Initial conditions of each ensemble member.
+        iterations : int, optional
+            Number of iterations to run the simulation (default = 500).
+        solver : str, optional
+            'direct' (default) or 'barnes_hut'.
+        theta : float, optional
+            Barnes-Hut opening angle (default = 0.5).
+        profile : RunProfile, optional
+            If given, the setup, acceleration, timestep and record-building
+            phases are timed.
+        timestep : str, optional
+            'fixed' (default) or 'adaptive' timestep control.
+        integrator : str, optional
+            'euler' (default), 'verlet', 'rk4' or 'rk45'.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
+
+        Returns
+        -------
+        list of list of tuple
+            Simulation history of each member as (low, high, state) records.
+
+        Raises
+        ------
+        ValueError
+            If a body is missing any of the required state fields, or if the
+            members do not simulate the same bodies.
+        """
+        start = perf_counter()
+        if not params_list:
+            raise ValueError(ErrorMessages.INVALID_ENSEMBLE)
+        inits = [self._merge_params(params) for params in params_list]
+        bodies = list(inits[0])
+        if any(list(init) != bodies for init in inits):
+            raise ValueError(ErrorMessages.INVALID_ENSEMBLE)
+        return self._simulate(inits, iterations, solver, theta, profile, timestep, integrator, start, recording)
+
+    def resume(
+        self,
+        prefix: Sequence[Tuple[float, float, Dict[str, Any]]],
+        iterations: int = 500,
+        solver: str = 'direct',
+        theta: float = 0.5,
+        timestep: str = 'fixed',
+        integrator: str = 'euler',
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Continue a finished simulation, yielding only the new records.
+
+        The arrays are rebuilt from the latest state of every body in
+        `prefix`, the complete records of an earlier run with the same
+        options, so the new records are exactly those a single longer run
+        produces after the prefix.
+
+        Parameters
+        ----------
+        prefix : sequence of tuple
+            Records of the earlier run, starting with its initial state.
+        iterations : int, optional
+            Number of additional iterations (default = 500).
+        solver, theta, timestep, integrator
+            Options of the earlier run, as for `run`.
+
+        Yields
+        ------
+        tuple
+            (low, high, state) records following the prefix.
+        """
+        latest: Dict[str, Any] = {}
+        for _, _, state in prefix:
+            latest.update(state)
+        batches = self._integrate(
+            [latest], iterations, solver, theta, None, timestep, integrator, perf_counter(), Settings.STREAM_BATCH_ITERATIONS
+        )
+        yield from itertools.islice(self._to_records(latest, (batch[0] for batch in batches)), 1, None)
+
+    def _simulate(
+        self,
+        inits: List[Dict[str, Any]],
+        iterations: int,
+        solver: str,
+        theta: float,
+        profile: Optional[RunProfile],
+        timestep: str,
+        integrator: str,
+        start: float,
+        recording: Optional[RecordingPolicy] = None,
+    ) -> List[List[Tuple[float, float, Dict[str, Any]]]]:
+        """
+        Advance the stacked states of every member and build their records.
+
+        Each member's records start with its entry of `inits`; `start` is
+        when setup began, for the profile. Only the records selected by
+        `recording` are built.
+        """
+        batches = list(self._integrate(inits, iterations, solver, theta, profile, timestep, integrator, start))
+        start = perf_counter()
+        records = [
+            list(self._to_records(init, (batch[e] for batch in batches), recording))
+            for e, init in enumerate(inits)
+        ]
+        if profile is not None:
+            profile.add(('phases', 'records'), perf_counter() - start)
+        return records
+
+    def _integrate(
+        self,
+        inits: List[Dict[str, Any]],
+        iterations: int,
+        solver: str,
+        theta: float,
+        profile: Optional[RunProfile],
+        timestep: str,
+        integrator: str,
+        start: float,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[List[Tuple[np.ndarray, ...]]]:
+        """
+        Advance the stacked states of every member, in batches of iterations.
+
+        The initial states are validated before this method returns. Every
+        batch of at most `batch_size` iterations (all of them if omitted) is
+        yielded as the history buffers of each member: positions and
+        velocities (B, N, 3), masses (N,), times (B + 1, N) starting with
+        the times before the batch, and timesteps (B, N).
+        """
+        position, velocity, mass, time, time_step = (
+            np.stack(arrays) for arrays in zip(*(self._to_arrays(init) for init in inits))
+        )
+        accelerations = self._solver(solver, theta, len(inits[0]))
+        integrate = INTEGRATORS[integrator]
+        timestep_manager = self._timestep_manager(timestep)
+        # The embedded error estimate of RK45 replaces the orbital time scales
+        adaptive = timestep == 'adaptive'
+        controlled = integrator == 'rk45' and adaptive
+        error_control = self._error_control
+        if profile is not None:
+            profile.add(('phases', 'setup'), perf_counter() - start)
+            accelerations = profile.timed(('phases', 'accelerations'), accelerations)
+            timestep_manager = profile.timed(('phases', 'timestep'), timestep_manager)
+            error_control = profile.timed(('phases', 'timestep'), error_control)
+
+        def acceleration(position: np.ndarray, offset: Union[float, np.ndarray]) -> np.ndarray:
+            return accelerations(position, mass)
+
+        def batches() -> Iterator[List[Tuple[np.ndarray, ...]]]:
+            nonlocal position, velocity, time, time_step
+            done = 0
+            while done < iterations:
+                size = min(batch_size or iterations, iterations - done)
+                # History buffers, one row per iteration
+                positions = np.empty((size, *position.shape))
+                velocities = np.empty((size, *velocity.shape))
+                times = np.empty((size + 1, *time.shape))
+                time_steps = np.empty((size, *time_step.shape))
+                times[0] = time
+                for i in range(size):
+                    # Integrate with the previous step's timestep
+                    dt = time_step[..., np.newaxis]
+                    if controlled:
+                        position, velocity, taken, error = self._controlled_step(time_step, position, velocity, acceleration)
+                        dt = taken[..., np.newaxis]
+                        time_step = error_control(taken, error)
+                    else:
+                        position, velocity = integrate(dt, position, velocity, acceleration)
+                        time_step = timestep_manager(position, velocity, mass)
+                    # Adaptive steps vary, so time advances by the step that was integrated
+                    time = time + (dt[..., 0] if adaptive else time_step)
+                    positions[i], velocities[i], time_steps[i], times[i + 1] = position, velocity, time_step, time
+                done += size
+                yield [
+                    (positions[:, e], velocities[:, e], mass[e], times[:, e], time_steps[:, e])
+                    for e in range(len(inits))
+                ]
+
+        return batches()
+
+    def _merge_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge user-provided parameters with the default initial state.
+        """
+        return merge_params(params, self.default_data)
+
+    def _solver(self, solver: str, theta: float, count: int) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Select the acceleration function for this run.
+
+        Returns
+        -------
+        callable
+            Function mapping (E, N, 3) positions and (E, N) masses to accelerations.
+        """
+        if solver == 'barnes_hut' and count >= Settings.BARNES_HUT_MIN_BODIES:
+            # The octree is built per member, so ensembles are solved one by one
+            return lambda position, mass: np.stack([
+                accelerations_barnes_hut(p, m, theta) for p, m in zip(position, mass)
+            ])
+        return accelerations_direct
+
+    def _timestep_manager(self, timestep: str) -> Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Select the timestep function for this run.
+
+        Returns
+        -------
+        callable
+            Function mapping (E, N, 3) positions and velocities and (E, N)
+            masses to the next (E, N) timesteps.
+        """
+        if timestep == 'adaptive':
+            return batch_adaptive_timestep_manager
+        return lambda position, velocity, mass: batch_timestep_manager(velocity)
+
+    def _controlled_step(
+        self, time_step: np.ndarray, position: np.ndarray, velocity: np.ndarray, acceleration: Acceleration
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Take an RK45 step of every member, retrying rejected steps.
+
+        As in `rk45_controlled_step`, a member whose largest body error
+        exceeds the tolerance retries with the shorter step of
+        `rk45_timestep`. Returns the positions, velocities, the steps kept
+        (E, N) and the body errors of the kept steps (E, N).
+        """
+        new_position, new_velocity, error = integrate_rk45(time_step[..., np.newaxis], position, velocity, acceleration)
+        for _ in range(Settings.RK45_MAX_RETRIES):
+            shortest, largest = time_step.min(axis=-1), error.max(axis=-1)
+            rejected = (largest > 1) & (shortest > Settings.TIMESTEP_MIN)
+            if not rejected.any():
+                break
+            retry = rejected[..., np.newaxis]
+            time_step = np.where(retry, np.asarray(rk45_timestep(shortest, largest))[..., np.newaxis], time_step)
+            retry_position, retry_velocity, retry_error = integrate_rk45(
+                time_step[..., np.newaxis], position, velocity, acceleration
+            )
+            new_position = np.where(retry[..., np.newaxis], retry_position, new_position)
+            new_velocity = np.where(retry[..., np.newaxis], retry_velocity, new_velocity)
+            error = np.where(retry, retry_error, error)
+        return new_position, new_velocity, time_step, error
+
+    def _error_control(self, time_step: np.ndarray, error: np.ndarray) -> np.ndarray:
+        """
+        Choose the next (E, N) timesteps from the (E, N) relative errors of an
+        RK45 step; every member takes the step of its largest error.
+        """
+        next_step = np.asarray(rk45_timestep(time_step.min(axis=-1), error.max(axis=-1)))
+        return np.repeat(next_step[..., np.newaxis], time_step.shape[-1], axis=-1)
+
+    def _to_arrays(self, init: Dict[str, Any]) -> Tuple[np.ndarray, ...]:
+        """
+        Convert the merged initial state into struct-of-arrays form.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            Positions (N, 3), velocities (N, 3), masses, times and timesteps (N,).
+        """
+        try:
+            vectors = [
+                np.array([[float(state[field][axis]) for axis in AXES] for state in init.values()])
+                for field in VECTOR_FIELDS
+            ]
+            scalars = [
+                np.array([float(state[field]) for state in init.values()])
+                for field in SCALAR_FIELDS
+            ]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(ErrorMessages.INVALID_PARAMS)
+        return vectors[0], vectors[1], scalars[0], scalars[1], scalars[2]
+
+    def _to_records(
+        self,
+        init: Dict[str, Any],
+        batches: Iterable[Tuple[np.ndarray, ...]],
+        recording: Optional[RecordingPolicy] = None,
+    ) -> Iterator[Tuple[float, float, Any]]:
+        """
+        Build (low, high, state) records from the history buffers of a member.
+
+        Records are emitted per iteration and per body in the same order and
+        with the same state layout as the agent-based processor, as
+        CompactStates cut directly from one stacked buffer of leaf values per
+        batch. The recording policy selects steps before their states are
+        built, and the records of a batch are built as soon as it arrives.
+        """
+        yield (-1e9, 0, init)
+        bodies = list(init)
+        width = 8 * len(STATE_PATHS)
+        layouts = [state_layout(body, STATE_PATHS) for body in bodies]
+
+        def steps() -> Iterator[Tuple[float, float, Tuple[int, bytes, int]]]:
+            for positions, velocities, mass, times, time_steps in batches:
+                iterations, count = time_steps.shape
+                leaves = np.concatenate(
+                    (
+                        velocities,
+                        positions,
+                        np.broadcast_to(mass, (iterations, count))[..., None],
+                        time_steps[..., None],
+                        times[1:, :, None],
+                    ),
+                    axis=2,
+                )
+                data = np.ascontiguousarray(leaves, dtype=np.float64).tobytes()
+                times_list = times.tolist()
+                for i, j in itertools.product(range(iterations), range(count)):
+                    yield times_list[i][j], times_list[i + 1][j], (j, data, (i * count + j) * width)
+
+        selected: Iterable[Tuple[float, float, Tuple[int, bytes, int]]] = steps()
+        if recording is not None:
+            selected = recording.select(selected, agent=lambda step: bodies[step[0]])
+        for low, high, (j, data, offset) in selected:
+            yield low, high, CompactState(layouts[j], array('d', data[offset:offset + width]))
@@ -0,0 +1,123 @@
+"""
+recording.py
+------------
+Defines RecordingPolicy, which decides which steps of a run are recorded.
+
+Simulations always integrate at full resolution; the policy only thins out
+the (low, high, state) records that are stored, returned and persisted, so
+their size follows the required output resolution instead of the number of
+steps. Processors apply it to the records of their steps; the initial state
+record is always kept.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, TypeVar
+
+# Record payload: a state dict, or anything a state dict can be built from
+T = TypeVar('T')
+
+
+def _agent_of(state: Any) -> str:
+    """Agent of a single-agent state record, the payload of state dicts."""
+    return next(iter(state))
+
+
+class RecordingPolicy:
+    """
+    RecordingPolicy
+    ---------------
+    Selects the records of a run to keep.
+
+    Modes
+    -----
+    - 'all' : every step.
+    - 'stride' : every `every`-th step of each agent.
+    - 'cadence' : the first step of each agent that ends at or after each
+      multiple of `every` in simulated time.
+    - 'final' : only the last step of each agent.
+
+    Examples
+    --------
+    >>> records = [(t, t + 1, {'A': t + 1}) for t in range(6)]
+    >>> [high for _, high, _ in RecordingPolicy('stride', 2).select(records)]
+    [2, 4, 6]
+    >>> [high for _, high, _ in RecordingPolicy('cadence', 2.5).select(records)]
+    [3, 5]
+    >>> [high for _, high, _ in RecordingPolicy('final').select(records)]
+    [6]
+    """
+
+    def __init__(self, mode: str = 'all', every: float = 1.0) -> None:
+        """
+        Initialize the policy.
+
+        Parameters
+        ----------
+        mode : str, optional
+            'all' (default), 'stride', 'cadence' or 'final'.
+        every : float, optional
+            Stride in steps, or cadence in units of simulated time (default = 1).
+
+        Raises
+        ------
+        ValueError
+            If the mode is unknown, or `every` is not a positive step count
+            for 'stride' or not positive for 'cadence'.
+        """
+        if mode not in ('all', 'stride', 'cadence', 'final'):
+            raise ValueError(f'Unknown recording mode: {mode}')
+        if every <= 0 or (mode == 'stride' and not float(every).is_integer()):
+            raise ValueError(f'Invalid recording interval for {mode}: {every}')
+        self.mode: str = mode
+        self.every: float = every
+
+    def select(
+        self,
+        records: Iterable[Tuple[float, float, T]],
+        agent: Callable[[T], str] = _agent_of,
+    ) -> Iterator[Tuple[float, float, T]]:
+        """
+        Yield the step records to keep, in their original order.
+
+        With 'final', the kept records are yielded once `records` is exhausted.
+
+        Parameters
+        ----------
+        records : iterable of tuple
+            (low, high, payload) records of the steps of a run.
+        agent : callable, optional
+            Returns the agent a payload belongs to; by default the only key
+            of a single-agent state dict.
+
+        Yields
+        ------
+        tuple
+            The selected (low, high, payload) records.
+        """
+        if self.mode == 'all':
+            yield from records
+        elif self.mode == 'stride':
+            stride = int(self.every)
+            steps: Dict[str, int] = {}
+            for record in records:
+                agent_id = agent(record[2])
+                steps[agent_id] = count = steps.get(agent_id, 0) + 1
+                if count % stride == 0:
+                    yield record
+        elif self.mode == 'cadence':
+            marks: Dict[str, float] = {}
+            for record in records:
+                low, high, payload = record
+                agent_id = agent(payload)
+                mark = marks.get(agent_id)
+                if mark is None:
+                    mark = (math.floor(low / self.every) + 1) * self.every
+                if high >= mark:
+                    mark = (math.floor(high / self.every) + 1) * self.every
+                    yield record
+                marks[agent_id] = mark
+        else:
+            final: Dict[str, Tuple[float, float, T]] = {}
+            for record in records:
+                final[agent(record[2])] = record
+            yield from final.values()
@@ -0,0 +1,84 @@
+"""
+run_profile.py
+--------------
+Defines RunProfile, which collects call counts and cumulative wall times
+of a profiled simulation run.
+
+Timings are recorded under hierarchical paths such as
+('phases', 'read') or ('state_managers', 'Body2', 'propagate_velocity'),
+and reported as a nested dict with calls, total and mean seconds per path.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# Path of a timing entry, e.g. ('agents', 'Body1')
+ProfilePath = Tuple[str, ...]
+
+
+class RunProfile:
+    """
+    RunProfile
+    ----------
+    Accumulates timings of a simulation run.
+
+    Examples
+    --------
+    >>> profile = RunProfile()
+    >>> profile.add(('phases', 'read'), 0.5)
+    >>> profile.add(('phases', 'read'), 1.5)
+    >>> profile.as_dict()
+    {'phases': {'read': {'calls': 2, 'total_s': 2.0, 'mean_s': 1.0}}}
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty profile."""
+        self._stats: Dict[ProfilePath, List[float]] = {}
+
+    def add(self, path: ProfilePath, seconds: float) -> None:
+        """
+        Record one call that took `seconds` under `path`.
+        """
+        stats = self._stats.get(path)
+        if stats is None:
+            self._stats[path] = [1, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+
+    def timed(self, path: ProfilePath, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap `func` so that every call is recorded under `path`.
+        """
+        clock = time.perf_counter
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(path, clock() - start)
+        return wrapper
+
+    def totals(self) -> Dict[ProfilePath, Tuple[int, float]]:
+        """
+        Call count and cumulative seconds of every path.
+        """
+        return {path: (int(calls), total) for path, (calls, total) in self._stats.items()}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Report the profile as a JSON-serializable nested dict.
+
+        Returns
+        -------
+        dict
+            Nested by path, with `calls`, `total_s` and `mean_s` at each leaf.
+        """
+        report: Dict[str, Any] = {}
+        for path, (calls, total) in self.totals().items():
+            node = report
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = {'calls': calls, 'total_s': total, 'mean_s': total / calls}
+        return report
@@ -2,16 +2,27 @@
 simulation_processor.py
 -----------------------
 Defines the SimulationProcessor, which orchestrates simulation execution.
-Reintegrates Sedaro's Rust query parser and faithfully reproduces the
-original Simulator's semantics with a clean processor interface.
+Compiles each agent's state managers into a static execution plan and
+faithfully reproduces the original Simulator's semantics with a clean
+processor interface. Records can be consumed as a stream while the
+simulation runs, runs can optionally be profiled and thinned out by a
+recording policy, and a finished run can be resumed from its records to
+extend it.
+
+The processor holds only read-only configuration and compiled plans; each
+run keeps its state in its own SimulationRun, so one processor can serve
+concurrent runs.
 """
 
-from functools import reduce
-from operator import __or__
-from typing import Any, Dict, List, Mapping, Tuple
-from app.utilities.structures.qrange_store import QRangeStore
-from app.config.simulation_config import agents, default_data
-from app.utilities.queries.query_parser import parse_query
+import copy
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from app.config.simulation_config import agents, default_data, merge_params
+from app.processors.execution_plan import ExecutionPlan, compile_plan
+from app.processors.recording import RecordingPolicy
+from app.processors.run_profile import RunProfile
+from app.processors.simulation_run import SimulationRun
 
 
 class SimulationProcessor:
@@ -20,25 +31,44 @@ class SimulationProcessor:
 
     Attributes
     ----------
-    agents : dict
-        Agent configuration specifying consumed/produced variables and functions.
-    default_data : dict
-        Default initial state for all agents.
+    agents : mapping
+        Read-only agent configuration specifying consumed/produced variables
+        and functions.
+    default_data : mapping
+        Read-only default initial state for all agents.
+    sim_graph : mapping
+        Read-only compiled execution plan of every agent.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, agent_config: Optional[Mapping[str, Any]] = None) -> None:
         """
         Initialize the processor with agent configuration and defaults.
-        """
-        self.agents: Mapping[str, Any] = agents
-        self.default_data: Dict[str, Any] = default_data
-        self.store: QRangeStore[Dict[str, Any]]
-        self.init: Dict[str, Any]
-        self.times: Dict[str, float]
-        self.sim_graph: Dict[str, Any]
+
+        The configuration and defaults are copied, so later changes to the
+        given objects do not affect the processor, and the plans are compiled
+        once for all runs.
+
+        Parameters
+        ----------
+        agent_config : dict, optional
+            Agent configuration to simulate, e.g. from `build_agents`;
+            the default configuration if omitted.
+        """
+        config = agents if agent_config is None else agent_config
+        self.agents: Mapping[str, Tuple[Any, ...]] = MappingProxyType(
+            {agent_id: tuple(sms) for agent_id, sms in config.items()}
+        )
+        self.default_data: Mapping[str, Any] = MappingProxyType(copy.deepcopy(default_data))
+        self.sim_graph: Mapping[str, ExecutionPlan] = MappingProxyType(
+            {agent_id: compile_plan(agent_id, sms) for agent_id, sms in self.agents.items()}
+        )
 
     def run(
-        self, params: Dict[str, Any], iterations: int = 500
+        self,
+        params: Dict[str, Any],
+        iterations: int = 500,
+        profile: Optional[RunProfile] = None,
+        recording: Optional[RecordingPolicy] = None,
     ) -> List[Tuple[float, float, Dict[str, Any]]]:
         """
         Run the simulation with given parameters.
@@ -49,242 +79,93 @@ class SimulationProcessor:
             Dictionary containing initial conditions for each body.
         iterations : int, optional
             Number of iterations to run the simulation (default = 500).
+        profile : RunProfile, optional
+            If given, timings of phases, agents and state managers are
+            recorded into it.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
 
         Returns
         -------
         list of tuple
-            Simulation history as (low, high, state_dict) records.
+            Simulation history as (low, high, state) records.
         """
-        # Initialize store and state
-        self.store = QRangeStore()
-        self.init = self._merge_params(params)
-
-        # Save initial state
-        self.store[-1e9, 0] = self.init
+        return list(self.stream(params, iterations, profile, recording))
 
-        # Track time for each agent
-        self.times = {agent_id: state['time'] for agent_id, state in self.init.items()}
-
-        # Build simulation graph (parse queries with Rust)
-        self.sim_graph = {}
-        for agent_id, sms in self.agents.items():
-            agent = []
-            for sm in sms:
-                consumed = parse_query(sm['consumed'])['content']
-                produced = parse_query(sm['produced'])
-                func = sm['function']
-                agent.append({'func': func, 'consumed': consumed, 'produced': produced})
-            self.sim_graph[agent_id] = agent
-
-        # Run simulation
-        self.simulate(iterations=iterations)
-        return self.store.dump()
-
-    def read(self, t: float) -> Dict[str, Any]:
+    def stream(
+        self,
+        params: Dict[str, Any],
+        iterations: int = 500,
+        profile: Optional[RunProfile] = None,
+        recording: Optional[RecordingPolicy] = None,
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
         """
-        Read the universe state at time `t`.
+        Run the simulation, yielding each record as soon as it is computed.
 
         Parameters
         ----------
-        t : float
-            The time to read from the store.
-
-        Returns
-        -------
-        dict
-            Combined state of the universe at time `t`.
-        """
-        try:
-            data = self.store[t]
-        except IndexError:
-            data = []
-        return reduce(__or__, data, {})
-
-    def step(self, agent_id: str, universe: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Run one agent for a single step.
-
-        Parameters
-        ----------
-        agent_id : str
-            Identifier of the agent to step.
-        universe : dict
-            Current universe state.
-
-        Returns
-        -------
-        dict
-            New state for the agent after one step.
-        """
-        state: Dict[str, Any] = {}
-        sms = [(agent_id, sm) for sm in self.sim_graph[agent_id]]
-
-        while sms:
-            next_sms = []
-            for agent, sm in sms:
-                if self.run_sm(agent, sm, universe, state) is None:
-                    next_sms.append((agent, sm))
-            if len(sms) == len(next_sms):
-                raise Exception(
-                    f'No progress made while evaluating state managers for agent {agent_id}. '
-                    f'Remaining: {[sm["func"].__name__ for (_, sm) in sms]}'
-                )
-            sms = next_sms
-        return state
-
-    def run_sm(self, agent_id: str, sm: Dict[str, Any], universe: Dict[str, Any], new_state: Dict[str, Any]) -> Any:
-        """
-        Run a single state manager.
-
-        Parameters
-        ----------
-        agent_id : str
-            Agent identifier.
-        sm : dict
-            State manager with func, consumed, produced.
-        universe : dict
-            Current universe state.
-        new_state : dict
-            State being built for this step.
+        params : dict
+            Dictionary containing initial conditions for each body.
+        iterations : int, optional
+            Number of iterations to run the simulation (default = 500).
+        profile : RunProfile, optional
+            If given, timings are recorded into it.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
 
-        Returns
-        -------
-        Any
-            Result of the state manager, or None if dependencies unresolved.
+        Yields
+        ------
+        tuple
+            (low, high, state) records in the order of `run`, starting
+            with the initial state.
         """
-        inputs = []
-        for q in sm['consumed']:
-            found = self.find(agent_id, q, universe, new_state)
-            if found is None:
-                return None
-            inputs.append(found)
-        res = sm['func'](*inputs)
-        self.put(agent_id, sm['produced'], universe, new_state, res)
-        return res
+        start = time.perf_counter()
+        run = self.start(params)
+        if profile is not None:
+            profile.add(('phases', 'setup'), time.perf_counter() - start)
+        yield -1e9, 0, run.init
+        yield from run.simulate(iterations=iterations, profile=profile, recording=recording)
 
-    def find(
-        self, agent_id: str, query: Dict[str, Any], universe: Dict[str, Any], new_state: Dict[str, Any], prev: bool = False
-    ) -> Any:
+    def start(self, params: Dict[str, Any]) -> SimulationRun:
         """
-        Resolve a query to fetch consumed data.
-
-        Supports Base, Prev, Root, Agent, Access, Tuple.
+        Start a run at the initial state given by `params`.
 
         Parameters
         ----------
-        agent_id : str
-            Agent identifier.
-        query : dict
-            Parsed query AST.
-        universe : dict
-            Universe state.
-        new_state : dict
-            Current step's new state.
-        prev : bool
-            Whether to look at previous state.
+        params : dict
+            Dictionary containing initial conditions for each body.
 
         Returns
         -------
-        Any
-            The resolved data, or None if unavailable.
+        SimulationRun
+            The new run, whose `simulate` yields its step records.
         """
-        match query['kind']:
-            case 'Base':
-                if prev:
-                    return universe[agent_id][query['content']]
-                agent_state = new_state.get(agent_id)
-                if agent_state is None:
-                    return None
-                return agent_state.get(query['content'])
-            case 'Prev':
-                return self.find(agent_id, query['content'], universe, new_state, prev=True)
-            case 'Root':
-                if prev:
-                    return universe[agent_id]
-                return new_state
-            case 'Agent':
-                return universe[query['content']]
-            case 'Access':
-                base = self.find(agent_id, query['content']['base'], universe, new_state, prev)
-                if base is None:
-                    return None
-                return base.get(query['content']['field'])
-            case 'Tuple':
-                res = []
-                for q in query['content']:
-                    found = self.find(agent_id, q, universe, new_state, prev)
-                    if found is None:
-                        return None
-                    res.append(found)
-                return res
-            case _:
-                return None
+        return SimulationRun(self.sim_graph, self._merge_params(params))
 
-    def put(
-        self, agent_id: str, query: Dict[str, Any], universe: Dict[str, Any], new_state: Dict[str, Any], data: Any
-    ) -> None:
+    def resume(
+        self, prefix: Sequence[Tuple[float, float, Dict[str, Any]]], iterations: int = 500
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
         """
-        Insert produced data into the new state.
+        Continue a finished simulation, yielding only the new records.
 
-        Supports Base, Access, Agent.
+        The run is rebuilt from `prefix`, the complete records of an earlier
+        run with the same agent configuration. A run of k iterations resumed
+        for `iterations` more yields exactly the records that a single run of
+        k + `iterations` iterations yields after the first k.
 
         Parameters
         ----------
-        agent_id : str
-            Agent identifier.
-        query : dict
-            Parsed query AST for the produced variable.
-        universe : dict
-            Current universe state.
-        new_state : dict
-            Current step's new state.
-        data : Any
-            Value to insert.
-        """
-        match query['kind']:
-            case 'Base':
-                agent_state = new_state.get(agent_id)
-                if agent_state is None:
-                    agent_state = {}
-                    new_state[agent_id] = agent_state
-                agent_state[query['content']] = data
-            case 'Prev':
-                raise Exception(f'Cannot produce prev query {query}')
-            case 'Root':
-                pass
-            case 'Agent':
-                res = universe[query['content']]
-                if res is None:
-                    res = {}
-                    universe[query['content']] = res
-                return res
-            case 'Access':
-                base_query = query['content']['base']
-                base = self.find(agent_id, base_query, universe, new_state)
-                if base is None:
-                    base = {}
-                    self.put(agent_id, base_query, universe, new_state, base)
-                base[query['content']['field']] = data
-            case 'Tuple':
-                raise Exception(f'Tuple production not implemented')
-
-    def simulate(self, iterations: int = 500) -> None:
-        """
-        Run the full simulation for the given number of iterations.
+        prefix : sequence of tuple
+            Records of the earlier run, starting with its initial state.
+        iterations : int, optional
+            Number of additional iterations (default = 500).
 
-        Parameters
-        ----------
-        iterations : int
-            Number of iterations.
+        Yields
+        ------
+        tuple
+            (low, high, state) records following the prefix.
         """
-        for _ in range(iterations):
-            for agent_id in self.init:
-                t = self.times[agent_id]
-                universe = self.read(t - 0.001)
-                if set(universe) == set(self.init):
-                    new_state = self.step(agent_id, universe)
-                    self.store[t, new_state[agent_id]['time']] = new_state
-                    self.times[agent_id] = new_state[agent_id]['time']
+        yield from SimulationRun.from_records(self.sim_graph, prefix).simulate(iterations=iterations)
 
     def _merge_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -298,12 +179,7 @@ class SimulationProcessor:
         Returns
         -------
         dict
-            Full simulation state combining defaults and overrides.
+            Full simulation state combining defaults and overrides, sharing
+            no objects with the defaults or `params`.
         """
-        merged: Dict[str, Any] = {**self.default_data}
-        for body, overrides in params.items():
-            if body in merged:
-                merged[body].update(overrides)
-            else:
-                merged[body] = overrides
-        return merged
+        return merge_params(params, self.default_data)
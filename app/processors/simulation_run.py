@@ -0,0 +1,229 @@
+"""
+simulation_run.py
+-----------------
+Defines SimulationRun, the state of one run of the agent-based processor.
+
+A run owns everything that changes while it steps: the history store, the
+snapshot of latest states, the time of every agent and the initial state.
+The processor only holds read-only configuration and compiled plans, so one
+processor can serve concurrent runs, and a run's memory is released as soon
+as the run is dropped.
+
+State managers step on state dicts, but only the latest states are kept as
+dicts; every recorded state is packed into a CompactState for the history
+store and the yielded records.
+"""
+
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Tuple
+from app.processors.execution_plan import ExecutionPlan
+from app.processors.recording import RecordingPolicy
+from app.processors.run_profile import RunProfile
+from app.utilities.structures.compact_state import pack_state
+from app.utilities.structures.qrange_store import QRangeStore
+from app.utilities.structures.universe_snapshot import UniverseSnapshot
+
+
+class SimulationRun:
+    """
+    SimulationRun
+    -------------
+    Per-run context of a SimulationProcessor.
+
+    Attributes
+    ----------
+    sim_graph : mapping
+        Compiled execution plan of every agent, shared with the processor.
+    init : dict
+        Initial state of all agents.
+    store : QRangeStore
+        History of the run's recorded states.
+    snapshot : UniverseSnapshot
+        Latest states of every agent, read by the next steps.
+    times : dict
+        Current time of every agent.
+    """
+
+    def __init__(self, sim_graph: Mapping[str, ExecutionPlan], init: Dict[str, Any]) -> None:
+        """
+        Initialize a run at its initial state.
+
+        Parameters
+        ----------
+        sim_graph : mapping
+            Compiled execution plan of every agent.
+        init : dict
+            Initial state of all agents; it is stored and read, never modified.
+        """
+        self.sim_graph: Mapping[str, ExecutionPlan] = sim_graph
+        self.init: Dict[str, Any] = init
+        self.store: QRangeStore[Any] = QRangeStore()
+        self.snapshot: UniverseSnapshot[Dict[str, Any]] = UniverseSnapshot()
+        self.store[-1e9, 0] = init
+        self.snapshot.commit(-1e9, 0, init)
+        self.times: Dict[str, float] = {agent_id: state['time'] for agent_id, state in init.items()}
+
+    @classmethod
+    def from_records(
+        cls, sim_graph: Mapping[str, ExecutionPlan], prefix: Sequence[Tuple[float, float, Any]]
+    ) -> 'SimulationRun':
+        """
+        Rebuild a finished run from its records, to continue it.
+
+        The history store, the snapshot of latest states and the time of
+        every agent are rebuilt from `prefix`, the complete records of an
+        earlier run with the same agent configuration.
+
+        Parameters
+        ----------
+        sim_graph : mapping
+            Compiled execution plan of every agent.
+        prefix : sequence of tuple
+            Records of the earlier run, starting with its initial state.
+
+        Returns
+        -------
+        SimulationRun
+            A run positioned after the last record of `prefix`.
+        """
+        run = cls(sim_graph, prefix[0][2])
+        run.store.extend(prefix[1:])
+        for low, high, state in prefix[1:]:
+            run.snapshot.commit(low, high, state)
+            run.times.update(dict.fromkeys(state, high))
+        run.snapshot.prune(min(run.times.values()) - 0.001)
+        return run
+
+    def read(self, t: float) -> Dict[str, Any]:
+        """
+        Read the universe state at time `t` from the full history.
+
+        Used for arbitrary-time reads; stepping reads the current universe
+        from `self.snapshot` instead.
+
+        Parameters
+        ----------
+        t : float
+            The time to read from the store.
+
+        Returns
+        -------
+        dict
+            Combined state of the universe at time `t`.
+        """
+        try:
+            data = self.store[t]
+        except IndexError:
+            data = []
+        universe: Dict[str, Any] = {}
+        for state in data:
+            universe.update(state)
+        return universe
+
+    def step(self, agent_id: str, universe: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one agent for a single step.
+
+        Parameters
+        ----------
+        agent_id : str
+            Identifier of the agent to step.
+        universe : dict
+            Current universe state.
+
+        Returns
+        -------
+        dict
+            New state for the agent after one step.
+        """
+        return self.sim_graph[agent_id].run(universe)
+
+    def simulate(
+        self,
+        iterations: int = 500,
+        profile: Optional[RunProfile] = None,
+        recording: Optional[RecordingPolicy] = None,
+    ) -> Iterator[Tuple[float, float, Any]]:
+        """
+        Advance the run for the given number of iterations.
+
+        Each agent reads its universe from the incrementally updated snapshot
+        of latest states; every new state is written to the snapshot, and
+        every recorded state is packed, written to the history store and
+        yielded.
+
+        Parameters
+        ----------
+        iterations : int
+            Number of iterations.
+        profile : RunProfile, optional
+            If given, the run is timed per phase, agent and state manager.
+        recording : RecordingPolicy, optional
+            Steps to record; every step if omitted.
+
+        Yields
+        ------
+        tuple
+            (low, high, state) record of every recorded agent step, with
+            states of float fields as CompactStates.
+        """
+        steps = self._steps(iterations) if profile is None else self._steps_profiled(iterations, profile)
+        if recording is not None:
+            steps = recording.select(steps)
+        for t, t_next, new_state in steps:
+            state = pack_state(new_state)
+            self.store[t, t_next] = state
+            yield t, t_next, state
+
+    def _steps(self, iterations: int) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Step the agents, yielding the record of every step.
+        """
+        agent_count = len(self.init)
+        for _ in range(iterations):
+            for agent_id in self.init:
+                t = self.times[agent_id]
+                universe = self.snapshot.at(t - 0.001)
+                if len(universe) == agent_count:
+                    new_state = self.step(agent_id, universe)
+                    t_next = new_state[agent_id]['time']
+                    self.snapshot.commit(t, t_next, new_state)
+                    self.times[agent_id] = t_next
+                    yield t, t_next, new_state
+            # States ending before the earliest pending read are never needed again
+            self.snapshot.prune(min(self.times.values()) - 0.001)
+
+    def _steps_profiled(
+        self, iterations: int, profile: RunProfile
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        `_steps` with timings of the read, step, write and prune phases,
+        of every agent step, and of every state manager.
+
+        Kept apart from `_steps` so unprofiled runs pay no timing overhead.
+        The write phase covers the snapshot; history store writes of
+        recorded steps happen in `simulate`.
+        Time spent by the consumer of the yielded records is not counted.
+        """
+        clock = time.perf_counter
+        agent_count = len(self.init)
+        for _ in range(iterations):
+            for agent_id in self.init:
+                t = self.times[agent_id]
+                start = clock()
+                universe = self.snapshot.at(t - 0.001)
+                read = clock()
+                profile.add(('phases', 'read'), read - start)
+                if len(universe) == agent_count:
+                    new_state = self.sim_graph[agent_id].run_profiled(universe, profile)
+                    stepped = clock()
+                    t_next = new_state[agent_id]['time']
+                    self.snapshot.commit(t, t_next, new_state)
+                    self.times[agent_id] = t_next
+                    profile.add(('phases', 'step'), stepped - read)
+                    profile.add(('agents', agent_id), stepped - read)
+                    profile.add(('phases', 'write'), clock() - stepped)
+                    yield t, t_next, new_state
+            start = clock()
+            self.snapshot.prune(min(self.times.values()) - 0.001)
+            profile.add(('phases', 'prune'), clock() - start)
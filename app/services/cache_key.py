@@ -0,0 +1,140 @@
+"""
+cache_key.py
+------------
+Canonical cache keys of simulation runs.
+
+A key identifies what a run computes rather than how it was requested: the
+complete initial state after merging the request into the defaults, with
+every number as a float, the complete run options, and a fingerprint of the
+configuration that produces the results. Requests that spell out default
+values, write `1` for `1.0` or omit unchanged bodies share a key, while a
+change to the agent configuration, a physics setting or `RESULTS_VERSION`
+changes the keys of the runs it affects.
+
+Components
+----------
+- RESULTS_VERSION : Version of the numerics, bumped when results change.
+- canonical_state : Complete, normalized initial state of a request.
+- config_fingerprint : Hash of the results version, the agent configuration
+  and the settings of an engine.
+- cache_key : Parameters hash of a run.
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, List
+from app.config.settings import Settings
+from app.config.simulation_config import RunOptions, build_agents, merge_params
+
+# Version of the simulation numerics; bump it whenever a change to a state
+# manager, integrator or solver changes the results of existing runs
+RESULTS_VERSION: int = 3
+
+# Settings that change simulation results
+RESULT_SETTINGS: List[str] = [
+    'BARNES_HUT_MIN_BODIES',
+    'TIMESTEP_TOLERANCE',
+    'TIMESTEP_MIN',
+    'TIMESTEP_MAX',
+    'RK45_TOLERANCE',
+    'RK45_MAX_RETRIES',
+]
+
+
+def canonical_state(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the complete initial state of a request in canonical form.
+
+    Parameters
+    ----------
+    params : dict
+        User-specified initial conditions.
+
+    Returns
+    -------
+    dict
+        The request merged into the default initial state, with every
+        number as a float.
+
+    Examples
+    --------
+    >>> canonical_state({'Body1': {'mass': 1}}) == canonical_state({})
+    True
+    """
+    return _normalize(merge_params(params))
+
+
+@lru_cache(maxsize=None)
+def config_fingerprint(engine: str, integrator: str, timestep: str) -> str:
+    """
+    Hash the configuration and settings that produce a run's results.
+
+    These are `RESULTS_VERSION`, the engine and the settings in
+    `RESULT_SETTINGS`, and for the agent-based engine the state managers of
+    every agent. Changes to the code that leave these alone keep the keys
+    of stored runs; changes to the numerics must bump `RESULTS_VERSION`.
+
+    Parameters
+    ----------
+    engine : str
+    integrator : str
+    timestep : str
+
+    Returns
+    -------
+    str
+        SHA256 hash of the configuration.
+    """
+    described: Dict[str, Any] = {}
+    if engine != 'vectorized':
+        for agent_id, configs in build_agents(integrator, timestep).items():
+            described[agent_id] = [
+                [config['consumed'], config['produced'], f"{config['function'].__module__}.{config['function'].__qualname__}"]
+                for config in configs
+            ]
+    fingerprint = {
+        'version': RESULTS_VERSION,
+        'engine': engine,
+        'agents': described,
+        'settings': {name: getattr(Settings, name) for name in RESULT_SETTINGS},
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cache_key(params: Dict[str, Any], options: RunOptions) -> str:
+    """
+    Compute the parameters hash of a run.
+
+    Parameters
+    ----------
+    params : dict
+        User-specified initial conditions.
+    options : dict
+        Complete run options.
+
+    Returns
+    -------
+    str
+        SHA256 hash of the canonical initial state, the options and the
+        configuration fingerprint.
+    """
+    keyed = {
+        'state': canonical_state(params),
+        'options': _normalize(options),
+        'fingerprint': config_fingerprint(options['engine'], options['integrator'], options['timestep']),
+    }
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Convert every number of a JSON-like value to a float.
+    """
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
@@ -0,0 +1,281 @@
+"""
+job_service.py
+--------------
+Runs simulations as asynchronous jobs on a pool of worker processes.
+
+Components
+----------
+- SimulationJob : Tracks the status and outcome of one submitted simulation.
+- JobService : Submits cache misses to a ProcessPoolExecutor, persists
+  finished results, and exposes job status for polling. Identical
+  submissions share the job that is in flight.
+"""
+
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app.config.settings import Settings
+from app.config.simulation_config import RunOptions
+from app.services.simulation_service import (
+    SimulationService,
+    execute_simulation,
+    simulation_coalesced_requests_total,
+    simulation_compute_seconds,
+    simulation_prefix_reuse_total,
+    simulations_in_flight,
+    simulations_total,
+)
+
+# Worker pool and queue metrics
+simulation_workers = Gauge(
+    'simulation_workers',
+    'Number of simulation worker processes'
+)
+simulation_job_queue_depth = Gauge(
+    'simulation_job_queue_depth',
+    'Number of simulation jobs queued or running'
+)
+simulation_jobs_total = Counter(
+    'simulation_jobs_total',
+    'Total number of finished simulation jobs by status',
+    ['status']
+)
+
+
+class JobQueueFullError(RuntimeError):
+    """
+    Raised when a job is submitted while the queue is at capacity.
+    """
+
+
+class SimulationJob:
+    """
+    SimulationJob
+    -------------
+    One simulation submitted for asynchronous execution.
+
+    Attributes
+    ----------
+    id : str
+        Unique job identifier.
+    params_hash : str
+        Cache key of the simulation.
+    created_at : datetime
+        Submission time.
+    finished_at : datetime or None
+        Completion time, once the job is done.
+    error : str or None
+        Error description, if the job failed.
+    """
+
+    def __init__(self, params_hash: str, future: Future) -> None:
+        """
+        Initialize the job for a submitted future.
+        """
+        self.id: str = uuid.uuid4().hex
+        self.params_hash: str = params_hash
+        self.future: Future = future
+        self.created_at: datetime = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        """
+        Current job status: 'queued', 'running', 'succeeded' or 'failed'.
+        """
+        if self.finished_at is not None:
+            return 'failed' if self.error is not None else 'succeeded'
+        return 'running' if self.future.running() else 'queued'
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Return a JSON-serializable summary of the job.
+        """
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'params_hash': self.params_hash,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+        }
+
+
+class JobService:
+    """
+    Service responsible for asynchronous simulation jobs.
+
+    Cache hits are answered synchronously; cache misses are executed in a
+    ProcessPoolExecutor so CPU-bound simulations never block the event loop.
+    A cache miss whose parameters hash already has a job in flight gets
+    that job instead of a new one. Finished results are persisted by the
+    parent process.
+
+    Attributes
+    ----------
+    simulation_service : SimulationService
+        Service used for validation, caching and persistence.
+    max_workers : int
+        Number of worker processes.
+    max_queue : int
+        Maximum number of queued or running jobs.
+    """
+
+    def __init__(
+        self,
+        simulation_service: SimulationService,
+        max_workers: int = Settings.SIMULATION_WORKERS,
+        max_queue: int = Settings.JOB_QUEUE_MAX,
+    ) -> None:
+        """
+        Initialize the job service; worker processes start on first submit.
+        """
+        self.simulation_service: SimulationService = simulation_service
+        self.max_workers: int = max_workers
+        self.max_queue: int = max_queue
+        self.jobs: Dict[str, SimulationJob] = {}
+        self._in_flight: Dict[str, SimulationJob] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(
+        self, params: Dict[str, Any], options: Optional[RunOptions] = None
+    ) -> Tuple[List[Tuple[float, float, Dict[str, Any]]], Optional[SimulationJob]]:
+        """
+        Submit a simulation, answering cache hits directly.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict, optional
+            Run options; missing options use the defaults.
+
+        Returns
+        -------
+        tuple
+            Cached results and None on a cache hit, or an empty list and the
+            job computing the results on a cache miss; that job may have been
+            submitted by an earlier identical request.
+
+        Raises
+        ------
+        ValueError
+            If the parameters or options are invalid.
+        JobQueueFullError
+            If the number of queued or running jobs is at `max_queue`.
+        """
+        simulations_total.inc()
+        params_hash, run_options, results = self.simulation_service.lookup(params, options)
+        if results:
+            return results, None
+
+        prefix = self.simulation_service.find_prefix(params, run_options)
+        if prefix is not None and self.simulation_service.writer.get(prefix[0]) is not None:
+            # Workers read the prefix from the database, so it must be written first
+            self.simulation_service.writer.flush()
+        with self._lock:
+            job = self._in_flight.get(params_hash)
+            if job is not None:
+                simulation_coalesced_requests_total.inc()
+                return [], job
+            if self._pending() >= self.max_queue:
+                raise JobQueueFullError(f'Simulation queue is full ({self.max_queue} jobs)')
+            future = self._pool().submit(execute_simulation, params, run_options, prefix)
+            job = SimulationJob(params_hash, future)
+            self.jobs[job.id] = job
+            self._in_flight[params_hash] = job
+            self._prune()
+            simulation_job_queue_depth.set(self._pending())
+            simulations_in_flight.inc()
+        future.add_done_callback(lambda done: self._complete(job, params, run_options, prefix, done))
+        return [], job
+
+    def get(self, job_id: str) -> Optional[SimulationJob]:
+        """
+        Look up a job by its identifier.
+
+        Parameters
+        ----------
+        job_id : str
+
+        Returns
+        -------
+        SimulationJob or None
+            The job, or None if it is unknown or was pruned.
+        """
+        return self.jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes, cancelling jobs that have not started.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                simulation_workers.set(0)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """
+        Return the worker pool, starting it if needed.
+        """
+        if self._executor is None:
+            # Spawned workers start clean instead of inheriting server threads and connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            simulation_workers.set(self.max_workers)
+        return self._executor
+
+    def _complete(
+        self,
+        job: SimulationJob,
+        params: Dict[str, Any],
+        options: RunOptions,
+        prefix: Optional[Tuple[str, int]],
+        future: Future,
+    ) -> None:
+        """
+        Record a finished job and persist its results.
+
+        Metrics of worker processes are not exported, so a job resumed from
+        `prefix`, which was written to the database before it was
+        submitted, is counted here.
+        """
+        simulations_in_flight.dec()
+        try:
+            results, compute_seconds = future.result()
+            simulation_compute_seconds.labels(engine=options['engine']).observe(compute_seconds)
+            if prefix is not None:
+                simulation_prefix_reuse_total.inc()
+            # Results are served from the cache and the database, not kept with the job
+            self.simulation_service.save(params, job.params_hash, results, options)
+        except BaseException as e:
+            job.error = str(e) or type(e).__name__
+        job.finished_at = datetime.now(timezone.utc)
+        simulation_jobs_total.labels(status=job.status).inc()
+        with self._lock:
+            # Later submissions are answered from the cache, or retried after a failure
+            if self._in_flight.get(job.params_hash) is job:
+                del self._in_flight[job.params_hash]
+            simulation_job_queue_depth.set(self._pending())
+
+    def _pending(self) -> int:
+        """
+        Count jobs that are queued or running.
+        """
+        return sum(1 for job in self.jobs.values() if job.finished_at is None)
+
+    def _prune(self) -> None:
+        """
+        Forget the oldest finished jobs beyond `Settings.JOB_RETENTION`.
+        """
+        finished = [job for job in self.jobs.values() if job.finished_at is not None]
+        for job in finished[:max(len(finished) - Settings.JOB_RETENTION, 0)]:
+            del self.jobs[job.id]
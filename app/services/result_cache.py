@@ -0,0 +1,194 @@
+"""
+result_cache.py
+---------------
+Process-local LRU cache of decoded simulation results.
+
+Components
+----------
+- ResultCache : Maps parameters hashes to simulation histories, bounded by
+  an entry count and an estimated memory size, evicting the least recently
+  used entries first.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app.config.settings import Settings
+from app.utilities.structures.compact_state import CompactState
+
+# Result cache metrics
+result_cache_hits_total = Counter(
+    'simulation_result_cache_hits_total',
+    'Total number of result cache hits'
+)
+result_cache_misses_total = Counter(
+    'simulation_result_cache_misses_total',
+    'Total number of result cache misses'
+)
+result_cache_evictions_total = Counter(
+    'simulation_result_cache_evictions_total',
+    'Total number of results evicted from the result cache'
+)
+result_cache_bytes = Gauge(
+    'simulation_result_cache_bytes',
+    'Estimated memory held by cached results in bytes'
+)
+result_cache_entries = Gauge(
+    'simulation_result_cache_entries',
+    'Number of cached results'
+)
+
+# Number of records measured to estimate the size of a result
+SIZE_SAMPLE: int = 16
+
+Results = List[Tuple[float, float, Dict[str, Any]]]
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of simulation results keyed by parameters hash.
+
+    Cached histories are shared between callers and must not be modified.
+
+    Attributes
+    ----------
+    max_bytes : int
+        Upper bound of the estimated memory of all cached results.
+    max_entries : int
+        Maximum number of cached results.
+    """
+
+    def __init__(
+        self, max_bytes: int = Settings.RESULT_CACHE_MAX_BYTES, max_entries: int = Settings.RESULT_CACHE_MAX_ENTRIES
+    ) -> None:
+        """
+        Initialize an empty cache.
+        """
+        self.max_bytes: int = max_bytes
+        self.max_entries: int = max_entries
+        self._entries: OrderedDict[str, Tuple[Results, int]] = OrderedDict()
+        self._bytes: int = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """
+        Estimated memory of all cached results in bytes.
+        """
+        return self._bytes
+
+    def get(self, params_hash: str) -> Optional[Results]:
+        """
+        Look up cached results and mark them as most recently used.
+
+        Parameters
+        ----------
+        params_hash : str
+
+        Returns
+        -------
+        list of tuple or None
+            The cached simulation history, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(params_hash)
+            if entry is None:
+                result_cache_misses_total.inc()
+                return None
+            self._entries.move_to_end(params_hash)
+            result_cache_hits_total.inc()
+            return entry[0]
+
+    def put(self, params_hash: str, results: Results) -> None:
+        """
+        Cache results, replacing any previous entry for the same hash.
+
+        Results larger than `max_bytes` on their own are not cached.
+
+        Parameters
+        ----------
+        params_hash : str
+        results : list of tuple
+            Simulation history as (low, high, state_dict) records.
+        """
+        size = estimate_size(results)
+        with self._lock:
+            self._remove(params_hash)
+            if size > self.max_bytes or self.max_entries < 1:
+                return
+            self._entries[params_hash] = (results, size)
+            self._bytes += size
+            result_cache_bytes.inc(size)
+            result_cache_entries.inc()
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                result_cache_evictions_total.inc()
+
+    def invalidate(self, params_hash: str) -> None:
+        """
+        Drop the cached results of a hash, e.g. when they are rewritten.
+        """
+        with self._lock:
+            self._remove(params_hash)
+
+    def clear(self) -> None:
+        """
+        Drop all cached results.
+        """
+        with self._lock:
+            for params_hash in list(self._entries):
+                self._remove(params_hash)
+
+    def _remove(self, params_hash: str) -> None:
+        """
+        Remove an entry if present; the caller holds the lock.
+        """
+        entry = self._entries.pop(params_hash, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+            result_cache_bytes.dec(entry[1])
+            result_cache_entries.dec()
+
+
+def estimate_size(results: Results) -> int:
+    """
+    Estimate the memory held by a simulation history.
+
+    Records of a history share their layout, so the deep size of a few evenly
+    spaced records is extrapolated to the whole list.
+
+    Parameters
+    ----------
+    results : list of tuple
+
+    Returns
+    -------
+    int
+        Estimated size in bytes.
+    """
+    size = sys.getsizeof(results)
+    if not results:
+        return size
+    sample = results[::max(len(results) // SIZE_SAMPLE, 1)][:SIZE_SAMPLE]
+    return size + len(results) * sum(_deep_size(record) for record in sample) // len(sample)
+
+
+def _deep_size(value: Any) -> int:
+    """
+    Size of a value including nested containers; strings such as field names
+    are shared between records and not counted.
+    """
+    if isinstance(value, CompactState):
+        return sys.getsizeof(value) + sys.getsizeof(value.buffer)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_deep_size(item) for item in value)
+    if isinstance(value, str):
+        return 0
+    return sys.getsizeof(value)
@@ -7,16 +7,33 @@ Components
 ----------
 - SimulationProcessor : Runs the core simulation logic.
 - Simulation (DB model) : Persists parameters, results, and hashes.
+- ColumnarResults : Decodes results stored in the columnar binary format.
+- ResultCache : Keeps recently used results in memory in front of the database.
+- SingleFlight : Lets concurrent identical runs share one computation.
+- cache_key : Computes the canonical parameters hash of a run.
 """
 
 import json
-import hashlib
-from typing import List, Tuple, Dict, Any, Optional
-from prometheus_client import Counter
+import time
+from itertools import chain
+from typing import List, Tuple, Dict, Any, Iterator, Optional, Sequence
+from prometheus_client import Counter, Gauge, Histogram, Summary
+from app.config.settings import Settings
 from app.utilities.messages.error_messages import ErrorMessages
 from app.processors.simulation_processor import SimulationProcessor
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.recording import RecordingPolicy
+from app.processors.run_profile import RunProfile
+from app.config.simulation_config import (
+    ENGINES, INTEGRATORS, RECORDINGS, SOLVERS, TIMESTEPS, RunOptions, build_agents, default_options
+)
 from app.models.simulation_model import Simulation
+from app.utilities.structures.columnar_results import ColumnarResults, encode_results
 from app.clients.database import SessionLocal
+from app.clients.write_behind import WriteBehindQueue, write_behind
+from app.services.cache_key import cache_key
+from app.services.result_cache import ResultCache
+from app.services.single_flight import SingleFlight
 
 # Define a counter for total simulations run
 simulations_total = Counter(
@@ -24,6 +41,72 @@ simulations_total = Counter(
     'Total number of simulations executed'
 )
 
+# Cache efficiency, latency and result size metrics
+simulation_cache_hits_total = Counter(
+    'simulation_cache_hits_total',
+    'Total number of simulation requests answered from cached results'
+)
+simulation_cache_misses_total = Counter(
+    'simulation_cache_misses_total',
+    'Total number of simulation requests that had to be computed'
+)
+simulation_prefix_reuse_total = Counter(
+    'simulation_prefix_reuse_total',
+    'Total number of simulations resumed from the cached results of a shorter run'
+)
+simulation_coalesced_requests_total = Counter(
+    'simulation_coalesced_requests_total',
+    'Total number of simulation requests that waited for an identical computation in flight'
+)
+simulations_in_flight = Gauge(
+    'simulations_in_flight',
+    'Number of simulations being computed or queued for a worker'
+)
+simulation_compute_seconds = Histogram(
+    'simulation_compute_seconds',
+    'Simulation compute time in seconds',
+    ['engine'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+simulation_db_seconds = Histogram(
+    'simulation_db_seconds',
+    'Database access time in seconds',
+    ['operation'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+simulation_serialization_seconds = Histogram(
+    'simulation_serialization_seconds',
+    'Result serialization time in seconds',
+    ['operation'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+simulation_result_records = Gauge(
+    'simulation_result_records',
+    'Number of records in the most recently saved simulation result'
+)
+simulation_result_bytes = Gauge(
+    'simulation_result_bytes',
+    'Encoded size in bytes of the most recently saved simulation result'
+)
+
+# Per-run totals of profiled runs
+simulation_profile_phase_seconds = Summary(
+    'simulation_profile_phase_seconds',
+    'Time per processor phase of profiled runs in seconds',
+    ['engine', 'phase']
+)
+simulation_profile_state_manager_seconds = Summary(
+    'simulation_profile_state_manager_seconds',
+    'Time per state manager of profiled runs in seconds, excluding query resolution',
+    ['agent', 'state_manager']
+)
+
+
+class SimulationNotFoundError(LookupError):
+    """
+    Raised when a queried simulation does not exist.
+    """
+
 
 class SimulationService:
     """
@@ -34,28 +117,57 @@ class SimulationService:
     ----------
     processor : SimulationProcessor
         Processor used to run simulations with given parameters.
+    processors : dict
+        Processor for each supported engine, keyed by engine name.
+    agent_processors : dict
+        Processor for each agent configuration, keyed by (integrator, timestep).
+    cache : ResultCache
+        In-memory LRU cache of results, checked before the database.
+    writer : WriteBehindQueue
+        Queue that saves results to the database in the background; results
+        that are not written yet are read from it.
+    flights : SingleFlight
+        Computations in flight, keyed by parameters hash.
     """
 
     def __init__(self) -> None:
         """
-        Initialize the service with the simulator processor.
+        Initialize the service with the simulator processors.
+
+        Processors keep no per-run state, so they are shared by all runs,
+        including concurrent ones.
         """
         self.processor: SimulationProcessor = SimulationProcessor()
+        self.processors: Dict[str, Any] = {
+            'agents': self.processor,
+            'vectorized': NBodyProcessor(),
+        }
+        self.agent_processors: Dict[Tuple[str, str], SimulationProcessor] = {
+            (default_options['integrator'], default_options['timestep']): self.processor,
+        }
+        self.cache: ResultCache = ResultCache()
+        self.writer: WriteBehindQueue = write_behind
+        self.flights: SingleFlight[List[Tuple[float, float, Dict[str, Any]]]] = SingleFlight()
 
-    def run(self, params: Dict[str, Any]) -> List[Tuple[float, float, Dict[str, Any]]]:
+    def run(
+        self, params: Dict[str, Any], options: Optional[RunOptions] = None
+    ) -> List[Tuple[float, float, Dict[str, Any]]]:
         """
         Run a simulation with caching.
 
         This method first validates the parameters and computes their hash.
         It then attempts to retrieve cached results using `_fetch`. If a cached
         result is found, it is returned immediately. Otherwise, a new simulation
-        is executed with `SimulationProcessor`, the results are persisted, and
-        then returned.
+        is executed with the processor of the selected engine, the results are
+        persisted, and then returned. Concurrent calls with the same hash
+        share one computation: later callers wait for the first one's results.
 
         Parameters
         ----------
         params : dict
             Dictionary containing initial conditions for the simulation.
+        options : dict, optional
+            Run options such as the engine; missing options use the defaults.
 
         Returns
         -------
@@ -65,18 +177,238 @@ class SimulationService:
         # Increment Prometheus counter
         simulations_total.inc()
 
-        self._validate_params(params)
-        params_hash: str = self._compute_hash(params)
-
-        results: Optional[List[Tuple[float, float, Dict[str, Any]]]] = self._fetch(params_hash)
+        params_hash, run_options, results = self.lookup(params, options)
         if results:
             return results
-        else:
-            # If not found, run a new simulation
-            results = self.processor.run(params)
-            self._save_to_db(params, params_hash, results)
+        # If not found, run a new simulation, unless an identical one is in flight
+        results, shared = self.flights.do(params_hash, lambda: self._compute(params, params_hash, run_options))
+        if shared:
+            simulation_coalesced_requests_total.inc()
         return results
 
+    def run_profiled(
+        self, params: Dict[str, Any], options: Optional[RunOptions] = None
+    ) -> Tuple[List[Tuple[float, float, Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Run a simulation with profiling enabled.
+
+        The simulation is always computed, even when results are cached, so
+        that there is something to profile; results are persisted only if
+        they are not cached yet. Per-run totals are also exported as
+        Prometheus summaries.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict, optional
+            Run options such as the engine; missing options use the defaults.
+
+        Returns
+        -------
+        tuple
+            Simulation history as (low, high, state_dict) records, and the
+            profile with call counts, total and mean seconds per phase, agent
+            and state manager.
+        """
+        simulations_total.inc()
+
+        params_hash, run_options, cached = self.lookup(params, options)
+        profile = RunProfile()
+        results = self._execute(params, run_options, profile)
+        if not cached:
+            self._save_to_db(params, params_hash, results, run_options)
+
+        for path, (_, total) in profile.totals().items():
+            if path[0] == 'phases':
+                simulation_profile_phase_seconds.labels(engine=run_options['engine'], phase=path[1]).observe(total)
+            elif path[0] == 'state_managers':
+                simulation_profile_state_manager_seconds.labels(agent=path[1], state_manager=path[2]).observe(total)
+        return results, profile.as_dict()
+
+    def stream(
+        self, params: Dict[str, Any], options: Optional[RunOptions] = None
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Run a simulation with caching, streaming its records.
+
+        The request is validated and looked up before this method returns, so
+        invalid parameters raise immediately. Cached results are replayed;
+        otherwise records are yielded while the simulation runs in the calling
+        thread and the complete history is persisted once the run finishes.
+        A stream that is closed early is not persisted.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict, optional
+            Run options such as the engine; missing options use the defaults.
+
+        Returns
+        -------
+        iterator of tuple
+            Simulation history as (low, high, state_dict) records.
+        """
+        simulations_total.inc()
+
+        params_hash, run_options, results = self.lookup(params, options)
+        if results:
+            return iter(results)
+        return self._stream_and_save(params, params_hash, run_options)
+
+    def lookup(
+        self, params: Dict[str, Any], options: Optional[RunOptions] = None
+    ) -> Tuple[str, RunOptions, List[Tuple[float, float, Dict[str, Any]]]]:
+        """
+        Validate a run request and look up its cached results.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict, optional
+            Run options; missing options use the defaults.
+
+        Returns
+        -------
+        tuple
+            The parameters hash, the complete run options, and the cached
+            simulation history (an empty list on a cache miss).
+        """
+        self._validate_params(params)
+        run_options: RunOptions = self._merge_options(options)
+        params_hash: str = self._compute_hash(params, run_options)
+        results = self._fetch(params_hash)
+        (simulation_cache_hits_total if results else simulation_cache_misses_total).inc()
+        return params_hash, run_options, results
+
+    def find_prefix(self, params: Dict[str, Any], options: RunOptions) -> Optional[Tuple[str, int]]:
+        """
+        Find the longest stored run that a requested run extends.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict
+            Complete run options of the requested run.
+
+        Returns
+        -------
+        tuple or None
+            Parameters hash and number of iterations of the stored run with
+            the same parameters and options and the most iterations below
+            `options['iterations']`, or None if there is none or the run
+            does not record every step. Runs still queued for the database
+            are included.
+        """
+        # Thinned-out runs lack the step history a resumed run continues from
+        if options['record'] != 'all':
+            return None
+        base_hash = self._base_hash(params, options)
+        # Queued rows are read first, so a row committed in between is found in the database
+        candidates = [
+            (sim.params_hash, sim.iterations)
+            for sim, _ in self.writer.pending()
+            if sim.base_hash == base_hash and sim.iterations < options['iterations']
+        ]
+        with simulation_db_seconds.labels(operation='fetch').time(), SessionLocal() as session:
+            stored = (
+                session.query(Simulation.params_hash, Simulation.iterations)
+                .filter(Simulation.base_hash == base_hash, Simulation.iterations < options['iterations'])
+                .order_by(Simulation.iterations.desc())
+                .first()
+            )
+        if stored is not None and stored[1] is not None:
+            candidates.append((stored[0], stored[1]))
+        if not candidates:
+            return None
+        prefix = max(candidates, key=lambda candidate: candidate[1])
+        return prefix[0], prefix[1]
+
+    def save(
+        self,
+        params: Dict[str, Any],
+        params_hash: str,
+        results: List[Tuple[float, float, Dict[str, Any]]],
+        options: RunOptions,
+    ) -> None:
+        """
+        Persist results that were computed outside this service, e.g. by a
+        job worker process.
+
+        Parameters
+        ----------
+        params : dict
+        params_hash : str
+        results : list of tuple
+            Simulation history as (low, high, state_dict) records.
+        options : dict
+            Complete run options of the simulation.
+        """
+        self._save_to_db(params, params_hash, results, options)
+
+    def run_ensemble(
+        self, params_list: List[Dict[str, Any]], options: Optional[RunOptions] = None
+    ) -> List[List[Tuple[float, float, Dict[str, Any]]]]:
+        """
+        Run an ensemble of initial conditions with per-member caching.
+
+        Every member is cached under its own parameters hash, exactly as if it
+        had been run alone on the vectorized engine. Cached members are
+        returned from the database; all remaining members are advanced
+        together in a single vectorized ensemble run and then persisted.
+
+        Parameters
+        ----------
+        params_list : list of dict
+            Initial conditions of each ensemble member.
+        options : dict, optional
+            Run options; the engine is always 'vectorized'.
+
+        Returns
+        -------
+        list of list of tuple
+            Simulation history of each member as (low, high, state_dict) records.
+        """
+        if not isinstance(params_list, list) or not params_list:
+            raise ValueError(ErrorMessages.INVALID_ENSEMBLE)
+        for params in params_list:
+            self._validate_params(params)
+        run_options: RunOptions = self._merge_options({**(options or {}), 'engine': 'vectorized'})
+        hashes: List[str] = [self._compute_hash(params, run_options) for params in params_list]
+        simulations_total.inc(len(params_list))
+
+        results: Dict[str, List[Tuple[float, float, Dict[str, Any]]]] = {}
+        missing: Dict[str, Dict[str, Any]] = {}
+        for params, params_hash in zip(params_list, hashes):
+            if params_hash in results or params_hash in missing:
+                continue
+            cached = self._fetch(params_hash)
+            if cached:
+                results[params_hash] = cached
+            else:
+                missing[params_hash] = params
+        simulation_cache_hits_total.inc(len(results))
+        simulation_cache_misses_total.inc(len(missing))
+
+        if missing:
+            with simulations_in_flight.track_inprogress(), simulation_compute_seconds.labels(engine='vectorized').time():
+                computed = self.processors['vectorized'].run_ensemble(
+                    list(missing.values()),
+                    iterations=run_options['iterations'],
+                    solver=run_options['solver'],
+                    theta=run_options['theta'],
+                    timestep=run_options['timestep'],
+                    integrator=run_options['integrator'],
+                    recording=self._recording(run_options),
+                )
+            for (params_hash, params), member_results in zip(missing.items(), computed):
+                self._save_to_db(params, params_hash, member_results, run_options)
+                results[params_hash] = member_results
+        return [results[params_hash] for params_hash in hashes]
+
     def get_latest(self) -> List[Tuple[float, float, Dict[str, Any]]]:
         """
         Retrieve the most recent simulation result.
@@ -87,16 +419,226 @@ class SimulationService:
             Simulation history as (low, high, state_dict) records.
             Returns an empty list if no simulation exists.
         """
-        with SessionLocal() as session:
-            sim: Optional[Simulation] = session.query(Simulation).order_by(Simulation.id.desc()).first()
-            if sim:
-                return json.loads(sim.results_json)
-            return []
+        pending = self.writer.pending()
+        if pending:
+            return pending[-1][1]
+        with simulation_db_seconds.labels(operation='fetch').time(), SessionLocal() as session:
+            latest: Optional[Tuple[str]] = (
+                session.query(Simulation.params_hash).order_by(Simulation.id.desc()).first()
+            )
+        if latest:
+            return self._fetch(latest[0])
+        return []
+
+    def query(
+        self,
+        simulation: str,
+        t_start: Optional[float] = None,
+        t_end: Optional[float] = None,
+        bodies: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        stride: int = 1,
+    ) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Retrieve a slice of stored simulation results.
+
+        Only the columns of the selected bodies and fields are decompressed,
+        and only the selected records are decoded. Results that are still
+        queued for the database are written first.
+
+        Parameters
+        ----------
+        simulation : str
+            Simulation id, or the 64-character parameters hash.
+        t_start, t_end : float, optional
+            Time window; records whose interval overlaps [t_start, t_end)
+            are selected.
+        bodies : sequence of str, optional
+            Bodies to include; all bodies by default.
+        fields : sequence of str, optional
+            Fields to include, as dotted paths or prefixes such as 'position';
+            all fields by default.
+        stride : int, optional
+            Keep every `stride`-th selected record of each body (default = 1).
+
+        Returns
+        -------
+        list of tuple
+            Selected (low, high, state_dict) records in simulation order.
+
+        Raises
+        ------
+        ValueError
+            If the stride or the time window is invalid.
+        SimulationNotFoundError
+            If no simulation matches the id or hash.
+        """
+        if stride < 1 or (t_start is not None and t_end is not None and t_start > t_end):
+            raise ValueError(ErrorMessages.INVALID_QUERY)
+        if len(simulation) == 64:
+            condition = Simulation.params_hash == simulation
+        elif simulation.isdigit():
+            condition = Simulation.id == int(simulation)
+        else:
+            raise ValueError(ErrorMessages.INVALID_QUERY)
+
+        self.writer.flush()
+        with simulation_db_seconds.labels(operation='fetch').time(), SessionLocal() as session:
+            row = session.query(Simulation.results_blob, Simulation.results_json).filter(condition).first()
+        if row is None:
+            raise SimulationNotFoundError(ErrorMessages.SIMULATION_NOT_FOUND)
+        results_blob, results_json = row
+        if results_blob is None:
+            results_blob = encode_results(json.loads(results_json))
+        return ColumnarResults(results_blob).query(t_start, t_end, bodies, fields, stride)
+
+    def _execute(
+        self,
+        params: Dict[str, Any],
+        options: RunOptions,
+        profile: Optional[RunProfile] = None,
+        prefix: Optional[Tuple[str, int]] = None,
+    ) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Run a simulation on the processor of the selected engine.
+
+        Parameters
+        ----------
+        params : dict
+            Dictionary containing initial conditions for the simulation.
+        options : dict
+            Complete run options.
+        profile : RunProfile, optional
+            Profile to record the run's timings into.
+        prefix : tuple, optional
+            Stored run to resume from, as returned by `find_prefix`; only
+            the missing iterations are computed.
+
+        Returns
+        -------
+        list of tuple
+            Simulation history as (low, high, state_dict) records.
+
+        Raises
+        ------
+        SimulationNotFoundError
+            If the stored run of `prefix` is no longer stored.
+        """
+        with simulations_in_flight.track_inprogress(), simulation_compute_seconds.labels(engine=options['engine']).time():
+            if prefix is not None:
+                records = self._fetch_prefix(prefix)
+                return records + list(self._resume(records, prefix[1], options))
+            if options['engine'] == 'vectorized':
+                return self.processors['vectorized'].run(
+                    params,
+                    iterations=options['iterations'],
+                    solver=options['solver'],
+                    theta=options['theta'],
+                    profile=profile,
+                    timestep=options['timestep'],
+                    integrator=options['integrator'],
+                    recording=self._recording(options),
+                )
+            return self._agent_processor(options).run(
+                params, options['iterations'], profile=profile, recording=self._recording(options)
+            )
+
+    def _compute(
+        self, params: Dict[str, Any], params_hash: str, options: RunOptions
+    ) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Compute and persist a simulation that missed the cache.
+
+        The cache is checked again first, as an identical computation may
+        have finished since the lookup.
+        """
+        results = self._fetch(params_hash)
+        if not results:
+            results = self._execute(params, options, prefix=self.find_prefix(params, options))
+            self._save_to_db(params, params_hash, results, options)
+        return results
+
+    def _resume(
+        self, prefix: List[Tuple[float, float, Dict[str, Any]]], iterations: int, options: RunOptions
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Yield the records that extend a stored run of `iterations` iterations
+        to `options['iterations']`.
+        """
+        remaining = options['iterations'] - iterations
+        if options['engine'] == 'vectorized':
+            return self.processors['vectorized'].resume(
+                prefix,
+                remaining,
+                solver=options['solver'],
+                theta=options['theta'],
+                timestep=options['timestep'],
+                integrator=options['integrator'],
+            )
+        return self._agent_processor(options).resume(prefix, remaining)
+
+    def _recording(self, options: RunOptions) -> Optional[RecordingPolicy]:
+        """
+        Return the recording policy of the run options, or None to record every step.
+        """
+        if options['record'] == 'all':
+            return None
+        return RecordingPolicy(options['record'], options['record_every'])
+
+    def _agent_processor(self, options: RunOptions) -> SimulationProcessor:
+        """
+        Return the processor for the agent configuration of the run options,
+        creating it on first use.
+        """
+        key = (options['integrator'], options['timestep'])
+        processor = self.agent_processors.get(key)
+        if processor is None:
+            # Concurrent first uses may both build one; only the first is kept
+            processor = self.agent_processors.setdefault(key, SimulationProcessor(build_agents(*key)))
+        return processor
+
+    def _stream_and_save(
+        self, params: Dict[str, Any], params_hash: str, options: RunOptions
+    ) -> Iterator[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Yield the records of a new simulation and persist them on completion.
+
+        A cached shorter run is replayed and then resumed, as in `_execute`.
+        """
+        records: Iterator[Tuple[float, float, Dict[str, Any]]]
+        prefix = self.find_prefix(params, options)
+        if prefix is not None:
+            stored = self._fetch_prefix(prefix)
+            records = chain(stored, self._resume(stored, prefix[1], options))
+        elif options['engine'] == 'vectorized':
+            records = self.processors['vectorized'].stream(
+                params,
+                iterations=options['iterations'],
+                solver=options['solver'],
+                theta=options['theta'],
+                timestep=options['timestep'],
+                integrator=options['integrator'],
+                recording=self._recording(options),
+            )
+        else:
+            records = self._agent_processor(options).stream(
+                params, options['iterations'], recording=self._recording(options)
+            )
+        results: List[Tuple[float, float, Dict[str, Any]]] = []
+        # Includes the time the consumer takes between records
+        with simulations_in_flight.track_inprogress(), simulation_compute_seconds.labels(engine=options['engine']).time():
+            for record in records:
+                results.append(record)
+                yield record
+        self._save_to_db(params, params_hash, results, options)
 
     def _fetch(self, params_hash: str) -> List[Tuple[float, float, Dict[str, Any]]]:
         """
         Retrieve cached simulation results for the given parameters hash.
 
+        The in-memory result cache is checked first, then results waiting to
+        be written; results read from the database are added to the cache.
+
         Parameters
         ----------
         params_hash : str
@@ -108,13 +650,66 @@ class SimulationService:
             Cached simulation history as (low, high, state_dict) records
             if found, otherwise an empty list.
         """
-        with SessionLocal() as session:
+        results = self.cache.get(params_hash)
+        if results is not None:
+            return results
+        results = self.writer.get(params_hash)
+        if results is not None:
+            return results
+        with simulation_db_seconds.labels(operation='fetch').time(), SessionLocal() as session:
             sim: Optional[Simulation] = (
                 session.query(Simulation).filter(Simulation.params_hash == params_hash).first()
             )
-            if sim:
-                return json.loads(sim.results_json)
+        if not sim:
             return []
+        with simulation_serialization_seconds.labels(operation='decode').time():
+            results = self._decode(sim)
+        self.cache.put(params_hash, results)
+        return results
+
+    def _fetch_prefix(self, prefix: Tuple[str, int]) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Retrieve the stored run a new run resumes from.
+
+        Parameters
+        ----------
+        prefix : tuple
+            Parameters hash and number of iterations of the stored run, as
+            returned by `find_prefix`.
+
+        Returns
+        -------
+        list of tuple
+            Simulation history of the stored run as (low, high, state_dict) records.
+
+        Raises
+        ------
+        SimulationNotFoundError
+            If the stored run is in neither the cache nor the database.
+        """
+        records = self._fetch(prefix[0])
+        if not records:
+            raise SimulationNotFoundError(ErrorMessages.SIMULATION_NOT_FOUND)
+        simulation_prefix_reuse_total.inc()
+        return records
+
+    def _decode(self, sim: Simulation) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """
+        Decode the stored results of a simulation row.
+
+        Parameters
+        ----------
+        sim : Simulation
+
+        Returns
+        -------
+        list of tuple
+            Simulation history as (low, high, state_dict) records, from the
+            columnar results or, for legacy rows, from the JSON results.
+        """
+        if sim.results_blob is not None:
+            return ColumnarResults(sim.results_blob).to_records()
+        return json.loads(sim.results_json)
 
     def _validate_params(self, params: Dict[str, Any]) -> None:
         """
@@ -133,25 +728,95 @@ class SimulationService:
         if not isinstance(params, dict) or not params:
             raise ValueError(ErrorMessages.INVALID_PARAMS)
 
-    def _compute_hash(self, params: Dict[str, Any]) -> str:
+    def _merge_options(self, options: Optional[RunOptions]) -> RunOptions:
         """
-        Compute a deterministic hash of parameters for caching.
+        Validate run options and fill in defaults.
+
+        Parameters
+        ----------
+        options : dict, optional
+            User-specified run options.
+
+        Returns
+        -------
+        dict
+            Complete run options.
+
+        Raises
+        ------
+        ValueError
+            If an option is unknown or has an unsupported value.
+        """
+        merged: RunOptions = {**default_options, **(options or {})}
+        if set(merged) != set(default_options) or merged['engine'] not in ENGINES:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        if merged['solver'] not in SOLVERS or not isinstance(merged['theta'], (int, float)) or merged['theta'] < 0:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        if merged['timestep'] not in TIMESTEPS or merged['integrator'] not in INTEGRATORS:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        iterations = merged['iterations']
+        if isinstance(iterations, bool) or not isinstance(iterations, int) or not 1 <= iterations <= Settings.MAX_ITERATIONS:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        record_every = merged['record_every']
+        if merged['record'] not in RECORDINGS or isinstance(record_every, bool) or not isinstance(record_every, (int, float)):
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        # The interval only applies to strides and cadences
+        if merged['record'] in ('all', 'final') and record_every != default_options['record_every']:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        try:
+            RecordingPolicy(merged['record'], record_every)
+        except ValueError:
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        # Solver settings only apply to the vectorized engine
+        solver_settings = (merged['solver'], merged['theta'])
+        if merged['engine'] != 'vectorized' and solver_settings != (default_options['solver'], default_options['theta']):
+            raise ValueError(ErrorMessages.INVALID_OPTIONS)
+        merged['theta'] = float(merged['theta'])
+        merged['record_every'] = float(record_every)
+        return merged
+
+    def _compute_hash(self, params: Dict[str, Any], options: Optional[RunOptions] = None) -> str:
+        """
+        Compute a deterministic hash of a run for caching.
+
+        The hash covers the complete initial state and run options, and the
+        configuration that produces the results, so equivalent requests share
+        it; see `cache_key`.
 
         Parameters
         ----------
         params : dict
+        options : dict, optional
+            Run options; missing options use the defaults.
 
         Returns
         -------
         str
-            SHA256 hash of parameters JSON.
+            SHA256 hash of the run.
+        """
+        return cache_key(params, {**default_options, **(options or {})})
+
+    def _base_hash(self, params: Dict[str, Any], options: RunOptions) -> str:
+        """
+        Compute the hash shared by runs that differ only in their iterations.
+
+        This is the parameters hash of the same run with the default number
+        of iterations.
         """
-        params_json: str = json.dumps(params, sort_keys=True)
-        return hashlib.sha256(params_json.encode('utf-8')).hexdigest()
+        return self._compute_hash(params, {**options, 'iterations': default_options['iterations']})
 
-    def _save_to_db(self, params: Dict[str, Any], params_hash: str, results: List[Tuple[float, float, Dict[str, Any]]]) -> None:
+    def _save_to_db(
+        self,
+        params: Dict[str, Any],
+        params_hash: str,
+        results: List[Tuple[float, float, Dict[str, Any]]],
+        options: RunOptions,
+    ) -> None:
         """
-        Save simulation run to the database.
+        Save simulation run to the result cache, and queue it for the database.
+
+        The row is written by the write-behind queue, so the caller does not
+        wait for the database.
 
         Parameters
         ----------
@@ -159,12 +824,56 @@ class SimulationService:
         params_hash : str
         results : list of tuple
             Simulation history as (low, high, state_dict) records.
+        options : dict
+            Complete run options, recorded so longer runs can resume from it.
         """
-        with SessionLocal() as session:
-            sim = Simulation(
-                params_json=json.dumps(params),
-                params_hash=params_hash,
-                results_json=json.dumps(results),
-            )
-            session.add(sim)
-            session.commit()
+        with simulation_serialization_seconds.labels(operation='encode').time():
+            results_blob = encode_results(results)
+        simulation_result_records.set(len(results))
+        simulation_result_bytes.set(len(results_blob))
+        sim = Simulation(
+            params_json=json.dumps(params),
+            params_hash=params_hash,
+            base_hash=self._base_hash(params, options),
+            iterations=options['iterations'],
+            results_blob=results_blob,
+        )
+        # Replaces any cached results of the same hash
+        self.cache.put(params_hash, results)
+        self.writer.put(params_hash, sim, results)
+
+
+# Service instance of a job worker process, created on first use
+_worker_service: Optional[SimulationService] = None
+
+
+def execute_simulation(
+    params: Dict[str, Any], options: RunOptions, prefix: Optional[Tuple[str, int]] = None
+) -> Tuple[List[Tuple[float, float, Dict[str, Any]]], float]:
+    """
+    Run a simulation without caching; the entry point of job worker processes.
+
+    Metrics recorded in a worker process are not exported, so the compute
+    time is returned to the parent process.
+
+    Parameters
+    ----------
+    params : dict
+        Dictionary containing initial conditions for the simulation.
+    options : dict
+        Complete run options, as returned by `SimulationService.lookup`.
+    prefix : tuple, optional
+        Stored run to resume from, as returned by `SimulationService.find_prefix`.
+
+    Returns
+    -------
+    tuple
+        Simulation history as (low, high, state_dict) records, and the
+        compute time in seconds.
+    """
+    global _worker_service
+    if _worker_service is None:
+        _worker_service = SimulationService()
+    start = time.perf_counter()
+    results = _worker_service._execute(params, options, prefix=prefix)
+    return results, time.perf_counter() - start
@@ -0,0 +1,81 @@
+"""
+single_flight.py
+----------------
+Deduplication of concurrent identical calls.
+
+Components
+----------
+- SingleFlight : Runs at most one call per key at a time; callers that
+  arrive while a call of the same key is in flight wait for it and share
+  its result instead of running their own.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[T]):
+    """
+    Thread-safe single-flight group.
+
+    Examples
+    --------
+    >>> group = SingleFlight()
+    >>> group.do('key', lambda: 42)
+    (42, False)
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the group without calls in flight.
+        """
+        self._calls: Dict[str, Future[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Call `func`, unless a call of the same key is in flight.
+
+        Parameters
+        ----------
+        key : str
+            Identity of the call, e.g. a parameters hash.
+        func : callable
+            Computes the result; only called by the first caller of a key.
+
+        Returns
+        -------
+        tuple
+            The result, and whether it was shared from another caller's call.
+
+        Raises
+        ------
+        Exception
+            Whatever `func` raised, in the caller that ran it and in every
+            caller that waited for it.
+        """
+        with self._lock:
+            pending = self._calls.get(key)
+            if pending is None:
+                future: Future[T] = Future()
+                self._calls[key] = future
+        if pending is not None:
+            return pending.result(), True
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        """Number of calls in flight."""
+        return len(self._calls)
@@ -7,10 +7,14 @@ Purpose
 -------
 - Defines a shared TestClient instance for all test cases.
 - Centralizes setup logic for consistent API testing.
+- Creates and migrates the database schema, since the app lifespan does
+  not run for a TestClient used outside a `with` block.
 """
 
 from fastapi.testclient import TestClient
 from app.app import app
+from app.clients.database import Base, engine
+from app.clients.migrations import run_migrations
 
 
 class BaseTestCase:
@@ -25,4 +29,6 @@ class BaseTestCase:
         """
         Initialize a shared FastAPI TestClient for all tests extending this class.
         """
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         cls.client = TestClient(app)
@@ -4,6 +4,14 @@ test_api.py
 End-to-end tests for the FastAPI simulation API endpoints.
 """
 
+import asyncio
+import copy
+import json
+import time
+import uuid
+from app.config import simulation_config
+from app.controllers import simulation_controller
+from app.services.simulation_service import SimulationService
 from app.tests.abstract.base_test import BaseTestCase
 
 
@@ -12,7 +20,7 @@ class TestAPI(BaseTestCase):
     TestAPI
     -------
     Tests the FastAPI endpoints exposed by the simulation controller.
-    Validates health check, simulation run, and retrieval of latest results.
+    Validates health check, simulation run, simulation jobs, and retrieval of latest results.
     """
 
     def test_health_endpoint(self):
@@ -34,30 +42,301 @@ class TestAPI(BaseTestCase):
         """
         test_run_simulation_endpoint
         ----------------------------
-        Verify that the run simulation endpoint executes and returns a response.
+        Verify that the run simulation endpoint accepts a new run as a job
+        that completes.
 
         Raises
         ------
         AssertionError
-            If the endpoint does not return status 200 or expected keys.
+            If the endpoint does not return status 202 with a job id, or the
+            job does not succeed.
         """
-        # Sample input
-        payload = {'param1': 1.0, 'param2': 2.0}
+        # Sample input, unique so the run is never cached beforehand
+        payload = {'Body1': {'mass': 1.0 + uuid.uuid4().int % 10**6 * 1e-9}}
         response = self.client.post('/api/v1/simulation/run', json=payload)
+        assert response.status_code == 202
+        job_id = response.json()['job_id']
+
+        deadline = time.monotonic() + 60
+        while True:
+            job = self.client.get(f'/api/v1/simulation/jobs/{job_id}')
+            assert job.status_code == 200
+            status = job.json()['status']
+            if status in ('succeeded', 'failed') or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        assert status == 'succeeded'
+
+    def test_run_simulation_job(self):
+        """
+        test_run_simulation_job
+        -----------------------
+        Verify that a new run is queued as a job whose results become
+        available, that an identical run submitted meanwhile gets the same
+        job, and that the same run is then answered from the cache.
+
+        Raises
+        ------
+        AssertionError
+            If the job is not accepted or shared, does not succeed, or the
+            repeated run is not answered synchronously with the same results.
+        """
+        # Unique parameters so the run is never cached beforehand
+        payload = copy.deepcopy(simulation_config.default_data)
+        payload['Body2']['mass'] = 0.01 + uuid.uuid4().int % 10**6 * 1e-9
+        response = self.client.post('/api/v1/simulation/run', json=payload)
+        assert response.status_code == 202
+        job_id = response.json()['job_id']
+
+        # Worker processes take far longer to start than this request
+        repeated = self.client.post('/api/v1/simulation/run', json=payload)
+        assert repeated.status_code == 202
+        assert repeated.json()['job_id'] == job_id
+
+        deadline = time.monotonic() + 60
+        while True:
+            status = self.client.get(f'/api/v1/simulation/jobs/{job_id}').json()['status']
+            if status in ('succeeded', 'failed') or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        assert status == 'succeeded'
+
+        result = self.client.get(f'/api/v1/simulation/jobs/{job_id}/result')
+        assert result.status_code == 200
+        assert len(result.json()) > 0
+
+        cached = self.client.post('/api/v1/simulation/run', json=payload)
+        assert cached.status_code == 200
+        assert cached.json() == result.json()
+
+    def test_stream_simulation_endpoint(self):
+        """
+        test_stream_simulation_endpoint
+        -------------------------------
+        Verify that a streamed run sends one NDJSON record per line and is
+        persisted once the stream completes.
+
+        Raises
+        ------
+        AssertionError
+            If the stream is malformed, or the run is not cached afterwards
+            with the same records.
+        """
+        payload = copy.deepcopy(simulation_config.default_data)
+        payload['Body2']['mass'] = 0.02 + uuid.uuid4().int % 10**6 * 1e-9
+        response = self.client.post('/api/v1/simulation/run/stream', json=payload)
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records[0][:2] == [-1e9, 0]
+
+        cached = self.client.post('/api/v1/simulation/run', json=payload)
+        assert cached.status_code == 200
+        assert cached.json() == records
+
+    def test_query_simulation_endpoint(self):
+        """
+        test_query_simulation_endpoint
+        ------------------------------
+        Verify that a stored simulation can be queried by its parameters
+        hash for one body's positions in a time window.
+
+        Raises
+        ------
+        AssertionError
+            If the slice differs from the filtered full results, or unknown
+            simulations and invalid queries are not rejected.
+        """
+        payload = copy.deepcopy(simulation_config.default_data)
+        payload['Body2']['mass'] = 0.03 + uuid.uuid4().int % 10**6 * 1e-9
+        records = [json.loads(line) for line in
+                   self.client.post('/api/v1/simulation/run/stream', json=payload).text.splitlines()]
+        params_hash = SimulationService()._compute_hash(payload)
+
+        response = self.client.get(
+            f'/api/v1/simulation/simulations/{params_hash}/query',
+            params={'t_start': 1000, 't_end': 5000, 'bodies': 'Body1', 'fields': 'position', 'stride': 2},
+        )
+        assert response.status_code == 200
+        expected = [
+            [low, high, {'Body1': {'position': state['Body1']['position']}}]
+            for low, high, state in records[1:]
+            if 'Body1' in state and high > 1000 and low < 5000
+        ][::2]
+        assert response.json() == expected
+
+        assert self.client.get(f'/api/v1/simulation/simulations/{"0" * 64}/query').status_code == 404
+        assert self.client.get(f'/api/v1/simulation/simulations/{params_hash}/query?stride=0').status_code == 400
+
+    def test_results_are_compressed_and_rounded(self):
+        """
+        test_results_are_compressed_and_rounded
+        ---------------------------------------
+        Verify that results are gzip-compressed for clients that accept it,
+        sent uncompressed to clients that do not, and rounded to the
+        requested precision.
+
+        Raises
+        ------
+        AssertionError
+            If the content encoding, the results or the precision check differ.
+        """
+        payload = {'Body1': {'mass': 1.0 + uuid.uuid4().int % 10**6 * 1e-9}}
+        self.client.post('/api/v1/simulation/run/stream', json=payload)
+        url = f'/api/v1/simulation/simulations/{SimulationService()._compute_hash(payload)}/query'
+
+        plain = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        assert 'content-encoding' not in plain.headers
+        compressed = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['content-encoding'] == 'gzip'
+        assert compressed.headers['content-type'] == 'application/json'
+        assert int(compressed.headers['content-length']) < len(plain.content)
+        assert compressed.json() == plain.json()
+
+        rounded = self.client.get(url, params={'precision': 3}).json()
+        (_, high, state), (_, rounded_high, rounded_state) = plain.json()[-1], rounded[-1]
+        ((body, fields),) = state.items()
+        assert rounded_high == float(f'{high:.3g}')
+        assert rounded_state[body]['mass'] == float(f'{fields["mass"]:.3g}')
+        assert self.client.get(url, params={'precision': 0}).status_code == 422
+
+    def test_stream_simulation_sse(self):
+        """
+        test_stream_simulation_sse
+        --------------------------
+        Verify that Server-Sent Events carry one record per data event and
+        finish with an end event.
+
+        Raises
+        ------
+        AssertionError
+            If the events are malformed or the format is not validated.
+        """
+        payload = {'Body1': {'mass': 1.0}}
+        response = self.client.post('/api/v1/simulation/run/stream?format=sse', json=payload)
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/event-stream')
+        events = response.text.strip().split('\n\n')
+        assert events[-1] == 'event: end\ndata: null'
+        assert all(event.startswith('data: ') for event in events[:-1])
+        assert len(json.loads(events[0][len('data: '):])) == 3
+
+        invalid = self.client.post('/api/v1/simulation/run/stream?format=xml', json=payload)
+        assert invalid.status_code == 400
+
+    def test_metrics_endpoint(self):
+        """
+        test_metrics_endpoint
+        ---------------------
+        Verify that a cached run is counted as a cache hit and that latency,
+        serialization and result size metrics are exported.
+
+        Raises
+        ------
+        AssertionError
+            If a metric is missing or the cache hit is not counted.
+        """
+        def sample(text: str, name: str) -> float:
+            line = next(line for line in text.splitlines() if line.startswith(name + ' '))
+            return float(line.split()[-1])
+
+        payload = {'Body1': {'mass': 1.0 + uuid.uuid4().int % 10**6 * 1e-9}}
+        self.client.post('/api/v1/simulation/run/stream', json=payload)
+        hits = sample(self.client.get('/metrics').text, 'simulation_cache_hits_total')
+        assert self.client.post('/api/v1/simulation/run', json=payload).status_code == 200
+
+        text = self.client.get('/metrics').text
+        assert sample(text, 'simulation_cache_hits_total') == hits + 1
+        for name in (
+            'simulation_cache_misses_total',
+            'simulations_in_flight',
+            'simulation_request_seconds_count{endpoint="/run"}',
+            'simulation_serialization_seconds_count{operation="response"}',
+            'simulation_db_seconds_count{operation="fetch"}',
+            'simulation_result_records',
+            'simulation_result_bytes',
+        ):
+            assert any(line.startswith(name) for line in text.splitlines()), name
+
+    def test_run_simulation_profiled(self):
+        """
+        test_run_simulation_profiled
+        ----------------------------
+        Verify that a profiled run returns its results together with the
+        profile of its phases and state managers.
+
+        Raises
+        ------
+        AssertionError
+            If the results or the profile are missing.
+        """
+        payload = {'Body1': {'mass': 1.0}}
+        response = self.client.post('/api/v1/simulation/run?profile=true', json=payload)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body['results']) > 0
+        assert body['profile']['state_managers']['Body2']['propagate_velocity']['calls'] > 0
+        assert 'read' in body['profile']['phases']
+
+    def test_unknown_job_endpoint(self):
+        """
+        test_unknown_job_endpoint
+        -------------------------
+        Verify that unknown job ids are reported as not found.
+
+        Raises
+        ------
+        AssertionError
+            If the endpoint does not return status 404.
+        """
+        response = self.client.get('/api/v1/simulation/jobs/unknown')
+        assert response.status_code == 404
+
+    def test_results_are_encoded_off_the_event_loop(self, monkeypatch):
+        """
+        test_results_are_encoded_off_the_event_loop
+        -------------------------------------------
+        Verify that result responses are encoded and compressed outside the
+        event loop, so large results do not stall other requests.
+
+        Raises
+        ------
+        AssertionError
+            If a result response is encoded on the event loop.
+        """
+        on_loop = []
+        encode_response = simulation_controller.encode_response
+
+        def encode(*args):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return encode_response(*args)
+
+        monkeypatch.setattr(simulation_controller, 'encode_response', encode)
+        response = self.client.get('/api/v1/simulation/latest', headers={'Accept-Encoding': 'gzip'})
         assert response.status_code == 200
-        assert 'content' in response.json()
+        assert on_loop == [False]
 
     def test_latest_simulation_endpoint(self):
         """
         test_latest_simulation_endpoint
         -------------------------------
-        Verify that the latest simulation endpoint retrieves the most recent run.
+        Verify that the latest simulation endpoint retrieves the most recent run
+        as a list of (low, high, state) records.
 
         Raises
         ------
         AssertionError
-            If the endpoint does not return status 200 or expected keys.
+            If the endpoint does not return status 200 or the records are
+            malformed.
         """
         response = self.client.get('/api/v1/simulation/latest')
         assert response.status_code == 200
-        assert 'content' in response.json()
+        records = response.json()
+        assert isinstance(records, list)
+        for low, high, state in records:
+            assert low <= high
+            assert isinstance(state, dict)
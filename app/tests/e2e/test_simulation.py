@@ -4,8 +4,13 @@ test_simulation.py
 End-to-end smoke test for the simulation pipeline.
 """
 
+import copy
+import math
+from concurrent.futures import ThreadPoolExecutor
+import pytest
 from app.tests.abstract.base_test import BaseTestCase
 from app.processors.simulation_processor import SimulationProcessor
+from app.processors.nbody_processor import NBodyProcessor
 from app.config import simulation_config
 
 
@@ -31,3 +36,122 @@ class TestSimulation(BaseTestCase):
         processor = SimulationProcessor()
         results = processor.run(simulation_config.default_data, iterations=10)
         assert len(results) > 0, 'Simulation should produce results'
+
+    def test_simulation_streams_records(self):
+        """
+        test_simulation_streams_records
+        -------------------------------
+        Streaming a simulation must yield exactly the records of a full run,
+        in the same order.
+
+        Raises
+        ------
+        AssertionError
+            If the streamed records differ from the run results.
+        """
+        expected = SimulationProcessor().run(simulation_config.default_data, iterations=10)
+        stream = SimulationProcessor().stream(simulation_config.default_data, iterations=10)
+        assert next(stream) == expected[0]
+        assert [expected[0], *stream] == expected
+
+    def test_vectorized_engine_matches_agents(self):
+        """
+        test_vectorized_engine_matches_agents
+        -------------------------------------
+        With a massless Body2, mutual gravity reduces to the agent
+        configuration, so both engines must produce the same records.
+
+        Raises
+        ------
+        AssertionError
+            If the record layout or the trajectories differ.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.0
+        expected = SimulationProcessor().run(copy.deepcopy(params), iterations=50)
+        results = NBodyProcessor().run(copy.deepcopy(params), iterations=50)
+
+        assert [(low, high, list(state)) for low, high, state in results] == \
+            [(low, high, list(state)) for low, high, state in expected]
+        for (_, _, state), (_, _, reference) in zip(results[1:], expected[1:]):
+            for body, values in state.items():
+                assert list(values) == list(reference[body])
+                for field in ('position', 'velocity'):
+                    assert values[field] == pytest.approx(reference[body][field], rel=1e-12)
+
+    def test_vectorized_engine_runs_many_bodies(self):
+        """
+        test_vectorized_engine_runs_many_bodies
+        ---------------------------------------
+        Run the vectorized engine on a generated 200-body scenario.
+
+        Raises
+        ------
+        AssertionError
+            If a record is missing or a state is not finite.
+        """
+        bodies = simulation_config.generate_bodies(200, seed=1)
+        results = NBodyProcessor().run(bodies, iterations=5)
+        assert len(results) == 1 + 5 * 200
+        assert all(math.isfinite(v) for _, _, state in results[1:] for s in state.values() for v in s['position'].values())
+
+    def test_ensemble_matches_individual_runs(self):
+        """
+        test_ensemble_matches_individual_runs
+        -------------------------------------
+        Run a Body2 velocity sweep as one ensemble and compare every member
+        with a separate vectorized run.
+
+        Raises
+        ------
+        AssertionError
+            If any member differs from its individual run.
+        """
+        sweep = []
+        for vy in (0.11, 0.13, 0.15):
+            params = copy.deepcopy(simulation_config.default_data)
+            params['Body2']['velocity'] = {'x': 0.0, 'y': vy, 'z': 0.0}
+            sweep.append(params)
+        members = NBodyProcessor().run_ensemble(copy.deepcopy(sweep), iterations=20)
+        assert len(members) == len(sweep)
+        for params, member in zip(sweep, members):
+            single = NBodyProcessor().run(copy.deepcopy(params), iterations=20)
+            assert len(member) == len(single)
+            for (low, high, state), (s_low, s_high, s_state) in zip(member[1:], single[1:]):
+                assert (low, high) == (s_low, s_high)
+                for body, values in state.items():
+                    assert values['position'] == pytest.approx(s_state[body]['position'], rel=1e-12)
+
+    def test_concurrent_runs_share_one_processor(self):
+        """
+        test_concurrent_runs_share_one_processor
+        ----------------------------------------
+        Run differently parameterized simulations on one processor from a
+        thread pool, interleaved step by step, and compare each with a run
+        of its own processor. The returned states must not alias the
+        processor's defaults or the caller's parameters.
+
+        Raises
+        ------
+        AssertionError
+            If concurrent runs affect each other or a run changes the
+            defaults of later runs.
+        """
+        sweep = []
+        for vy in (0.11, 0.13, 0.15, 0.17):
+            params = copy.deepcopy(simulation_config.default_data)
+            params['Body2']['velocity'] = {'x': 0.0, 'y': vy, 'z': 0.0}
+            sweep.append(params)
+        expected = [SimulationProcessor().run(params, iterations=30) for params in sweep]
+        processor = SimulationProcessor()
+        with ThreadPoolExecutor(max_workers=len(sweep)) as pool:
+            results = list(pool.map(lambda params: processor.run(params, iterations=30), sweep))
+        streams = [processor.stream(params, iterations=30) for params in sweep]
+        interleaved = [list(records) for records in zip(*streams)]
+        assert results == expected
+        assert [list(records) for records in zip(*interleaved)] == expected
+
+        results[0][0][2]['Body1']['position']['x'] = 1e9
+        sweep[1]['Body2']['mass'] = 1e9
+        assert processor.run(simulation_config.default_data, iterations=1)[0][2]['Body1']['position']['x'] == -0.73
+        assert processor.run(sweep[1], iterations=1)[0][2]['Body2'] is not sweep[1]['Body2']
@@ -0,0 +1,113 @@
+"""
+test_barnes_hut.py
+------------------
+Unit tests for the Barnes-Hut gravity solver.
+"""
+
+import numpy as np
+import pytest
+from app.config.settings import Settings
+from app.config.simulation_config import generate_bodies
+from app.processors.nbody_processor import NBodyProcessor
+from app.utilities.physics.barnes_hut import accelerations_barnes_hut
+from app.utilities.physics.simulation_math import accelerations_direct
+
+
+class TestBarnesHut:
+    """
+    TestBarnesHut
+    -------------
+    Unit tests for Barnes-Hut accuracy, degenerate inputs and solver fallback.
+    """
+
+    def setup_method(self):
+        """
+        Build a random 500-body configuration shared by the tests.
+        """
+        rng = np.random.default_rng(3)
+        self.positions = rng.normal(size=(500, 3))
+        self.masses = rng.uniform(0.1, 1.0, 500)
+
+    def test_zero_theta_matches_direct_sum(self):
+        """
+        test_zero_theta_matches_direct_sum
+        ----------------------------------
+        With theta = 0 every node is opened, which is the direct sum.
+
+        Raises
+        ------
+        AssertionError
+            If the accelerations differ beyond rounding.
+        """
+        exact = accelerations_direct(self.positions, self.masses)
+        approx = accelerations_barnes_hut(self.positions, self.masses, theta=0.0)
+        assert np.allclose(approx, exact, rtol=1e-10, atol=0)
+
+    def test_opening_angle_bounds_error(self):
+        """
+        test_opening_angle_bounds_error
+        -------------------------------
+        Verify that the default opening angle keeps the median error small.
+
+        Raises
+        ------
+        AssertionError
+            If the median relative error exceeds 1%.
+        """
+        exact = accelerations_direct(self.positions, self.masses)
+        approx = accelerations_barnes_hut(self.positions, self.masses, theta=0.5)
+        error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+        assert np.median(error) < 1e-2
+
+    def test_coincident_bodies(self):
+        """
+        test_coincident_bodies
+        ----------------------
+        Verify that bodies at identical positions do not recurse forever
+        or produce non-finite accelerations.
+
+        Raises
+        ------
+        AssertionError
+            If any acceleration is not finite.
+        """
+        positions = np.zeros((20, 3))
+        positions[-1] = [1.0, 0.0, 0.0]
+        accelerations = accelerations_barnes_hut(positions, np.ones(20), theta=0.5)
+        assert np.isfinite(accelerations).all()
+
+    def test_small_n_falls_back_to_direct(self):
+        """
+        test_small_n_falls_back_to_direct
+        ---------------------------------
+        Verify that Barnes-Hut runs below the body threshold use the direct sum.
+
+        Raises
+        ------
+        AssertionError
+            If the Barnes-Hut run differs from the direct run.
+        """
+        bodies = generate_bodies(min(50, Settings.BARNES_HUT_MIN_BODIES - 1), seed=2)
+        direct = NBodyProcessor().run(bodies, iterations=3)
+        tree = NBodyProcessor().run(bodies, iterations=3, solver='barnes_hut', theta=1.0)
+        assert tree == direct
+
+    def test_large_n_uses_barnes_hut(self, monkeypatch):
+        """
+        test_large_n_uses_barnes_hut
+        ----------------------------
+        Verify that the processor uses the octree once the threshold is reached.
+
+        Raises
+        ------
+        AssertionError
+            If the trajectories are not close to the direct-sum trajectories.
+        """
+        monkeypatch.setattr(Settings, 'BARNES_HUT_MIN_BODIES', 10)
+        bodies = generate_bodies(60, seed=4)
+        direct = NBodyProcessor().run(bodies, iterations=2)
+        tree = NBodyProcessor().run(bodies, iterations=2, solver='barnes_hut', theta=0.5)
+        assert tree != direct
+        for (_, _, a), (_, _, b) in zip(tree[1:], direct[1:]):
+            for body in a:
+                assert a[body]['position'] == pytest.approx(b[body]['position'], rel=1e-3)
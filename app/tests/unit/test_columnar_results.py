@@ -0,0 +1,137 @@
+"""
+test_columnar_results.py
+------------------------
+Unit tests for the columnar binary encoding of simulation results.
+"""
+
+import doctest
+import json
+import numpy as np
+import pytest
+from app.config import simulation_config
+from app.processors.simulation_processor import SimulationProcessor
+from app.utilities.structures import columnar_results
+from app.utilities.structures.columnar_results import ColumnarResults, encode_results
+from app.utilities.structures.compact_state import json_default
+
+
+class TestColumnarResults:
+    """
+    TestColumnarResults
+    -------------------
+    Unit tests for encoding, lazy column access and exact round trips.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the columnar_results docstrings.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(columnar_results)
+        assert result.failed == 0
+
+    def test_simulation_round_trip_is_exact(self):
+        """
+        test_simulation_round_trip_is_exact
+        -----------------------------------
+        Decoded simulation results must serialize to exactly the same JSON
+        as the original records, in the same order.
+
+        Raises
+        ------
+        AssertionError
+            If the decoded records differ from the originals.
+        """
+        records = SimulationProcessor().run(simulation_config.default_data, iterations=50)
+        blob = encode_results(records)
+        assert (
+            json.dumps(ColumnarResults(blob).to_records(), default=json_default)
+            == json.dumps(records, default=json_default)
+        )
+        assert len(blob) < len(json.dumps(records, default=json_default))
+
+    def test_irregular_and_integer_records(self):
+        """
+        test_irregular_and_integer_records
+        ----------------------------------
+        Records that do not fit a numeric layout are kept as JSON, and
+        integer fields stay integers.
+
+        Raises
+        ------
+        AssertionError
+            If a record or a value type changes in the round trip.
+        """
+        records = [
+            (-1e9, 0, {'A': {'mass': 1}, 'B': {'mass': 2.0}}),
+            (0, 1.5, {'A': {'mass': 3, 'label': 'x'}}),
+            (0, 1.5, {'A': {'mass': 3, 'flag': True}}),
+            (0, 1.5, {'A': {'mass': 2 ** 70}}),
+            (1.5, 2, {'A': {'mass': 4, 'position': {'x': 0.5}}}),
+            (2, 3.0, {'A': {'mass': 5, 'position': {'x': -0.0}}}),
+        ]
+        assert (
+            json.dumps(ColumnarResults(encode_results(records)).to_records(), default=json_default)
+            == json.dumps(records, default=json_default)
+        )
+
+    def test_columns_are_lazy_read_only_views(self):
+        """
+        test_columns_are_lazy_read_only_views
+        -------------------------------------
+        Columns are decoded on first access into read-only float64 arrays,
+        and rows can be decoded with a subset of fields.
+
+        Raises
+        ------
+        AssertionError
+            If the column values, dtype or projection are wrong.
+        """
+        records = [(float(t), t + 1.0, {'A': {'position': {'x': t * 2.0, 'y': 0.0}}}) for t in range(5)]
+        results = ColumnarResults(encode_results(records))
+        assert results.count == 5
+        assert results.fields(0) == ['low', 'high', 'position.x', 'position.y']
+        column = results.column(0, 'position.x')
+        assert column.dtype == np.float64 and not column.flags.writeable
+        assert column.tolist() == [0.0, 2.0, 4.0, 6.0, 8.0]
+        assert results.group_records(0, np.array([1, 3]), fields=['position.x']) == [
+            (1.0, 2.0, {'A': {'position': {'x': 2.0}}}),
+            (3.0, 4.0, {'A': {'position': {'x': 6.0}}}),
+        ]
+        with pytest.raises(KeyError):
+            results.column(0, 'velocity.x')
+        with pytest.raises(ValueError):
+            ColumnarResults(b'[]')
+
+    def test_query_matches_filtered_records(self):
+        """
+        test_query_matches_filtered_records
+        -----------------------------------
+        A query must return exactly the records a full decode would yield
+        after filtering by time window, body, field and stride.
+
+        Raises
+        ------
+        AssertionError
+            If the selected records or their order differ.
+        """
+        records = SimulationProcessor().run(simulation_config.default_data, iterations=20)
+        results = ColumnarResults(encode_results(records))
+        t_start, t_end = 300.0, 1500.0
+        expected = [
+            (low, high, {'Body2': {'position': state['Body2']['position']}})
+            for low, high, state in records[1:]
+            if 'Body2' in state and high > t_start and low < t_end
+        ][::3]
+        assert results.query(t_start, t_end, bodies=['Body2'], fields=['position'], stride=3) == expected
+        assert results.query() == results.to_records()
+
+        initial = results.query(t_end=0, fields=['mass'])
+        assert initial == [(-1e9, 0, {body: {'mass': state['mass']} for body, state in records[0][2].items()})]
+        assert results.query(bodies=['Body3']) == []
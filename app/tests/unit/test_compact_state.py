@@ -0,0 +1,99 @@
+"""
+test_compact_state.py
+---------------------
+Unit tests for the compact representation of simulation states.
+"""
+
+import doctest
+import json
+import pickle
+from app.config import simulation_config
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.simulation_processor import SimulationProcessor
+from app.services.result_cache import estimate_size
+from app.utilities.structures import compact_state
+from app.utilities.structures.compact_state import CompactState, json_default, pack_state
+
+
+class TestCompactState:
+    """
+    TestCompactState
+    ----------------
+    Unit tests for CompactState and the compact records of the processors.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the compact_state docstrings.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(compact_state)
+        assert result.failed == 0
+
+    def test_states_share_their_layout_and_survive_pickling(self):
+        """
+        test_states_share_their_layout_and_survive_pickling
+        ---------------------------------------------------
+        Verify that states of the same shape share one layout, also after a
+        pickle round trip as done for results of worker processes.
+
+        Raises
+        ------
+        AssertionError
+            If layouts are duplicated or a state changes in the round trip.
+        """
+        first = pack_state({'A': {'position': {'x': 1.0}, 'mass': 2.0}})
+        second = pack_state({'A': {'position': {'x': 3.0}, 'mass': 4.0}})
+        restored = pickle.loads(pickle.dumps(first))
+        assert first.layout is second.layout is restored.layout
+        assert restored == first != second
+
+    def test_states_rebuild_any_keys_in_order(self):
+        """
+        test_states_rebuild_any_keys_in_order
+        -------------------------------------
+        Verify that states rebuild nested, single-leaf and mixed dicts in
+        their key order, with keys that are not identifiers kept as data.
+
+        Raises
+        ------
+        AssertionError
+            If the rebuilt state differs from the packed one.
+        """
+        state = {"it's": {'__import__("os")': {'z': 1.0}, 'b': {'y': 2.0, 'x': 3.0}, 'a': 4.0, '}': 5.0}}
+        packed = pack_state(state)
+        assert isinstance(packed, CompactState)
+        assert json.dumps(packed.to_dict()) == json.dumps(state)
+
+    def test_processors_record_compact_states(self):
+        """
+        test_processors_record_compact_states
+        -------------------------------------
+        Verify that both engines record compact states equal to the state
+        dicts, that the agent engine reads them back from its history store,
+        and that they are estimated smaller than the dicts.
+
+        Raises
+        ------
+        AssertionError
+            If a recorded state is not compact or differs from its dict.
+        """
+        params = simulation_config.default_data
+        for processor in (SimulationProcessor(), NBodyProcessor()):
+            records = processor.run(params, 20)
+            assert all(isinstance(state, CompactState) for _, _, state in records[1:])
+            as_dicts = json.loads(json.dumps(records, default=json_default))
+            states = [state for _, _, state in as_dicts]
+            assert [state for _, _, state in records] == states
+            assert [list(state.values()) for _, _, state in records] == [list(state.values()) for state in states]
+            assert estimate_size(records) < estimate_size([tuple(record) for record in as_dicts])
+        run = SimulationProcessor().start(params)
+        low, high, state = list(run.simulate(20))[-1]
+        (body,) = state
+        assert run.read((low + high) / 2)[body] == state[body]
@@ -0,0 +1,103 @@
+"""
+test_execution_plan.py
+----------------------
+Unit tests for compiling agent state managers into execution plans.
+"""
+
+import pytest
+from app.config.simulation_config import agents
+from app.processors.execution_plan import compile_plan
+from app.utilities.physics.simulation_math import identity, time_manager
+
+
+class TestExecutionPlan:
+    """
+    TestExecutionPlan
+    -----------------
+    Unit tests for plan ordering, cycle rejection, caching and execution.
+    """
+
+    def test_orders_state_managers_by_dependencies(self):
+        """
+        test_orders_state_managers_by_dependencies
+        ------------------------------------------
+        Verify that `time` is scheduled after the `timeStep` it consumes.
+
+        Raises
+        ------
+        AssertionError
+            If the compiled order differs from the expected order.
+        """
+        plan = compile_plan('Body1', agents['Body1'])
+        assert plan.order == ['identity', 'propagate_position', 'propagate_mass', 'timestep_manager', 'time_manager']
+
+    def test_rejects_cycles_at_compile_time(self):
+        """
+        test_rejects_cycles_at_compile_time
+        -----------------------------------
+        Verify that mutually dependent state managers fail to compile.
+
+        Raises
+        ------
+        AssertionError
+            If the cyclic configuration compiles.
+        """
+        sms = [
+            {'consumed': '( time, )', 'produced': 'timeStep', 'function': identity},
+            {'consumed': '( prev!(time), timeStep )', 'produced': 'time', 'function': time_manager},
+        ]
+        with pytest.raises(RuntimeError, match='Cyclic or unsatisfied'):
+            compile_plan('Cyclic', sms)
+
+    def test_plans_are_cached(self):
+        """
+        test_plans_are_cached
+        ---------------------
+        Verify that an identical agent configuration reuses its compiled plan.
+
+        Raises
+        ------
+        AssertionError
+            If the plan is recompiled.
+        """
+        assert compile_plan('Body2', list(agents['Body2'])) is compile_plan('Body2', agents['Body2'])
+
+    def test_runs_access_queries(self):
+        """
+        test_runs_access_queries
+        ------------------------
+        Verify that Access queries are resolved when consuming and producing.
+
+        Raises
+        ------
+        AssertionError
+            If the produced state is wrong.
+        """
+        sms = [
+            {'consumed': '( agent!(Other).position.x, )', 'produced': 'offset.x', 'function': identity},
+            {'consumed': '( offset.x, )', 'produced': 'copy', 'function': identity},
+        ]
+        plan = compile_plan('Probe', sms)
+        universe = {'Probe': {}, 'Other': {'position': {'x': 4.0}}}
+        assert plan.run(universe) == {'Probe': {'offset': {'x': 4.0}, 'copy': 4.0}}
+
+    def test_runs_tuple_productions(self):
+        """
+        test_runs_tuple_productions
+        ---------------------------
+        Verify that a Tuple production stores every produced value and that
+        its fields satisfy the dependencies of later state managers.
+
+        Raises
+        ------
+        AssertionError
+            If the produced state or the order is wrong.
+        """
+        sms = [
+            {'consumed': '( swapped, )', 'produced': 'copy', 'function': identity},
+            {'consumed': '( prev!(pair), )', 'produced': '( swapped, offset.x, )', 'function': lambda pair: pair[::-1]},
+        ]
+        plan = compile_plan('Probe', sms)
+        assert plan.run({'Probe': {'pair': [1.0, 2.0]}}) == {'Probe': {'swapped': 2.0, 'offset': {'x': 1.0}, 'copy': 2.0}}
+        with pytest.raises(RuntimeError, match='Expected 2 produced values'):
+            plan.run({'Probe': {'pair': [1.0]}})
@@ -0,0 +1,145 @@
+"""
+test_migrations.py
+------------------
+Unit tests for the database migrations run at application startup.
+"""
+
+import hashlib
+import json
+from sqlalchemy import create_engine, inspect, text
+from app.clients.database import Base
+from app.clients.migrations import run_migrations
+from app.models.simulation_model import KEY_VERSION
+from app.services.simulation_service import SimulationService
+from app.utilities.structures.columnar_results import ColumnarResults
+from app.utilities.structures.compact_state import json_default
+
+
+class TestMigrations:
+    """
+    TestMigrations
+    --------------
+    Unit tests for migrating legacy simulations tables.
+    """
+
+    def test_legacy_results_are_converted(self):
+        """
+        test_legacy_results_are_converted
+        ---------------------------------
+        A table without `results_blob` gains the column, and its JSON results
+        are re-encoded into the columnar format. The row becomes a 500-iteration
+        prefix of its own hash. Running again is a no-op.
+
+        Raises
+        ------
+        AssertionError
+            If a column is missing or the converted results differ.
+        """
+        engine = create_engine('sqlite://')
+        records = [[-1e9, 0, {'A': {'mass': 1.0}}], [0, 1.0, {'A': {'mass': 2.0}}]]
+        with engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE simulations (id INTEGER PRIMARY KEY, params_json TEXT NOT NULL, '
+                'params_hash VARCHAR(64) NOT NULL, results_json TEXT NOT NULL, created_at DATETIME)'
+            ))
+            connection.execute(
+                text("INSERT INTO simulations (params_json, params_hash, results_json) VALUES ('{}', 'h', :results)"),
+                {'results': json.dumps(records)},
+            )
+
+        run_migrations(engine)
+        run_migrations(engine)
+
+        with engine.connect() as connection:
+            results_json, results_blob, base_hash, iterations = connection.execute(
+                text('SELECT results_json, results_blob, base_hash, iterations FROM simulations')
+            ).one()
+        assert results_json == ''
+        assert (base_hash, iterations) == ('h', 500)
+        assert (
+            json.dumps(ColumnarResults(results_blob).to_records(), default=json_default)
+            == json.dumps(records, default=json_default)
+        )
+
+    def test_duplicate_hashes_are_removed(self):
+        """
+        test_duplicate_hashes_are_removed
+        ---------------------------------
+        Rows of a table whose params_hash index is not unique are reduced to
+        the most recent row of every hash, and the index becomes unique.
+
+        Raises
+        ------
+        AssertionError
+            If duplicates remain, the wrong row is kept, or the index is not unique.
+        """
+        engine = create_engine('sqlite://')
+        with engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE simulations (id INTEGER PRIMARY KEY, params_json TEXT NOT NULL, '
+                'params_hash VARCHAR(64) NOT NULL, results_json TEXT NOT NULL, created_at DATETIME)'
+            ))
+            connection.execute(text('CREATE INDEX ix_simulations_params_hash ON simulations (params_hash)'))
+            for params_json, params_hash in (('1', 'a'), ('2', 'b'), ('3', 'a')):
+                connection.execute(
+                    text("INSERT INTO simulations (params_json, params_hash, results_json) VALUES (:json, :hash, '')"),
+                    {'json': params_json, 'hash': params_hash},
+                )
+
+        run_migrations(engine)
+        run_migrations(engine)
+
+        with engine.connect() as connection:
+            rows = connection.execute(text('SELECT params_hash, params_json FROM simulations ORDER BY id')).all()
+        assert [tuple(row) for row in rows] == [('b', '2'), ('a', '3')]
+        indexes = {index['name']: index for index in inspect(engine).get_indexes('simulations')}
+        assert indexes['ix_simulations_params_hash']['unique']
+
+    def test_legacy_hashes_are_recomputed(self):
+        """
+        test_legacy_hashes_are_recomputed
+        ---------------------------------
+        Rows keyed by the hash of the request as sent get the canonical hash
+        of their default run; a row whose run is already stored under another
+        spelling is removed, and a row whose hash is not the hash of its
+        parameters keeps it.
+
+        Raises
+        ------
+        AssertionError
+            If a hash is not recomputed, a duplicate remains, or a row is lost.
+        """
+        service = SimulationService()
+        params = {'Body2': {'mass': 0.5}}
+        spelled_out = {'Body2': {'mass': 0.5}, 'Body1': {'mass': 1}}
+
+        def legacy_hash(keyed):
+            return hashlib.sha256(json.dumps(keyed, sort_keys=True).encode('utf-8')).hexdigest()
+
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            for params_json, params_hash in (
+                (params, legacy_hash(params)),
+                (spelled_out, legacy_hash(spelled_out)),
+                (params, 'unknown'),
+            ):
+                connection.execute(
+                    text(
+                        'INSERT INTO simulations (params_json, params_hash, base_hash, iterations, results_json, key_version) '
+                        "VALUES (:json, :hash, :hash, 500, '', NULL)"
+                    ),
+                    {'json': json.dumps(params_json), 'hash': params_hash},
+                )
+
+        run_migrations(engine)
+        run_migrations(engine)
+
+        with engine.connect() as connection:
+            rows = connection.execute(text(
+                'SELECT params_hash, base_hash, key_version FROM simulations ORDER BY id'
+            )).all()
+        assert [tuple(row) for row in rows] == [
+            (service._compute_hash(params), service._compute_hash(params), KEY_VERSION),
+            ('unknown', 'unknown', KEY_VERSION),
+        ]
@@ -0,0 +1,84 @@
+"""
+test_qrange_store.py
+--------------------
+Unit tests for the interval-indexed QRangeStore.
+"""
+
+import doctest
+import random
+import pytest
+from app.utilities.structures import qrange_store
+from app.utilities.structures.qrange_store import QRangeStore
+
+
+class TestQRangeStore:
+    """
+    TestQRangeStore
+    ---------------
+    Unit tests for QRangeStore point, window and bulk-insert behaviour.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the QRangeStore docstring.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(qrange_store)
+        assert result.failed == 0
+
+    def test_matches_linear_scan(self):
+        """
+        test_matches_linear_scan
+        ------------------------
+        Verify point and window queries against a brute-force scan over
+        randomly ordered inserts, including bulk inserts.
+
+        Raises
+        ------
+        AssertionError
+            If any query result differs from the brute-force result.
+        """
+        rng = random.Random(7)
+        records = []
+        for i in range(300):
+            low = rng.uniform(-50, 50)
+            records.append((low, low + rng.uniform(0.1, 20), i))
+        store = QRangeStore[int]()
+        for low, high, value in records[:200]:
+            store[low, high] = value
+        store.extend(records[200:])
+
+        for _ in range(200):
+            t = rng.uniform(-60, 80)
+            expected = [v for (l, h, v) in records if l <= t < h]
+            if expected:
+                assert store[t] == expected
+            else:
+                with pytest.raises(IndexError):
+                    store[t]
+            t1 = t + rng.uniform(0.1, 10)
+            assert store[t:t1] == [v for (l, h, v) in records if l < t1 and h > t]
+        assert store.dump() == records
+
+    def test_invalid_bulk_insert_is_atomic(self):
+        """
+        test_invalid_bulk_insert_is_atomic
+        ----------------------------------
+        Verify that a bulk insert containing an invalid range inserts nothing.
+
+        Raises
+        ------
+        AssertionError
+            If the store is modified by the rejected bulk insert.
+        """
+        store = QRangeStore[str]()
+        store[0, 1] = 'A'
+        with pytest.raises(IndexError):
+            store.extend([(1, 2, 'B'), (3, 3, 'C')])
+        assert store.dump() == [(0, 1, 'A')]
@@ -0,0 +1,137 @@
+"""
+test_query_parser.py
+--------------------
+Unit tests for the native query parser and its AST cache.
+"""
+
+import doctest
+import os
+import re
+import pytest
+from app.config.settings import Settings
+from app.config.simulation_config import agents
+from app.utilities.queries import query_parser
+from app.utilities.queries.query_parser import parse_query, parse_query_binary
+
+# Queries covering every grammar rule, plus the ones used by the agent configuration
+SAMPLE_QUERIES = [
+    'prev!(time)',
+    'root!',
+    'agent!(Body1)',
+    'agent!(Body1).position.x',
+    '( prev!(timeStep), prev!(position), velocity, )',
+    '( prev!(time), timeStep )',
+    'prev!( (a, b,) ).c',
+    'time_step',
+] + [q for sms in agents.values() for sm in sms for q in (sm['consumed'], sm['produced'])]
+
+
+class TestQueryParser:
+    """
+    TestQueryParser
+    ---------------
+    Unit tests for parse_query grammar coverage, errors and caching.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the query parser docstrings.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(query_parser)
+        assert result.failed == 0
+
+    def test_tuple_and_access_shapes(self):
+        """
+        test_tuple_and_access_shapes
+        ----------------------------
+        Verify tuple trailing-comma handling and left-associative access.
+
+        Raises
+        ------
+        AssertionError
+            If the parsed AST does not match the Rust parser's JSON shape.
+        """
+        assert parse_query('( velocity, )') == {
+            'kind': 'Tuple', 'content': [{'kind': 'Base', 'content': 'velocity'}]
+        }
+        assert parse_query('prev!(a).b.c') == {
+            'kind': 'Access',
+            'content': {
+                'base': {
+                    'kind': 'Access',
+                    'content': {'base': {'kind': 'Prev', 'content': {'kind': 'Base', 'content': 'a'}}, 'field': 'b'},
+                },
+                'field': 'c',
+            },
+        }
+
+    @pytest.mark.parametrize('query', ['', '(a)', 'a b', 'prev!(a', 'agent!(1)', '(a,,)', 'a.'])
+    def test_invalid_queries_raise(self, query):
+        """
+        test_invalid_queries_raise
+        --------------------------
+        Verify that queries outside the grammar are rejected.
+
+        Raises
+        ------
+        AssertionError
+            If an invalid query parses without error.
+        """
+        with pytest.raises(ValueError):
+            parse_query(query)
+
+    def test_unmatched_whitespace_raises_parse_error(self, monkeypatch):
+        """
+        test_unmatched_whitespace_raises_parse_error
+        --------------------------------------------
+        Verify that a whitespace pattern that does not match is reported as
+        a parse error rather than an AttributeError.
+
+        Raises
+        ------
+        AssertionError
+            If the tokenizer does not raise ValueError.
+        """
+        monkeypatch.setattr(query_parser, '_WHITESPACE', re.compile(r'\s+'))
+        with pytest.raises(ValueError):
+            query_parser._tokenize('a')
+
+    def test_cached_ast_is_not_shared(self):
+        """
+        test_cached_ast_is_not_shared
+        -----------------------------
+        Verify that repeated parses hit the cache and that mutating a
+        returned AST does not corrupt later results.
+
+        Raises
+        ------
+        AssertionError
+            If the cache is bypassed or a cached AST was modified.
+        """
+        query_parser._parse_cached.cache_clear()
+        first = parse_query('prev!(mass)')
+        first['content']['content'] = 'changed'
+        assert parse_query('prev!(mass)') == {'kind': 'Prev', 'content': {'kind': 'Base', 'content': 'mass'}}
+        assert query_parser._parse_cached.cache_info().hits == 1
+
+    @pytest.mark.skipif(not os.path.exists(Settings.QUERY_BIN_PATH), reason='Rust query binary not built')
+    @pytest.mark.parametrize('query', SAMPLE_QUERIES)
+    def test_matches_rust_parser(self, query):
+        """
+        test_matches_rust_parser
+        ------------------------
+        Verify conformance with the Rust parser binary, when it is built.
+
+        Raises
+        ------
+        AssertionError
+            If the native and Rust ASTs differ.
+        """
+        assert parse_query(query) == parse_query_binary(query)
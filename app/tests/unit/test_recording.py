@@ -0,0 +1,128 @@
+"""
+test_recording.py
+-----------------
+Unit tests for recording policies.
+"""
+
+import doctest
+import json
+import pytest
+from app.config import simulation_config
+from app.processors import nbody_processor, recording
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.recording import RecordingPolicy
+from app.processors.simulation_processor import SimulationProcessor
+from app.utilities.structures.compact_state import json_default
+
+
+class TestRecordingPolicy:
+    """
+    TestRecordingPolicy
+    -------------------
+    Unit tests for RecordingPolicy and the recorded runs of the processors.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the RecordingPolicy docstring.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(recording)
+        assert result.failed == 0
+
+    def test_invalid_policies_are_rejected(self):
+        """
+        test_invalid_policies_are_rejected
+        ----------------------------------
+        Verify that unknown modes, fractional strides and non-positive
+        intervals are rejected.
+
+        Raises
+        ------
+        AssertionError
+            If an invalid policy is accepted.
+        """
+        for mode, every in (('sometimes', 1), ('stride', 2.5), ('stride', 0), ('cadence', -100.0)):
+            with pytest.raises(ValueError):
+                RecordingPolicy(mode, every)
+
+    def test_recorded_runs_are_subsets_of_full_runs(self):
+        """
+        test_recorded_runs_are_subsets_of_full_runs
+        -------------------------------------------
+        Verify that both engines record exactly the steps the policy selects
+        from a full run, starting with the initial state, so thinning out
+        the output leaves the integration unchanged.
+
+        Raises
+        ------
+        AssertionError
+            If a recorded run differs from the selection of the full run.
+        """
+        params = simulation_config.default_data
+        policies = [RecordingPolicy('stride', 7), RecordingPolicy('cadence', 1000.0), RecordingPolicy('final')]
+        for processor in (SimulationProcessor(), NBodyProcessor()):
+            full = processor.run(params, 60)
+            for policy in policies:
+                recorded = processor.run(params, 60, recording=policy)
+                expected = full[:1] + list(policy.select(full[1:]))
+                assert 1 < len(recorded) < len(full)
+                assert json.dumps(recorded, default=json_default) == json.dumps(expected, default=json_default)
+
+    def test_streamed_runs_are_built_batch_by_batch(self, monkeypatch):
+        """
+        test_streamed_runs_are_built_batch_by_batch
+        -------------------------------------------
+        Verify that the vectorized engine streams the records of a run, with
+        or without a recording policy, as `run` returns them, and yields the
+        first records once their batch of iterations is integrated.
+
+        Raises
+        ------
+        AssertionError
+            If a streamed run differs from the full run, or the whole run is
+            integrated before its first step is yielded.
+        """
+        monkeypatch.setattr(nbody_processor.Settings, 'STREAM_BATCH_ITERATIONS', 7)
+        params = simulation_config.default_data
+        processor = NBodyProcessor()
+        for policy in (None, RecordingPolicy('stride', 3), RecordingPolicy('final')):
+            full = processor.run(params, 60, recording=policy)
+            streamed = list(processor.stream(params, 60, recording=policy))
+            assert json.dumps(streamed, default=json_default) == json.dumps(full, default=json_default)
+
+        steps = []
+        integrate = nbody_processor.INTEGRATORS['euler']
+        monkeypatch.setitem(nbody_processor.INTEGRATORS, 'euler', lambda *args: steps.append(1) or integrate(*args))
+        records = processor.stream(params, 60)
+        next(records), next(records)
+        assert len(steps) == 7
+
+    def test_final_keeps_the_last_state_of_every_body(self):
+        """
+        test_final_keeps_the_last_state_of_every_body
+        ---------------------------------------------
+        Verify that the 'final' policy stores the initial state and the last
+        state of each body in the history store.
+
+        Raises
+        ------
+        AssertionError
+            If other states are recorded or stored.
+        """
+        processor = SimulationProcessor()
+        full = processor.run(simulation_config.default_data, 40)
+        run = processor.start(simulation_config.default_data)
+        recorded = list(run.simulate(40, recording=RecordingPolicy('final')))
+        latest = {}
+        for _, high, state in full[1:]:
+            latest.update(state)
+        assert [record[2] for record in recorded] == [{body: state} for body, state in latest.items()]
+        assert run.read(recorded[-1][1] - 1e-6) == latest
+        assert run.read(recorded[-1][0] / 2) == {}
@@ -0,0 +1,90 @@
+"""
+test_result_cache.py
+--------------------
+Unit tests for the in-memory LRU result cache.
+"""
+
+from prometheus_client import REGISTRY
+from app.services.result_cache import ResultCache, estimate_size
+
+
+def _results(count: int, value: float = 0.0):
+    """Build a small single-agent history."""
+    return [(float(i), i + 1.0, {'A': {'x': value + i}}) for i in range(count)]
+
+
+class TestResultCache:
+    """
+    TestResultCache
+    ---------------
+    Unit tests for LRU eviction, size bounds, replacement and metrics.
+    """
+
+    def test_evicts_least_recently_used_entries(self):
+        """
+        test_evicts_least_recently_used_entries
+        ---------------------------------------
+        Beyond `max_entries`, the least recently used entry is evicted.
+
+        Raises
+        ------
+        AssertionError
+            If the wrong entry is evicted or the eviction is not counted.
+        """
+        evictions = REGISTRY.get_sample_value('simulation_result_cache_evictions_total')
+        cache = ResultCache(max_bytes=10**9, max_entries=2)
+        cache.put('a', _results(1))
+        cache.put('b', _results(1))
+        assert cache.get('a') is not None
+        cache.put('c', _results(1))
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+        assert REGISTRY.get_sample_value('simulation_result_cache_evictions_total') == evictions + 1
+
+    def test_bounded_by_bytes(self):
+        """
+        test_bounded_by_bytes
+        ---------------------
+        The estimated size never exceeds `max_bytes`, and results larger than
+        the whole cache are not cached.
+
+        Raises
+        ------
+        AssertionError
+            If the size bound is violated or the size bookkeeping is wrong.
+        """
+        size = estimate_size(_results(100))
+        cache = ResultCache(max_bytes=int(size * 2.5), max_entries=10)
+        for key in 'abc':
+            cache.put(key, _results(100))
+        assert len(cache) == 2 and cache.size == 2 * size
+        assert cache.get('a') is None
+
+        cache.put('big', _results(1000))
+        assert cache.get('big') is None and len(cache) == 2
+
+    def test_put_replaces_and_invalidate_removes(self):
+        """
+        test_put_replaces_and_invalidate_removes
+        ----------------------------------------
+        Rewriting a hash replaces its cached results; invalidation and
+        clearing drop them and release their size.
+
+        Raises
+        ------
+        AssertionError
+            If stale results are returned or the size is not released.
+        """
+        misses = REGISTRY.get_sample_value('simulation_result_cache_misses_total')
+        cache = ResultCache(max_bytes=10**9, max_entries=10)
+        cache.put('a', _results(3))
+        cache.put('a', _results(3, value=5.0))
+        assert cache.get('a') == _results(3, value=5.0)
+        assert len(cache) == 1
+
+        cache.invalidate('a')
+        assert cache.get('a') is None and cache.size == 0
+        cache.put('b', _results(3))
+        cache.clear()
+        assert len(cache) == 0 and cache.size == 0
+        assert REGISTRY.get_sample_value('simulation_result_cache_misses_total') == misses + 1
@@ -0,0 +1,131 @@
+"""
+test_result_encoding.py
+-----------------------
+Unit tests for the serialization of simulation results for responses.
+"""
+
+import doctest
+import gzip
+import json
+import pytest
+from app.config import simulation_config
+from app.processors.nbody_processor import NBodyProcessor
+from app.utilities.structures import result_encoding
+from app.utilities.structures.compact_state import json_default
+from app.utilities.structures.result_encoding import (
+    encode_json, encode_msgpack, encode_response, negotiate_encoding, negotiate_format, quantize
+)
+
+
+class TestResultEncoding:
+    """
+    TestResultEncoding
+    ------------------
+    Unit tests for result encoding, rounding and negotiation.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the result_encoding docstrings.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(result_encoding)
+        assert result.failed == 0
+
+    def test_encodings_match_the_standard_json(self):
+        """
+        test_encodings_match_the_standard_json
+        --------------------------------------
+        Verify that the JSON encoder and compressed responses decode to the
+        same results as the standard library encoder, and that rounding
+        matches rounding every float on its own.
+
+        Raises
+        ------
+        AssertionError
+            If an encoding or the rounding differs.
+        """
+        records = NBodyProcessor().run(simulation_config.default_data, iterations=20)
+        expected = json.loads(json.dumps(records, default=json_default))
+        assert json.loads(encode_json(records)) == expected
+
+        body, media_type, encoding = encode_response(records, '*/*', 'gzip;q=0.5, br')
+        assert (media_type, encoding) == ('application/json', 'gzip')
+        assert json.loads(gzip.decompress(body)) == expected
+
+        def rounded(value):
+            if isinstance(value, float):
+                return float(f'{value:.5g}')
+            if isinstance(value, dict):
+                return {key: rounded(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [rounded(item) for item in value]
+            return value
+
+        assert json.loads(encode_json(quantize(records, 5))) == rounded(expected)
+        assert len(encode_json(quantize(records, 5))) < len(encode_json(records))
+
+    def test_negotiation(self):
+        """
+        test_negotiation
+        ----------------
+        Verify that formats and content encodings are picked by quality, and
+        that unavailable or refused ones are never picked.
+
+        Raises
+        ------
+        AssertionError
+            If a format or encoding is picked against the headers.
+        """
+        assert negotiate_encoding('gzip;q=0') is None
+        assert negotiate_encoding('*') == result_encoding.ENCODINGS[0]
+        assert negotiate_format('application/json;q=0.5, */*;q=0.1') == 'json'
+        expected = 'msgpack' if result_encoding.msgpack is not None else 'json'
+        assert negotiate_format('application/msgpack, application/json;q=0.9') == expected
+        assert encode_response([1.0], 'application/x-msgpack', None)[1] == result_encoding.MEDIA_TYPES[expected]
+
+    def test_msgpack_matches_json(self):
+        """
+        test_msgpack_matches_json
+        -------------------------
+        Verify that MessagePack results decode to the JSON results, and to
+        float32 values when rounded to at most 6 digits.
+
+        Raises
+        ------
+        AssertionError
+            If the decoded results differ.
+        """
+        msgpack = pytest.importorskip('msgpack')
+        records = NBodyProcessor().run(simulation_config.default_data, iterations=20)
+        assert msgpack.unpackb(encode_msgpack(records)) == json.loads(encode_json(records))
+        body, media_type, _ = encode_response(records, 'application/msgpack', None, precision=6)
+        assert media_type == 'application/msgpack'
+        assert len(body) < len(encode_msgpack(records))
+
+    def test_missing_optional_packages_are_reported(self, monkeypatch):
+        """
+        test_missing_optional_packages_are_reported
+        -------------------------------------------
+        Verify that a missing optional package imports as None, and that
+        encoding with one raises instead of failing on the missing module.
+
+        Raises
+        ------
+        AssertionError
+            If the import or the encoders do not report the missing package.
+        """
+        assert result_encoding._optional_import('no_such_optional_package') is None
+        monkeypatch.setattr(result_encoding, 'msgpack', None)
+        monkeypatch.setattr(result_encoding, 'zstandard', None)
+        with pytest.raises(RuntimeError):
+            encode_msgpack([1.0])
+        with pytest.raises(RuntimeError):
+            result_encoding.compress(b'{}', 'zstd')
+        assert gzip.decompress(result_encoding.compress(b'{}', 'gzip')) == b'{}'
@@ -0,0 +1,83 @@
+"""
+test_run_profile.py
+-------------------
+Unit tests for profiled simulation runs.
+"""
+
+import doctest
+import json
+from app.config import simulation_config
+from app.processors import run_profile
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.run_profile import RunProfile
+from app.processors.simulation_processor import SimulationProcessor
+from app.utilities.structures.compact_state import json_default
+
+
+class TestRunProfile:
+    """
+    TestRunProfile
+    --------------
+    Unit tests for RunProfile and the profiling mode of the processors.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the RunProfile docstring.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(run_profile)
+        assert result.failed == 0
+
+    def test_profiled_run_counts_every_call(self):
+        """
+        test_profiled_run_counts_every_call
+        -----------------------------------
+        A profiled run must produce the same records as an unprofiled one
+        and count one call per agent, state manager and iteration.
+
+        Raises
+        ------
+        AssertionError
+            If the results differ or a call count is wrong.
+        """
+        iterations = 20
+        profile = RunProfile()
+        results = SimulationProcessor().run(simulation_config.default_data, iterations, profile)
+        expected = SimulationProcessor().run(simulation_config.default_data, iterations)
+        assert json.dumps(results, default=json_default) == json.dumps(expected, default=json_default)
+
+        report = profile.as_dict()
+        assert set(report) == {'phases', 'agents', 'state_managers', 'query_resolution'}
+        assert report['phases']['step']['calls'] == 2 * iterations
+        assert report['phases']['prune']['calls'] == iterations
+        assert report['agents']['Body2']['calls'] == iterations
+        for agent, sms in simulation_config.agents.items():
+            for sm in sms:
+                stats = report['state_managers'][agent][sm['function'].__name__]
+                assert stats['calls'] == iterations
+                assert stats['mean_s'] == stats['total_s'] / iterations
+
+    def test_profiled_vectorized_run(self):
+        """
+        test_profiled_vectorized_run
+        ----------------------------
+        The vectorized engine reports its phases, with one acceleration
+        evaluation per iteration.
+
+        Raises
+        ------
+        AssertionError
+            If a phase is missing or miscounted.
+        """
+        profile = RunProfile()
+        NBodyProcessor().run(simulation_config.default_data, iterations=10, profile=profile)
+        phases = profile.as_dict()['phases']
+        assert set(phases) == {'setup', 'accelerations', 'timestep', 'records'}
+        assert phases['accelerations']['calls'] == 10
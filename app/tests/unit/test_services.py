@@ -4,8 +4,25 @@ test_services.py
 Unit tests for simulation services.
 """
 
-from app.services.simulation_service import SimulationService
+import copy
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.tests.abstract.base_test import BaseTestCase
+from app.config import simulation_config
+from app.config.settings import Settings
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.simulation_processor import SimulationProcessor
+from app.services import cache_key
+from app.services.cache_key import config_fingerprint
+from app.services.simulation_service import (
+    SimulationNotFoundError, SimulationService, simulation_coalesced_requests_total, simulation_prefix_reuse_total
+)
 from app.utilities.messages.error_messages import ErrorMessages
+from app.utilities.structures.compact_state import json_default
 
 
 class TestSimulationService:
@@ -30,3 +47,241 @@ class TestSimulationService:
         service = SimulationService()
         result = service._fetch('non_existent_hash')
         assert result == [], ErrorMessages.LATEST_FAILED
+
+
+class TestSimulationServiceRuns(BaseTestCase):
+    """
+    TestSimulationServiceRuns
+    -------------------------
+    Unit tests for SimulationService runs that persist to the database.
+    """
+
+    def test_invalid_options_are_rejected(self):
+        """
+        test_invalid_options_are_rejected
+        ---------------------------------
+        Verify that unknown engines, timestep controls and integrators, and
+        solver settings on the agent engine, out of range iterations and
+        invalid recording policies are rejected before anything runs.
+
+        Raises
+        ------
+        AssertionError
+            If invalid options are accepted.
+        """
+        service = SimulationService()
+        with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+            service.run(simulation_config.default_data, {'engine': 'quantum'})
+        with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+            service.run(simulation_config.default_data, {'solver': 'barnes_hut'})
+        with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+            service.run(simulation_config.default_data, {'timestep': 'variable'})
+        with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+            service.run(simulation_config.default_data, {'integrator': 'rk8'})
+        for iterations in (0, True, 2.5, Settings.MAX_ITERATIONS + 1):
+            with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+                service.run(simulation_config.default_data, {'iterations': iterations})
+        for record, every in (('sometimes', 1), ('final', 5), ('stride', 2.5), ('stride', True), ('cadence', 0)):
+            with pytest.raises(ValueError, match=ErrorMessages.INVALID_OPTIONS):
+                service.run(simulation_config.default_data, {'record': record, 'record_every': every})
+
+    def test_ensemble_members_are_cached_individually(self):
+        """
+        test_ensemble_members_are_cached_individually
+        ---------------------------------------------
+        Verify that every ensemble member is stored under its own hash, so a
+        later single vectorized run of a member is a cache hit.
+
+        Raises
+        ------
+        AssertionError
+            If a member is not cached under its own parameters hash.
+        """
+        service = SimulationService()
+        sweep = []
+        for vy in (0.121, 0.131):
+            params = copy.deepcopy(simulation_config.default_data)
+            params['Body2']['velocity'] = {'x': 0.0, 'y': vy, 'z': 0.0}
+            sweep.append(params)
+        members = service.run_ensemble(sweep)
+
+        # A fresh service reads the members from the database, not from memory
+        fresh = SimulationService()
+        options = service._merge_options({'engine': 'vectorized'})
+        for params, member in zip(sweep, members):
+            assert (
+                json.dumps(fresh._fetch(service._compute_hash(params, options)), default=json_default)
+                == json.dumps(member, default=json_default)
+            )
+
+    def test_results_are_served_from_memory(self):
+        """
+        test_results_are_served_from_memory
+        -----------------------------------
+        Verify that results read from the database are kept in the result
+        cache, so repeated reads return them without decoding again.
+
+        Raises
+        ------
+        AssertionError
+            If repeated reads are not served by the result cache.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.04 + uuid.uuid4().int % 10**6 * 1e-9
+        results = SimulationService().run(params)
+
+        service = SimulationService()
+        service.writer.flush()
+        params_hash = service._compute_hash(params)
+        first = service._fetch(params_hash)
+        assert json.dumps(first, default=json_default) == json.dumps(results, default=json_default)
+        assert service._fetch(params_hash) is first
+        assert len(service.cache) == 1
+
+    def test_longer_runs_resume_from_shorter_runs(self):
+        """
+        test_longer_runs_resume_from_shorter_runs
+        -----------------------------------------
+        Verify that a run with more iterations than a cached run resumes from
+        its final state, and matches a run computed from the start.
+
+        Raises
+        ------
+        AssertionError
+            If the resumed run differs from a full run or no prefix is reused.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.04 + uuid.uuid4().int % 10**6 * 1e-9
+        full = {
+            'agents': SimulationProcessor().run(params, 60),
+            'vectorized': NBodyProcessor().run(params, iterations=60),
+        }
+        for engine, expected in full.items():
+            service = SimulationService()
+            service.run(params, {'engine': engine, 'iterations': 25})
+            reused = simulation_prefix_reuse_total._value.get()
+            results = SimulationService().run(params, {'engine': engine, 'iterations': 60})
+            assert simulation_prefix_reuse_total._value.get() == reused + 1
+            assert json.dumps(results, default=json_default) == json.dumps(expected, default=json_default)
+
+    def test_missing_prefix_raises_not_found(self, monkeypatch):
+        """
+        test_missing_prefix_raises_not_found
+        ------------------------------------
+        Verify that a run whose shorter stored run is found but can no
+        longer be read raises the not-found error instead of resuming.
+
+        Raises
+        ------
+        AssertionError
+            If the run does not raise SimulationNotFoundError.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.04 + uuid.uuid4().int % 10**6 * 1e-9
+        SimulationService().run(params, {'engine': 'vectorized', 'iterations': 25})
+        service = SimulationService()
+        monkeypatch.setattr(service, '_fetch', lambda params_hash: [])
+        with pytest.raises(SimulationNotFoundError):
+            service.run(params, {'engine': 'vectorized', 'iterations': 60})
+
+    def test_recorded_runs_are_cached_under_their_policy(self):
+        """
+        test_recorded_runs_are_cached_under_their_policy
+        ------------------------------------------------
+        Verify that a thinned-out run is stored and served under its own
+        hash, and is never used as the prefix of a longer run.
+
+        Raises
+        ------
+        AssertionError
+            If the recorded run is not cached separately or is resumed.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.04 + uuid.uuid4().int % 10**6 * 1e-9
+        service = SimulationService()
+        options = {'engine': 'vectorized', 'iterations': 50, 'record': 'stride', 'record_every': 10}
+        recorded = service.run(params, options)
+        assert len(recorded) == 1 + 2 * 5
+        assert service.run(params, {**options, 'record_every': 10.0}) is recorded
+        assert len(service.run(params, {'engine': 'vectorized', 'iterations': 50})) == 1 + 2 * 50
+
+        longer = {**options, 'iterations': 80}
+        assert service.find_prefix(params, service._merge_options(longer)) is None
+        assert (
+            json.dumps(service.run(params, longer)[:len(recorded)], default=json_default)
+            == json.dumps(recorded, default=json_default)
+        )
+
+    def test_identical_concurrent_runs_are_computed_once(self):
+        """
+        test_identical_concurrent_runs_are_computed_once
+        ------------------------------------------------
+        Verify that identical runs requested while the first one computes
+        wait for its results instead of computing their own, and are
+        counted as coalesced.
+
+        Raises
+        ------
+        AssertionError
+            If the run is computed more than once or its results differ.
+        """
+        params = copy.deepcopy(simulation_config.default_data)
+        params['Body2']['mass'] = 0.04 + uuid.uuid4().int % 10**6 * 1e-9
+        service = SimulationService()
+        execute = service._execute
+        release = threading.Event()
+        executions = []
+
+        def blocking_execute(*args, **kwargs):
+            executions.append(args)
+            release.wait()
+            return execute(*args, **kwargs)
+
+        service._execute = blocking_execute
+        coalesced = simulation_coalesced_requests_total._value.get()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(service.run, params, {'iterations': 20}) for _ in range(4)]
+            # Lets every request reach the computation in flight
+            time.sleep(0.2)
+            release.set()
+        results = [future.result() for future in futures]
+        assert len(executions) == 1
+        assert all(result is results[0] for result in results)
+        assert simulation_coalesced_requests_total._value.get() == coalesced + 3
+
+    def test_equivalent_requests_share_a_key(self, monkeypatch):
+        """
+        test_equivalent_requests_share_a_key
+        ------------------------------------
+        Verify that requests spelling out defaults, writing integers for
+        floats or omitting unchanged bodies hash alike, and that the
+        iterations, the agent configuration, the physics settings and the
+        results version are part of the hash.
+
+        Raises
+        ------
+        AssertionError
+            If equivalent requests hash differently, or different runs alike.
+        """
+        service = SimulationService()
+        params = {'Body2': {'mass': 0.5}}
+        spelled_out = copy.deepcopy(simulation_config.default_data)
+        spelled_out['Body2']['mass'] = 0.5
+        spelled_out['Body1']['mass'] = 1
+        spelled_out['Body1']['position']['y'] = 0
+        params_hash = service._compute_hash(params)
+        assert service._compute_hash(spelled_out) == params_hash
+        assert service._compute_hash(params, {'iterations': 500, 'theta': 0.5}) == params_hash
+
+        assert service._compute_hash(params, {'iterations': 501}) != params_hash
+        assert service._compute_hash(params, {'integrator': 'rk4'}) != params_hash
+        config_fingerprint.cache_clear()
+        monkeypatch.setattr(Settings, 'TIMESTEP_MIN', Settings.TIMESTEP_MIN * 2)
+        assert service._compute_hash(params) != params_hash
+        monkeypatch.undo()
+        config_fingerprint.cache_clear()
+        monkeypatch.setattr(cache_key, 'RESULTS_VERSION', cache_key.RESULTS_VERSION + 1)
+        assert service._compute_hash(params) != params_hash
+        monkeypatch.undo()
+        config_fingerprint.cache_clear()
+        assert service._compute_hash(params) == params_hash
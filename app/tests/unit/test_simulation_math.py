@@ -0,0 +1,244 @@
+"""
+test_simulation_math.py
+-----------------------
+Unit tests for the adaptive timestep managers and the integrators.
+"""
+
+import copy
+import numpy as np
+import pytest
+from app.config.simulation_config import TIMESTEPS, build_agents, default_data
+from app.processors.nbody_processor import NBodyProcessor
+from app.processors.simulation_processor import SimulationProcessor
+from app.utilities.physics.simulation_math import (
+    adaptive_timestep_manager,
+    batch_adaptive_timestep_manager,
+    integrate_rk4,
+    integrate_rk45,
+    integrate_verlet,
+    rk45_controlled_step,
+    rk45_timestep,
+)
+
+
+class TestAdaptiveTimestep:
+    """
+    TestAdaptiveTimestep
+    --------------------
+    Unit tests for step control, its vectorized form and adaptive agent runs.
+    """
+
+    def setup_method(self):
+        """
+        Two bodies at rest relative to each other, ten units apart.
+        """
+        self.origin = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        self.velocity = {'x': 0.0, 'y': 0.5, 'z': 0.0}
+
+    def test_steps_shrink_with_separation_and_are_clamped(self):
+        """
+        test_steps_shrink_with_separation_and_are_clamped
+        -------------------------------------------------
+        Verify that closer bodies get shorter steps, within the step bounds.
+
+        Raises
+        ------
+        AssertionError
+            If the step does not follow the orbital time scales or its bounds.
+        """
+        def step(distance, **bounds):
+            position = {'x': distance, 'y': 0.0, 'z': 0.0}
+            return adaptive_timestep_manager(position, self.velocity, 0.0, self.origin, self.origin, 1.0, **bounds)
+
+        bounds = {'tolerance': 0.1, 'min_step': 0.01, 'max_step': 100.0}
+        # Free-fall time sqrt(r^3 / mu) = 1 is shorter than the crossing time r / |v| = 2
+        assert np.isclose(step(1.0, **bounds), 0.1)
+        assert step(0.5, **bounds) < step(1.0, **bounds) < step(2.0, **bounds)
+        assert step(1e-6, **bounds) == 0.01
+        assert step(1e6, **bounds) == 100.0
+
+    def test_batch_matches_scalar(self):
+        """
+        test_batch_matches_scalar
+        -------------------------
+        Verify that the vectorized controller gives both bodies of a pair
+        the step of the scalar controller.
+
+        Raises
+        ------
+        AssertionError
+            If the steps differ.
+        """
+        positions = np.array([[-0.73, 0.0, 0.0], [60.34, 0.0, 0.0]])
+        velocities = np.array([[0.0, -0.0015, 0.0], [0.0, 0.13, 0.0]])
+        masses = np.array([1.0, 0.123])
+        expected = adaptive_timestep_manager(
+            dict(zip('xyz', positions[1])), dict(zip('xyz', velocities[1])), masses[1],
+            dict(zip('xyz', positions[0])), dict(zip('xyz', velocities[0])), masses[0],
+        )
+        steps = batch_adaptive_timestep_manager(positions[np.newaxis], velocities[np.newaxis], masses[np.newaxis])
+        assert steps.shape == (1, 2)
+        assert np.allclose(steps, expected)
+
+    def test_agent_runs_use_adaptive_steps(self):
+        """
+        test_agent_runs_use_adaptive_steps
+        ----------------------------------
+        Verify that the adaptive agent configuration runs and varies the step.
+        Bodies whose step ran ahead wait for the other, so an iteration may
+        step only one of them.
+
+        Raises
+        ------
+        AssertionError
+            If the steps are fixed or the run is incomplete.
+        """
+        results = SimulationProcessor(build_agents(timestep='adaptive')).run(default_data, iterations=50)
+        steps = {state['Body2']['timeStep'] for _, _, state in results[1:] if 'Body2' in state}
+        assert 50 < len(results) <= 101
+        assert len(steps) > 1 and max(steps) < 100.0
+
+    @pytest.mark.parametrize('integrator', ['euler', 'rk45'])
+    def test_time_advances_by_the_integrated_step(self, integrator):
+        """
+        test_time_advances_by_the_integrated_step
+        -----------------------------------------
+        Verify that in both engines each adaptive state is timed one
+        integrated step, the step of the state before it, after that state.
+        RK45 may integrate a shorter step after rejecting that one.
+
+        Raises
+        ------
+        AssertionError
+            If time advances by the step chosen for the next iteration.
+        """
+        agent_results = SimulationProcessor(build_agents(integrator, 'adaptive')).run(default_data, iterations=20)
+        vector_results = NBodyProcessor().run(default_data, iterations=20, timestep='adaptive', integrator=integrator)
+        for results in (agent_results, vector_results):
+            states = [state['Body2'] for _, _, state in results if 'Body2' in state]
+            assert len(states) > 2
+            for before, after in zip(states, states[1:]):
+                advance = after['time'] - before['time']
+                if integrator == 'rk45':
+                    assert 0.0 < advance <= before['timeStep'] + 1e-9
+                else:
+                    assert advance == pytest.approx(before['timeStep'])
+
+
+class TestIntegrators:
+    """
+    TestIntegrators
+    ---------------
+    Unit tests for the convergence of the integrators and their use in both engines.
+    """
+
+    @staticmethod
+    def orbit_error(integrate, steps):
+        """
+        Distance from the start after one period of a unit circular orbit.
+        """
+        position, velocity = np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0])
+        for _ in range(steps):
+            position, velocity = integrate(
+                2 * np.pi / steps, position, velocity, lambda r, offset: -r / np.linalg.norm(r) ** 3
+            )[:2]
+        return np.linalg.norm(position - [1.0, 0.0, 0.0])
+
+    @pytest.mark.parametrize('integrate, order', [
+        (integrate_verlet, 2), (integrate_rk4, 4), (integrate_rk45, 4),
+    ])
+    def test_integrators_converge_at_their_order(self, integrate, order):
+        """
+        test_integrators_converge_at_their_order
+        ----------------------------------------
+        Verify that halving the step reduces the error by at least about
+        2^order. The global error of the fifth-order RK45 solution is only
+        checked against fourth order.
+
+        Raises
+        ------
+        AssertionError
+            If the observed order of convergence is more than 0.5 below.
+        """
+        observed = np.log2(self.orbit_error(integrate, 64) / self.orbit_error(integrate, 128))
+        assert observed > order - 0.5
+
+    def test_rk45_error_controls_the_step(self):
+        """
+        test_rk45_error_controls_the_step
+        ---------------------------------
+        Verify that steps beyond the tolerance shrink and steps within it grow.
+
+        Raises
+        ------
+        AssertionError
+            If the next step does not follow the error estimate.
+        """
+        position, velocity = np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0])
+        acceleration = lambda r, offset: -r / np.linalg.norm(r) ** 3
+        _, _, large = integrate_rk45(0.5, position, velocity, acceleration, tolerance=1e-10)
+        _, _, small = integrate_rk45(0.01, position, velocity, acceleration, tolerance=1e-10)
+        assert large > 1 > small
+        assert rk45_timestep(0.5, large, 1e-6, 10.0) < 0.5 < rk45_timestep(0.5, small, 1e-6, 10.0)
+
+    def test_rk45_rejects_steps_beyond_the_tolerance(self):
+        """
+        test_rk45_rejects_steps_beyond_the_tolerance
+        --------------------------------------------
+        Verify that a too-large first step is rejected and retried with a
+        shorter one within the tolerance, and kept when retries are disabled.
+
+        Raises
+        ------
+        AssertionError
+            If the step beyond the tolerance is kept or the retry is not within it.
+        """
+        origin = {'x': 0.0, 'y': 0.0, 'z': 0.0}
+        position, velocity = {'x': 1.0, 'y': 0.0, 'z': 0.0}, {'x': 0.0, 'y': 1.0, 'z': 0.0}
+        acceleration = lambda r, offset: -r / np.linalg.norm(r) ** 3
+        _, _, kept, _ = rk45_controlled_step(0.0, 1.0, position, velocity, origin, origin, 1.0, max_retries=0)
+        _, _, retried, _ = rk45_controlled_step(0.0, 1.0, position, velocity, origin, origin, 1.0)
+        _, _, error = integrate_rk45(retried, np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]), acceleration)
+        assert kept == 1.0
+        assert retried < 1.0 and error <= 1
+
+    def test_engines_reject_a_too_large_first_step(self):
+        """
+        test_engines_reject_a_too_large_first_step
+        ------------------------------------------
+        Verify that both engines retry an adaptive RK45 first step beyond
+        the tolerance, so the second state is timed before the full step.
+
+        Raises
+        ------
+        AssertionError
+            If an engine keeps the first step.
+        """
+        params = copy.deepcopy(default_data)
+        for body in params.values():
+            body['timeStep'] = 1000.0
+        agent_results = SimulationProcessor(build_agents('rk45', 'adaptive')).run(params, iterations=5)
+        vector_results = NBodyProcessor().run(params, iterations=5, timestep='adaptive', integrator='rk45')
+        for results in (agent_results, vector_results):
+            states = [state['Body2'] for _, _, state in results if 'Body2' in state]
+            assert 0.0 < states[1]['time'] < 1000.0
+
+    @pytest.mark.parametrize('integrator', ['verlet', 'rk4', 'rk45'])
+    def test_engines_run_each_integrator(self, integrator):
+        """
+        test_engines_run_each_integrator
+        --------------------------------
+        Verify that both engines run every integrator with fixed and adaptive
+        steps, keeping the record layout of the default integrator.
+
+        Raises
+        ------
+        AssertionError
+            If a run fails or produces different fields.
+        """
+        expected = {'position', 'velocity', 'mass', 'time', 'timeStep'}
+        for timestep in TIMESTEPS:
+            agent_results = SimulationProcessor(build_agents(integrator, timestep)).run(default_data, iterations=20)
+            vector_results = NBodyProcessor().run(default_data, iterations=20, timestep=timestep, integrator=integrator)
+            for results in (agent_results, vector_results):
+                assert all(set(state[body]) == expected for _, _, state in results[1:] for body in state)
@@ -0,0 +1,77 @@
+"""
+test_single_flight.py
+---------------------
+Unit tests for the deduplication of concurrent identical calls.
+"""
+
+import doctest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services import single_flight
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """
+    TestSingleFlight
+    ----------------
+    Unit tests for SingleFlight.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the single_flight docstrings.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(single_flight)
+        assert result.failed == 0
+
+    def test_concurrent_callers_share_one_call(self):
+        """
+        test_concurrent_callers_share_one_call
+        --------------------------------------
+        Verify that callers arriving while a call of their key is in flight
+        get its result, that the failure of a call is raised in every
+        waiting caller, and that finished keys are called again.
+
+        Raises
+        ------
+        AssertionError
+            If a key is called more than once while in flight, or a result
+            or failure is not shared.
+        """
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def call(outcome):
+            calls.append(outcome)
+            release.wait()
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        for outcome in ('result', ValueError('failed')):
+            release.clear()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(group.do, 'key', lambda: call(outcome)) for _ in range(4)]
+                # Lets every caller reach the group before the call finishes
+                time.sleep(0.2)
+                release.set()
+            if isinstance(outcome, Exception):
+                for future in futures:
+                    with pytest.raises(ValueError):
+                        future.result()
+            else:
+                assert sorted(future.result() for future in futures) == [
+                    ('result', False), ('result', True), ('result', True), ('result', True)
+                ]
+        assert len(calls) == 2 and len(group) == 0
@@ -0,0 +1,55 @@
+"""
+test_universe_snapshot.py
+-------------------------
+Unit tests for the incremental UniverseSnapshot.
+"""
+
+import doctest
+from app.utilities.structures import universe_snapshot
+from app.utilities.structures.universe_snapshot import UniverseSnapshot
+
+
+class TestUniverseSnapshot:
+    """
+    TestUniverseSnapshot
+    --------------------
+    Unit tests for UniverseSnapshot reads, validity intervals and pruning.
+    """
+
+    def test_doctests(self):
+        """
+        test_doctests
+        -------------
+        Run the examples embedded in the UniverseSnapshot docstring.
+
+        Raises
+        ------
+        AssertionError
+            If any doctest example fails.
+        """
+        result = doctest.testmod(universe_snapshot)
+        assert result.failed == 0
+
+    def test_latest_commit_wins_and_prune_keeps_latest(self):
+        """
+        test_latest_commit_wins_and_prune_keeps_latest
+        ----------------------------------------------
+        Verify that overlapping commits resolve to the most recent state and
+        that pruning never drops an agent's latest state.
+
+        Raises
+        ------
+        AssertionError
+            If the assembled universe or validity interval is wrong.
+        """
+        snapshot = UniverseSnapshot[int]()
+        snapshot.commit(0, 10, {'A': 1})
+        snapshot.commit(5, 10, {'A': 2})
+        assert snapshot.at(7) == {'A': 2}
+        assert snapshot.at(3) == {'A': 1}
+
+        snapshot.prune(100)
+        assert snapshot.at(7) == {'A': 2}
+        assert snapshot.at(3) == {}
+        assert snapshot.validity('A') == (5, 10)
+        assert snapshot.validity('B') is None
@@ -0,0 +1,119 @@
+"""
+test_write_behind.py
+--------------------
+Unit tests for the write-behind database queue and the database settings.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import sessionmaker
+from app.clients.database import Base, engine
+from app.clients.write_behind import WriteBehindQueue, db_write_failures_total
+from app.models.simulation_model import Simulation
+
+
+class TestWriteBehindQueue:
+    """
+    TestWriteBehindQueue
+    --------------------
+    Unit tests for batched, non-blocking inserts.
+    """
+
+    def _queue(self, tmp_path, **kwargs):
+        """
+        Create a queue on a fresh database, and a list of its commits.
+        """
+        bind = create_engine(f'sqlite:///{tmp_path / "writes.db"}')
+        Base.metadata.create_all(bind=bind)
+        commits = []
+        event.listen(bind, 'commit', lambda connection: commits.append(connection))
+        return WriteBehindQueue(sessionmaker(bind=bind), **kwargs), bind, commits
+
+    def test_rows_are_readable_until_written_in_one_batch(self, tmp_path):
+        """
+        test_rows_are_readable_until_written_in_one_batch
+        -------------------------------------------------
+        Verify that queued rows are served by the queue without touching the
+        database, and then inserted together in a single transaction.
+
+        Raises
+        ------
+        AssertionError
+            If queued rows are not readable or are not written in one batch.
+        """
+        writer, bind, commits = self._queue(tmp_path, batch_size=32, max_delay=0.5)
+        for index in range(10):
+            writer.put(f'h{index}', Simulation(params_json='{}', params_hash=f'h{index}'), [index])
+        assert writer.get('h3') == [3]
+        assert [value for _, value in writer.pending()] == [[index] for index in range(10)]
+
+        writer.flush()
+        with bind.connect() as connection:
+            assert connection.execute(select(func.count()).select_from(Simulation)).scalar() == 10
+        assert len(commits) == 1
+        assert writer.get('h3') is None and writer.pending() == []
+        writer.close()
+
+    def test_failed_batch_is_retried_row_by_row(self, tmp_path):
+        """
+        test_failed_batch_is_retried_row_by_row
+        ---------------------------------------
+        Verify that a row that cannot be inserted only drops itself, not the
+        other rows of its batch.
+
+        Raises
+        ------
+        AssertionError
+            If valid rows of the failed batch are not written.
+        """
+        writer, bind, _ = self._queue(tmp_path, batch_size=32, max_delay=0.5)
+        writer.put('a', Simulation(params_json='{}', params_hash='a'))
+        writer.put('bad', Simulation(params_json=None, params_hash='bad'))
+        writer.put('b', Simulation(params_json='{}', params_hash='b'))
+        writer.close()
+        with bind.connect() as connection:
+            hashes = connection.execute(select(Simulation.params_hash).order_by(Simulation.id)).scalars().all()
+        assert hashes == ['a', 'b']
+
+    def test_stored_hashes_are_skipped(self, tmp_path):
+        """
+        test_stored_hashes_are_skipped
+        ------------------------------
+        Verify that rows whose parameters hash is already stored, in the
+        database or earlier in the same batch, are skipped without failing
+        their batch.
+
+        Raises
+        ------
+        AssertionError
+            If a hash is stored twice, or a row or batch fails.
+        """
+        writer, bind, commits = self._queue(tmp_path, batch_size=32, max_delay=0.5)
+        writer.put('a', Simulation(params_json='1', params_hash='a'))
+        writer.flush()
+        failures = db_write_failures_total._value.get()
+        for params_json, params_hash in (('2', 'a'), ('3', 'b'), ('4', 'b')):
+            writer.put(f'{params_hash}{params_json}', Simulation(params_json=params_json, params_hash=params_hash))
+        writer.close()
+        with bind.connect() as connection:
+            rows = connection.execute(select(Simulation.params_hash, Simulation.params_json).order_by(Simulation.id)).all()
+        assert [tuple(row) for row in rows] == [('a', '1'), ('b', '3')]
+        assert len(commits) == 2
+        assert db_write_failures_total._value.get() == failures
+
+    def test_sqlite_database_uses_wal(self):
+        """
+        test_sqlite_database_uses_wal
+        -----------------------------
+        Verify that connections of a file-based SQLite database use
+        write-ahead logging.
+
+        Raises
+        ------
+        AssertionError
+            If the journal mode is not WAL.
+        """
+        if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+            pytest.skip('The application database is not a SQLite file')
+        with engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
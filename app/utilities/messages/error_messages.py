@@ -7,9 +7,16 @@ Centralized error message definitions for the Sedaro Nano backend.
 class ErrorMessages:
     # Simulation errors
     INVALID_PARAMS = 'ERROR: Invalid simulation parameters!'
+    INVALID_OPTIONS = 'ERROR: Invalid simulation options!'
+    INVALID_ENSEMBLE = 'ERROR: Ensemble members must be non-empty and simulate the same bodies!'
     RUN_FAILED = 'ERROR: Simulation run failed!'
     FETCH_FAILED = 'ERROR: Simulation fetch failed!'
     LATEST_FAILED = 'ERROR: Could not retrieve latest simulation results!'
+    JOB_NOT_FOUND = 'ERROR: Simulation job not found!'
+    JOB_FAILED = 'ERROR: Simulation job failed!'
+    INVALID_STREAM_FORMAT = 'ERROR: Unsupported stream format! Use ndjson or sse.'
+    INVALID_QUERY = 'ERROR: Invalid simulation query!'
+    SIMULATION_NOT_FOUND = 'ERROR: Simulation not found!'
 
     # Database errors
     DB_CONNECTION = 'ERROR: Could not connect to database!'
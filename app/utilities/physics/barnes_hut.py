@@ -0,0 +1,157 @@
+"""
+barnes_hut.py
+-------------
+Barnes–Hut octree approximation of N-body gravitational accelerations.
+
+Bodies are grouped into an octree whose nodes carry their total mass and
+center of mass. A node that is far away relative to its size, with
+size / distance below the opening angle `theta`, acts on a body as a single
+point mass. Otherwise the node is opened and its children are visited. Leaves
+hold a handful of bodies that interact directly. This costs O(N log N) per
+evaluation instead of the O(N^2) of a direct sum. `theta = 0` opens every
+node and reproduces the direct sum.
+
+The traversal walks the tree once for all bodies: every visited node
+processes the whole group of bodies that reached it in vectorized form.
+"""
+
+from typing import List, Tuple
+import numpy as np
+
+# Maximum number of bodies in a leaf before it is split
+LEAF_SIZE: int = 8
+# Depth limit so coincident bodies cannot split forever
+MAX_DEPTH: int = 32
+
+
+class Octree:
+    """
+    Octree
+    ------
+    Flat-array octree over body positions.
+
+    Attributes
+    ----------
+    size : np.ndarray
+        Edge length of each node's cube.
+    mass : np.ndarray
+        Total mass contained in each node.
+    com : np.ndarray
+        Center of mass of each node, shape (nodes, 3).
+    children : list of list of int
+        Child node ids of each internal node (empty for leaves).
+    bodies : list of np.ndarray
+        Body indices held by each leaf (empty for internal nodes).
+    """
+
+    def __init__(self, positions: np.ndarray, masses: np.ndarray, leaf_size: int = LEAF_SIZE) -> None:
+        """
+        Build the octree for the given bodies.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            Body positions, shape (N, 3).
+        masses : np.ndarray
+            Body masses, shape (N,).
+        leaf_size : int, optional
+            Maximum number of bodies per leaf.
+        """
+        self.positions = positions
+        self.masses = masses
+        self.leaf_size = leaf_size
+        self._size: List[float] = []
+        self._mass: List[float] = []
+        self._com: List[np.ndarray] = []
+        self.children: List[List[int]] = []
+        self.bodies: List[np.ndarray] = []
+
+        low, high = positions.min(axis=0), positions.max(axis=0)
+        half = max(float((high - low).max()) / 2, 1e-12)
+        self._build(np.arange(len(positions)), (low + high) / 2, half, 0)
+
+        self.size = np.array(self._size)
+        self.mass = np.array(self._mass)
+        self.com = np.array(self._com)
+
+    def _build(self, idx: np.ndarray, center: np.ndarray, half: float, depth: int) -> int:
+        """
+        Recursively build the subtree for the bodies in `idx`.
+
+        Returns
+        -------
+        int
+            The id of the created node.
+        """
+        node = len(self._size)
+        mass = self.masses[idx]
+        total = float(mass.sum())
+        points = self.positions[idx]
+        com = (mass @ points) / total if total > 0 else points.mean(axis=0)
+        self._size.append(2 * half)
+        self._mass.append(total)
+        self._com.append(com)
+        self.children.append([])
+        self.bodies.append(idx if len(idx) <= self.leaf_size or depth >= MAX_DEPTH else idx[:0])
+        if len(self.bodies[node]):
+            return node
+
+        # Octant code per body: one bit per axis, set when above the center
+        above = points > center
+        codes = above[:, 0] * 4 + above[:, 1] * 2 + above[:, 2]
+        for code in np.unique(codes):
+            signs = np.array([(code >> 2) & 1, (code >> 1) & 1, code & 1]) * 2 - 1
+            child = self._build(idx[codes == code], center + signs * half / 2, half / 2, depth + 1)
+            self.children[node].append(child)
+        return node
+
+
+def accelerations_barnes_hut(
+    positions: np.ndarray, masses: np.ndarray, theta: float = 0.5, leaf_size: int = LEAF_SIZE
+) -> np.ndarray:
+    """
+    Approximate the gravitational acceleration of every body with Barnes–Hut.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Body positions, shape (N, 3).
+    masses : np.ndarray
+        Body masses, shape (N,).
+    theta : float, optional
+        Opening angle; smaller values are more accurate and slower.
+    leaf_size : int, optional
+        Maximum number of bodies per leaf.
+
+    Returns
+    -------
+    np.ndarray
+        Accelerations, shape (N, 3).
+    """
+    tree = Octree(positions, masses, leaf_size)
+    accelerations = np.zeros_like(positions, dtype=float)
+    stack: List[Tuple[int, np.ndarray]] = [(0, np.arange(len(positions)))]
+    while stack:
+        node, idx = stack.pop()
+        targets = positions[idx]
+        leaf = tree.bodies[node]
+        if len(leaf):
+            # Direct sum against the leaf's bodies, skipping self-interaction
+            r = positions[leaf][np.newaxis, :, :] - targets[:, np.newaxis, :]
+            dist_sq = np.einsum('ijk,ijk->ij', r, r)
+            with np.errstate(divide='ignore'):
+                inv_dist_cubed = dist_sq ** -1.5
+            inv_dist_cubed[~np.isfinite(inv_dist_cubed)] = 0.0
+            accelerations[idx] += np.einsum('ij,ijk->ik', masses[leaf] * inv_dist_cubed, r)
+            continue
+
+        r = tree.com[node] - targets
+        dist = np.sqrt(np.einsum('ik,ik->i', r, r))
+        accept = tree.size[node] < theta * dist
+        if accept.any():
+            far = accept.nonzero()[0]
+            accelerations[idx[far]] += tree.mass[node] * r[far] / dist[far, np.newaxis] ** 3
+        near = idx[~accept]
+        if len(near):
+            stack.extend((child, near) for child in tree.children[node])
+    return accelerations
@@ -8,8 +8,30 @@ They implement physics propagation such as position, velocity,
 and time updates under simple Newtonian dynamics.
 """
 
-from typing import Dict
+import math
+from typing import Callable, Dict, List, Tuple, Union
 import numpy as np
+from app.config.settings import Settings
+
+# Step length returned by the fixed timestep managers
+FIXED_TIME_STEP: float = 100.0
+
+# Acceleration of the integrated bodies: (positions, offset into the step) -> accelerations
+Acceleration = Callable[[np.ndarray, Union[float, np.ndarray]], np.ndarray]
+
+# Dormand-Prince 5(4) tableau: stage offsets, stage weights, 5th- and 4th-order weights
+DOPRI_C: Tuple[float, ...] = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+DOPRI_A: Tuple[Tuple[float, ...], ...] = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+DOPRI_B5: Tuple[float, ...] = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0.0)
+DOPRI_B4: Tuple[float, ...] = (5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
 
 
 def propagate_velocity(
@@ -51,6 +73,35 @@ def propagate_velocity(
     return {'x': float(v_self[0]), 'y': float(v_self[1]), 'z': float(v_self[2])}
 
 
+def accelerations_direct(positions: np.ndarray, masses: np.ndarray) -> np.ndarray:
+    """
+    Compute the gravitational acceleration of every body from every other body.
+
+    Vectorized all-pairs form of the interaction in `propagate_velocity`,
+    evaluated in a single broadcast over an (N, N, 3) separation tensor.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Body positions, shape (N, 3), or (E, N, 3) for an ensemble.
+    masses : np.ndarray
+        Body masses, shape (N,), or (E, N) for an ensemble.
+
+    Returns
+    -------
+    np.ndarray
+        Accelerations with the same shape as `positions`.
+    """
+    # r[..., i, j] = position_j - position_i
+    r = positions[..., np.newaxis, :, :] - positions[..., :, np.newaxis, :]
+    dist_sq = np.einsum('...k,...k->...', r, r)
+    with np.errstate(divide='ignore'):
+        inv_dist_cubed = dist_sq ** -1.5
+    # A body exerts no force on itself (or on a body at the same position)
+    inv_dist_cubed[~np.isfinite(inv_dist_cubed)] = 0.0
+    return np.einsum('...ij,...ijk->...ik', masses[..., np.newaxis, :] * inv_dist_cubed, r)
+
+
 def propagate_position(time_step: float, position: Dict[str, float], velocity: Dict[str, float]) -> Dict[str, float]:
     """
     Propagate the position of a body using its velocity.
@@ -126,7 +177,437 @@ def timestep_manager(velocity: Dict[str, float]) -> float:
     float
         Length of the next time step.
     """
-    return 100.0
+    return FIXED_TIME_STEP
+
+
+def batch_timestep_manager(velocities: np.ndarray) -> np.ndarray:
+    """
+    Compute the next time step for each of N bodies.
+    Vectorized form of `timestep_manager`.
+
+    Parameters
+    ----------
+    velocities : np.ndarray
+        Current velocities, shape (..., N, 3).
+
+    Returns
+    -------
+    np.ndarray
+        Length of the next time step per body, shape (..., N).
+    """
+    return np.full(velocities.shape[:-1], FIXED_TIME_STEP)
+
+
+def adaptive_timestep_manager(
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    mass: float,
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+    tolerance: float = Settings.TIMESTEP_TOLERANCE,
+    min_step: float = Settings.TIMESTEP_MIN,
+    max_step: float = Settings.TIMESTEP_MAX,
+) -> float:
+    """
+    Compute the next time step for a body from its orbital state.
+
+    The step is `tolerance` times the shorter of two time scales of the
+    pair: the free-fall time sqrt(r / |a|) = sqrt(r^3 / mu), with
+    mu = mass + m_other, and the crossing time r / |v_rel|. Steps shrink
+    near periapsis, where both are short, and grow far from the other body.
+
+    Parameters
+    ----------
+    position : dict
+        Current position {'x', 'y', 'z'} of this body.
+    velocity : dict
+        Current velocity {'x', 'y', 'z'} of this body.
+    mass : float
+        Mass of this body.
+    other_position : dict
+        Position {'x', 'y', 'z'} of the other interacting body.
+    other_velocity : dict
+        Velocity {'x', 'y', 'z'} of the other interacting body.
+    m_other : float
+        Mass of the other body.
+    tolerance : float, optional
+        Fraction of the time scale taken per step; smaller is more accurate.
+    min_step, max_step : float, optional
+        Bounds of the returned step.
+
+    Returns
+    -------
+    float
+        Length of the next time step.
+    """
+    r = np.array([position['x'] - other_position['x'], position['y'] - other_position['y'], position['z'] - other_position['z']])
+    v = np.array([velocity['x'] - other_velocity['x'], velocity['y'] - other_velocity['y'], velocity['z'] - other_velocity['z']])
+    dist = float(np.linalg.norm(r))
+    speed = float(np.linalg.norm(v))
+
+    scale = math.inf
+    if mass + m_other > 0:
+        scale = math.sqrt(dist ** 3 / (mass + m_other))
+    if speed > 0:
+        scale = min(scale, dist / speed)
+    return min(max(tolerance * scale, min_step), max_step)
+
+
+def batch_adaptive_timestep_manager(
+    positions: np.ndarray,
+    velocities: np.ndarray,
+    masses: np.ndarray,
+    tolerance: float = Settings.TIMESTEP_TOLERANCE,
+    min_step: float = Settings.TIMESTEP_MIN,
+    max_step: float = Settings.TIMESTEP_MAX,
+) -> np.ndarray:
+    """
+    Compute the next time step for each of N bodies from their orbital state.
+    Vectorized form of `adaptive_timestep_manager`.
+
+    The time scales of all pairs are evaluated in one broadcast and every
+    body takes the step of the tightest pair, so all bodies stay on a
+    common time grid.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Current positions, shape (..., N, 3).
+    velocities : np.ndarray
+        Current velocities, shape (..., N, 3).
+    masses : np.ndarray
+        Body masses, shape (..., N).
+    tolerance : float, optional
+        Fraction of the time scale taken per step; smaller is more accurate.
+    min_step, max_step : float, optional
+        Bounds of the returned steps.
+
+    Returns
+    -------
+    np.ndarray
+        Length of the next time step per body, shape (..., N).
+    """
+    r = positions[..., np.newaxis, :, :] - positions[..., :, np.newaxis, :]
+    v = velocities[..., np.newaxis, :, :] - velocities[..., :, np.newaxis, :]
+    dist = np.sqrt(np.einsum('...k,...k->...', r, r))
+    speed = np.sqrt(np.einsum('...k,...k->...', v, v))
+    mu = masses[..., np.newaxis, :] + masses[..., :, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # fmin skips the NaN of a vanishing mass or relative speed
+        scales = np.fmin(np.sqrt(dist ** 3 / mu), dist / speed)
+    count = masses.shape[-1]
+    scales[..., np.arange(count), np.arange(count)] = np.inf
+    scales[np.isnan(scales)] = np.inf
+    step = np.clip(tolerance * scales.min(axis=(-2, -1), initial=np.inf), min_step, max_step)
+    return np.repeat(step[..., np.newaxis], count, axis=-1)
+
+
+def integrate_euler(
+    time_step: Union[float, np.ndarray], position: np.ndarray, velocity: np.ndarray, acceleration: Acceleration
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance positions and velocities by one semi-implicit Euler step.
+
+    First order; the scheme of `propagate_velocity` and `propagate_position`.
+
+    Parameters
+    ----------
+    time_step : float or np.ndarray
+        Step length, broadcastable against the positions, e.g. (..., N, 1).
+    position : np.ndarray
+        Positions, shape (..., 3).
+    velocity : np.ndarray
+        Velocities, shape (..., 3).
+    acceleration : callable
+        Accelerations at the given positions and offset into the step.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        Positions and velocities after the step.
+    """
+    velocity = velocity + acceleration(position, 0.0) * time_step
+    position = position + velocity * time_step
+    return position, velocity
+
+
+def integrate_verlet(
+    time_step: Union[float, np.ndarray], position: np.ndarray, velocity: np.ndarray, acceleration: Acceleration
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance positions and velocities by one leapfrog (velocity Verlet) step.
+
+    Second order and symplectic, in kick-drift-kick form. Parameters and
+    return values are those of `integrate_euler`.
+    """
+    half_kick = velocity + acceleration(position, 0.0) * (time_step / 2)
+    position = position + half_kick * time_step
+    velocity = half_kick + acceleration(position, time_step) * (time_step / 2)
+    return position, velocity
+
+
+def integrate_rk4(
+    time_step: Union[float, np.ndarray], position: np.ndarray, velocity: np.ndarray, acceleration: Acceleration
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance positions and velocities by one classical Runge-Kutta step.
+
+    Fourth order, four acceleration evaluations per step. Parameters and
+    return values are those of `integrate_euler`.
+    """
+    half = time_step / 2
+    k1r, k1v = velocity, acceleration(position, 0.0)
+    k2r, k2v = velocity + k1v * half, acceleration(position + k1r * half, half)
+    k3r, k3v = velocity + k2v * half, acceleration(position + k2r * half, half)
+    k4r, k4v = velocity + k3v * time_step, acceleration(position + k3r * time_step, time_step)
+    position = position + (k1r + 2 * k2r + 2 * k3r + k4r) * (time_step / 6)
+    velocity = velocity + (k1v + 2 * k2v + 2 * k3v + k4v) * (time_step / 6)
+    return position, velocity
+
+
+def integrate_rk45(
+    time_step: Union[float, np.ndarray],
+    position: np.ndarray,
+    velocity: np.ndarray,
+    acceleration: Acceleration,
+    tolerance: float = Settings.RK45_TOLERANCE,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Advance positions and velocities by one embedded Runge-Kutta step.
+
+    Uses the Dormand-Prince 5(4) pair: the step is taken with the
+    fifth-order solution, and its difference to the embedded fourth-order
+    solution estimates the local error.
+
+    Parameters
+    ----------
+    time_step, position, velocity, acceleration
+        As for `integrate_euler`.
+    tolerance : float, optional
+        Absolute and relative error per step the error is measured against.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        Positions and velocities after the step, and the RMS local error of
+        each body relative to `tolerance`, shape (...,); values above 1
+        exceed the tolerance.
+    """
+    k_position: List[np.ndarray] = []
+    k_velocity: List[np.ndarray] = []
+    for offset, weights in zip(DOPRI_C, DOPRI_A):
+        stage_position, stage_velocity = position, velocity
+        for weight, kr, kv in zip(weights, k_position, k_velocity):
+            stage_position = stage_position + kr * (weight * time_step)
+            stage_velocity = stage_velocity + kv * (weight * time_step)
+        k_position.append(stage_velocity)
+        k_velocity.append(acceleration(stage_position, offset * time_step))
+
+    new_position, new_velocity = position, velocity
+    error_position, error_velocity = np.zeros_like(position), np.zeros_like(velocity)
+    for b5, b4, kr, kv in zip(DOPRI_B5, DOPRI_B4, k_position, k_velocity):
+        new_position = new_position + kr * (b5 * time_step)
+        new_velocity = new_velocity + kv * (b5 * time_step)
+        error_position = error_position + kr * ((b5 - b4) * time_step)
+        error_velocity = error_velocity + kv * ((b5 - b4) * time_step)
+
+    state = np.concatenate([position, velocity], axis=-1)
+    new_state = np.concatenate([new_position, new_velocity], axis=-1)
+    scale = tolerance * (1 + np.maximum(np.abs(state), np.abs(new_state)))
+    ratio = np.concatenate([error_position, error_velocity], axis=-1) / scale
+    return new_position, new_velocity, np.sqrt(np.mean(ratio ** 2, axis=-1))
+
+
+def rk45_timestep(
+    time_step: Union[float, np.ndarray],
+    error: Union[float, np.ndarray],
+    min_step: float = Settings.TIMESTEP_MIN,
+    max_step: float = Settings.TIMESTEP_MAX,
+) -> Union[float, np.ndarray]:
+    """
+    Choose the next step from the relative error of an `integrate_rk45` step.
+
+    The step is scaled by 0.9 * error^(-1/5), limited to a factor between
+    0.2 and 5 per step, and clamped to the step bounds.
+
+    Parameters
+    ----------
+    time_step : float or np.ndarray
+        Length of the step that was taken.
+    error : float or np.ndarray
+        Its local error relative to the tolerance.
+    min_step, max_step : float, optional
+        Bounds of the returned step.
+
+    Returns
+    -------
+    float or np.ndarray
+        Length of the next step.
+    """
+    with np.errstate(divide='ignore'):
+        factor = np.clip(0.9 * np.asarray(error, dtype=float) ** -0.2, 0.2, 5.0)
+    return np.clip(time_step * factor, min_step, max_step)
+
+
+def _pair_acceleration(other_position: Dict[str, float], other_velocity: Dict[str, float], m_other: float) -> Acceleration:
+    """
+    Acceleration towards another body that moves at constant velocity
+    during the step, as in `propagate_velocity`.
+    """
+    r_other = np.array([other_position['x'], other_position['y'], other_position['z']])
+    v_other = np.array([other_velocity['x'], other_velocity['y'], other_velocity['z']])
+
+    def acceleration(position: np.ndarray, offset: Union[float, np.ndarray]) -> np.ndarray:
+        r = position - (r_other + v_other * offset)
+        return -m_other * r / np.linalg.norm(r) ** 3
+    return acceleration
+
+
+def _pair_step(
+    integrate: Callable[..., Tuple[np.ndarray, ...]],
+    time_step: float,
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+) -> Tuple[Dict[str, float], Dict[str, float], Tuple[np.ndarray, ...]]:
+    """
+    Integrate one body around another with an array integrator, as dicts,
+    followed by any further values the integrator returns.
+    """
+    r_self = np.array([position['x'], position['y'], position['z']])
+    v_self = np.array([velocity['x'], velocity['y'], velocity['z']])
+    r_self, v_self, *rest = integrate(time_step, r_self, v_self, _pair_acceleration(other_position, other_velocity, m_other))
+    return (
+        {'x': float(r_self[0]), 'y': float(r_self[1]), 'z': float(r_self[2])},
+        {'x': float(v_self[0]), 'y': float(v_self[1]), 'z': float(v_self[2])},
+        tuple(rest),
+    )
+
+
+def verlet_step(
+    time_step: float,
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Propagate the position and velocity of a body with a leapfrog step.
+
+    Parameters
+    ----------
+    time_step : float
+        Time increment for propagation.
+    position : dict
+        Current position {'x', 'y', 'z'} of this body.
+    velocity : dict
+        Current velocity {'x', 'y', 'z'} of this body.
+    other_position : dict
+        Position {'x', 'y', 'z'} of the other interacting body.
+    other_velocity : dict
+        Velocity {'x', 'y', 'z'} of the other body, assumed constant during the step.
+    m_other : float
+        Mass of the other body.
+
+    Returns
+    -------
+    tuple of dict
+        Updated position and velocity vectors {'x', 'y', 'z'}.
+    """
+    new_position, new_velocity, _ = _pair_step(
+        integrate_verlet, time_step, position, velocity, other_position, other_velocity, m_other
+    )
+    return new_position, new_velocity
+
+
+def rk4_step(
+    time_step: float,
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Propagate the position and velocity of a body with a classical
+    Runge-Kutta step. Parameters and return values are those of `verlet_step`.
+    """
+    new_position, new_velocity, _ = _pair_step(
+        integrate_rk4, time_step, position, velocity, other_position, other_velocity, m_other
+    )
+    return new_position, new_velocity
+
+
+def rk45_step(
+    time_step: float,
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Propagate the position and velocity of a body with the fifth-order
+    solution of a Dormand-Prince step. Parameters and return values are
+    those of `verlet_step`.
+    """
+    new_position, new_velocity, _ = _pair_step(
+        integrate_rk45, time_step, position, velocity, other_position, other_velocity, m_other
+    )
+    return new_position, new_velocity
+
+
+def rk45_controlled_step(
+    time: float,
+    time_step: float,
+    position: Dict[str, float],
+    velocity: Dict[str, float],
+    other_position: Dict[str, float],
+    other_velocity: Dict[str, float],
+    m_other: float,
+    max_retries: int = Settings.RK45_MAX_RETRIES,
+) -> Tuple[Dict[str, float], Dict[str, float], float, float]:
+    """
+    Propagate a body with an error-controlled Dormand-Prince step.
+
+    A step whose local error exceeds the tolerance is rejected and retried
+    with the shorter step `rk45_timestep` chooses, until the error is within
+    the tolerance, the step reaches `Settings.TIMESTEP_MIN` or `max_retries`
+    steps were rejected; the last attempt is kept. The next step is chosen
+    from the error of the kept one.
+
+    Parameters
+    ----------
+    time : float
+        Current time of the body.
+    time_step : float
+        Length of the first attempted step.
+    position, velocity, other_position, other_velocity, m_other
+        As for `verlet_step`.
+    max_retries : int, optional
+        Largest number of rejected steps.
+
+    Returns
+    -------
+    tuple
+        Updated position and velocity vectors {'x', 'y', 'z'}, the time
+        after the kept step, and the length of the next time step.
+    """
+    new_position, new_velocity, (error,) = _pair_step(
+        integrate_rk45, time_step, position, velocity, other_position, other_velocity, m_other
+    )
+    for _ in range(max_retries):
+        if error <= 1 or time_step <= Settings.TIMESTEP_MIN:
+            break
+        time_step = float(rk45_timestep(time_step, error))
+        new_position, new_velocity, (error,) = _pair_step(
+            integrate_rk45, time_step, position, velocity, other_position, other_velocity, m_other
+        )
+    return new_position, new_velocity, time + time_step, float(rk45_timestep(time_step, error))
 
 
 def time_manager(time: float, time_step: float) -> float:
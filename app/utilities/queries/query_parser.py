@@ -1,23 +1,93 @@
 """
 query_parser.py
 ---------------
-Provides a Python interface to the Sedaro Nano Rust query parser.
+Parses Sedaro Nano query expressions into JSON-serializable abstract
+syntax trees (ASTs).
 
-This module calls the compiled Rust binary to parse query expressions
-into JSON-serializable abstract syntax trees (ASTs). It is used by the
-SimulationProcessor to interpret agent update rules.
+The parser is a native Python implementation of the grammar in
+`queries/src/grammar.lalrpop` and produces the same AST shape as the Rust
+`sedaro-nano-queries` binary. Parsed queries are memoized in a bounded LRU
+cache keyed by query text. It is used by the SimulationProcessor to
+interpret agent update rules.
+
+Grammar
+-------
+```
+Query := "prev!(" Query ")"
+       | "root!"
+       | "agent!(" Identifier ")"
+       | Identifier
+       | "(" Query "," [Query "," ...] [Query] ")"
+       | Query "." Identifier
+```
 """
 
+import copy
 import json
+import re
 import subprocess
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List, NoReturn, Tuple
 from app.config.settings import Settings
 
+# Literal tokens of the grammar, and the identifier terminal exactly as the
+# LALRPOP grammar spells it (including its `A-z` range)
+_LITERALS: Tuple[str, ...] = ('prev!(', 'agent!(', 'root!', '(', ')', ',', '.')
+_IDENTIFIER = re.compile(r'[a-zA-Z][a-zA-z0-9]*')
+_WHITESPACE = re.compile(r'\s*')
+
 
 def parse_query(query: str) -> Dict[str, Any]:
+    """
+    Parse a query expression into its AST.
+
+    Results are cached per query text; each call returns its own copy so
+    callers may freely modify the AST.
+
+    Parameters
+    ----------
+    query : str
+        The query expression to parse, e.g., 'prev!(velocity)'.
+
+    Returns
+    -------
+    dict
+        Parsed query AST as a dictionary.
+
+    Raises
+    ------
+    ValueError
+        If the query is not valid in the query grammar.
+
+    Examples
+    --------
+    >>> parse_query('prev!(time)')
+    {'kind': 'Prev', 'content': {'kind': 'Base', 'content': 'time'}}
+    >>> parse_query('agent!(Body1).mass')
+    {'kind': 'Access', 'content': {'base': {'kind': 'Agent', 'content': 'Body1'}, 'field': 'mass'}}
+    >>> parse_query('( root!, )')
+    {'kind': 'Tuple', 'content': [{'kind': 'Root'}]}
+    """
+    return copy.deepcopy(_parse_cached(query))
+
+
+@lru_cache(maxsize=Settings.QUERY_CACHE_SIZE)
+def _parse_cached(query: str) -> Dict[str, Any]:
+    """
+    Parse a query expression and memoize the AST by query text.
+
+    The returned AST is shared between callers and must not be modified.
+    """
+    return _QueryParser(_tokenize(query), query).parse()
+
+
+def parse_query_binary(query: str) -> Dict[str, Any]:
     """
     Parse a query expression using the Rust query parser binary.
 
+    Kept as the reference implementation for conformance checks; the
+    simulation itself uses the native `parse_query`.
+
     Parameters
     ----------
     query : str
@@ -44,3 +114,124 @@ def parse_query(query: str) -> Dict[str, Any]:
     if proc.returncode:
         raise Exception(f'Parsing query failed: {stderr}')
     return json.loads(stdout)
+
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    """
+    Split a query into (kind, text) tokens.
+
+    Like the LALRPOP lexer, whitespace is skipped, the longest match wins and
+    literals take precedence over identifiers of the same length.
+
+    Raises
+    ------
+    ValueError
+        If the query contains a character sequence that is not a token.
+    """
+    tokens: List[Tuple[str, str]] = []
+    pos = _skip_whitespace(query, 0)
+    while pos < len(query):
+        literal = max((lit for lit in _LITERALS if query.startswith(lit, pos)), key=len, default='')
+        match = _IDENTIFIER.match(query, pos)
+        identifier = match.group() if match else ''
+        if not literal and not identifier:
+            raise ValueError(f'Parsing query failed: invalid token at position {pos} in {query!r}')
+        if len(identifier) > len(literal):
+            tokens.append(('identifier', identifier))
+            pos += len(identifier)
+        else:
+            tokens.append((literal, literal))
+            pos += len(literal)
+        pos = _skip_whitespace(query, pos)
+    return tokens
+
+
+def _skip_whitespace(query: str, pos: int) -> int:
+    """
+    Return the position of the first character at or after `pos` that is
+    not whitespace.
+
+    Raises
+    ------
+    ValueError
+        If no whitespace run can be matched at `pos`.
+    """
+    match = _WHITESPACE.match(query, pos)
+    if match is None:
+        raise ValueError(f'Parsing query failed: invalid token at position {pos} in {query!r}')
+    return match.end()
+
+
+class _QueryParser:
+    """
+    Recursive-descent parser over a token list.
+
+    The left-recursive `Query "." Identifier` rule is parsed as a postfix
+    loop, which yields the same left-associative Access nesting.
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]], query: str) -> None:
+        self.tokens = tokens
+        self.query = query
+        self.pos = 0
+
+    def parse(self) -> Dict[str, Any]:
+        """Parse the whole token list as a single query."""
+        ast = self._query()
+        if self.pos != len(self.tokens):
+            self._fail(f'unexpected token {self.tokens[self.pos][1]!r}')
+        return ast
+
+    def _query(self) -> Dict[str, Any]:
+        kind, text = self._next()
+        ast: Dict[str, Any]
+        if kind == 'prev!(':
+            ast = {'kind': 'Prev', 'content': self._query()}
+            self._expect(')')
+        elif kind == 'root!':
+            ast = {'kind': 'Root'}
+        elif kind == 'agent!(':
+            ast = {'kind': 'Agent', 'content': self._expect('identifier')}
+            self._expect(')')
+        elif kind == 'identifier':
+            ast = {'kind': 'Base', 'content': text}
+        elif kind == '(':
+            ast = {'kind': 'Tuple', 'content': self._tuple()}
+        else:
+            self._fail(f'unexpected token {text!r}')
+        while self._peek() == '.':
+            self.pos += 1
+            ast = {'kind': 'Access', 'content': {'base': ast, 'field': self._expect('identifier')}}
+        return ast
+
+    def _tuple(self) -> List[Dict[str, Any]]:
+        # At least one element must be followed by a comma; the last element
+        # may omit it
+        items = [self._query()]
+        self._expect(',')
+        while self._peek() != ')':
+            items.append(self._query())
+            if self._peek() != ',':
+                break
+            self.pos += 1
+        self._expect(')')
+        return items
+
+    def _peek(self) -> str:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else ''
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            self._fail('unexpected end of query')
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, kind: str) -> str:
+        token_kind, text = self._next()
+        if token_kind != kind:
+            self._fail(f'expected {kind!r} but found {text!r}')
+        return text
+
+    def _fail(self, reason: str) -> NoReturn:
+        raise ValueError(f'Parsing query failed: {reason} in {self.query!r}')
@@ -0,0 +1,428 @@
+"""
+columnar_results.py
+-------------------
+Compact columnar binary encoding of simulation results.
+
+A simulation history is a list of (low, high, state) records, where almost
+every record holds one agent's state of numeric fields. Records are grouped
+by agent and field layout, and every group stores `low`, `high` and each
+leaf field (e.g. `position.x`) as its own zlib-compressed array of float64
+or int64 values. A per-record group index keeps the original record order,
+and records that do not fit a numeric layout (such as the initial state of
+all agents) are kept as compressed JSON.
+
+Decoding is lazy: `ColumnarResults` only parses the header, decompresses a
+column the first time it is read and exposes it through `np.frombuffer`
+without copying. Queries over a time window, a set of agents and a set of
+fields only decompress the columns they touch. Full decodes return the
+states of float groups as CompactStates, and encoding reads CompactStates
+without building their dicts.
+
+Layout
+------
+```
+MAGIC | header length (uint32, little-endian) | header (JSON) | chunks
+```
+"""
+
+from __future__ import annotations
+import json
+import struct
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from app.utilities.structures.compact_state import CompactState, compact_records, flatten_state, json_default, state_builder
+
+MAGIC: bytes = b'SNCR1'
+COMPRESSION_LEVEL: int = 6
+# Column dtype of each value kind
+DTYPES: Dict[str, str] = {'f': '<f8', 'i': '<i8'}
+
+_HEADER_LENGTH = struct.Struct('<I')
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+Record = Tuple[float, float, Dict[str, Any]]
+Path = Tuple[str, ...]
+# Column kinds of a group whose leaves are all floats, after 'low' and 'high'
+_FLOAT_LEAVES = 'f'
+
+
+def encode_results(records: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Encode simulation records into the columnar binary format.
+
+    Parameters
+    ----------
+    records : sequence of tuple
+        Simulation history as (low, high, state) records, with states as
+        dicts or CompactStates.
+
+    Returns
+    -------
+    bytes
+        The encoded results.
+
+    Examples
+    --------
+    >>> records = [(0.0, 1.0, {'Body1': {'mass': 1.0}}), (1.0, 2.0, {'Body1': {'mass': 2.0}})]
+    >>> ColumnarResults(encode_results(records)).to_records() == records
+    True
+    """
+    group_ids: Dict[Tuple[str, Tuple[Path, ...], str], int] = {}
+    rows: List[List[List[Any]]] = []
+    order: List[int] = []
+    irregular: List[List[Any]] = []
+    for index, (low, high, state) in enumerate(records):
+        layout = _layout(low, high, state)
+        if layout is None:
+            irregular.append([index, [low, high, state]])
+            order.append(-1)
+            continue
+        key, values = layout
+        group = group_ids.setdefault(key, len(group_ids))
+        if group == len(rows):
+            rows.append([])
+        rows[group].append(values)
+        order.append(group)
+
+    chunks: List[bytes] = []
+    offset = 0
+
+    def add_chunk(data: bytes) -> List[int]:
+        nonlocal offset
+        chunk = zlib.compress(data, COMPRESSION_LEVEL)
+        chunks.append(chunk)
+        offset += len(chunk)
+        return [offset - len(chunk), len(chunk)]
+
+    header: Dict[str, Any] = {
+        'count': len(order),
+        'order': add_chunk(np.array(order, dtype='<i4').tobytes()),
+        'irregular': add_chunk(json.dumps(irregular, default=json_default).encode('utf-8')),
+        'groups': [],
+    }
+    for (agent, paths, kinds), group_rows in zip(group_ids, rows):
+        header['groups'].append({
+            'agent': agent,
+            'paths': [list(path) for path in paths],
+            'kinds': kinds,
+            'size': len(group_rows),
+            'columns': [
+                add_chunk(np.array(column, dtype=DTYPES[kind]).tobytes())
+                for kind, column in zip(kinds, zip(*group_rows))
+            ],
+        })
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return b''.join([MAGIC, _HEADER_LENGTH.pack(len(header_bytes)), header_bytes, *chunks])
+
+
+def is_columnar(blob: Optional[bytes]) -> bool:
+    """
+    Check whether `blob` holds results in the columnar format.
+    """
+    return blob is not None and bytes(blob[:len(MAGIC)]) == MAGIC
+
+
+class ColumnarResults:
+    """
+    ColumnarResults
+    ---------------
+    Lazy reader over encoded simulation results.
+
+    Attributes
+    ----------
+    count : int
+        Number of records.
+    groups : list of dict
+        Per group: the agent, the field paths, the value kinds and the
+        number of records.
+    """
+
+    def __init__(self, blob: bytes) -> None:
+        """
+        Parse the header of encoded results; columns are decoded on demand.
+
+        Raises
+        ------
+        ValueError
+            If `blob` is not in the columnar format.
+        """
+        if not is_columnar(blob):
+            raise ValueError('Invalid columnar results: bad magic.')
+        self._blob = memoryview(blob)
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (length,) = _HEADER_LENGTH.unpack_from(self._blob, len(MAGIC))
+        header = json.loads(bytes(self._blob[start:start + length]))
+        self._data_start = start + length
+        self._header = header
+        self._columns: Dict[Tuple[int, str], np.ndarray] = {}
+        self.count: int = header['count']
+        self.groups: List[Dict[str, Any]] = header['groups']
+
+    def fields(self, group: int) -> List[str]:
+        """
+        Column names of a group: 'low', 'high' and the dotted field paths.
+        """
+        return ['low', 'high', *('.'.join(path) for path in self.groups[group]['paths'])]
+
+    def column(self, group: int, name: str) -> np.ndarray:
+        """
+        Read one column of a group.
+
+        Parameters
+        ----------
+        group : int
+            Group index.
+        name : str
+            Column name, 'low', 'high' or a dotted field path such as 'position.x'.
+
+        Returns
+        -------
+        np.ndarray
+            Read-only view over the decompressed values.
+
+        Raises
+        ------
+        KeyError
+            If the group has no such column.
+        """
+        key = (group, name)
+        if key not in self._columns:
+            fields = self.fields(group)
+            if name not in fields:
+                raise KeyError(name)
+            index = fields.index(name)
+            dtype = DTYPES[self.groups[group]['kinds'][index]]
+            raw = self._chunk(self.groups[group]['columns'][index])
+            self._columns[key] = np.frombuffer(raw, dtype=dtype)
+        return self._columns[key]
+
+    def order(self) -> np.ndarray:
+        """
+        Group index of every record, -1 for records stored as JSON.
+        """
+        return np.frombuffer(self._chunk(self._header['order']), dtype='<i4')
+
+    def irregular(self) -> Dict[int, Record]:
+        """
+        Records that are stored as JSON, keyed by record index.
+        """
+        return {
+            index: tuple(record)
+            for index, record in json.loads(self._chunk(self._header['irregular']))
+        }
+
+    def to_records(self) -> List[Record]:
+        """
+        Decode all records, in their original order.
+
+        Returns
+        -------
+        list of tuple
+            Simulation history as (low, high, state) records; states of
+            groups with only float fields are CompactStates.
+        """
+        groups = [
+            self._compact_records(group) if set(spec['kinds'][2:]) == {_FLOAT_LEAVES} else
+            self.group_records(group, slice(None))
+            for group, spec in enumerate(self.groups)
+        ]
+        irregular = self.irregular()
+        positions = [iter(records) for records in groups]
+        return [
+            irregular[index] if group < 0 else next(positions[group])
+            for index, group in enumerate(self.order().tolist())
+        ]
+
+    def query(
+        self,
+        t_start: Optional[float] = None,
+        t_end: Optional[float] = None,
+        bodies: Optional[Collection[str]] = None,
+        fields: Optional[Collection[str]] = None,
+        stride: int = 1,
+    ) -> List[Record]:
+        """
+        Decode a slice of the records, reading only the columns it needs.
+
+        Parameters
+        ----------
+        t_start, t_end : float, optional
+            Time window; records whose interval [low, high) overlaps
+            [t_start, t_end) are selected. Unbounded when omitted.
+        bodies : collection of str, optional
+            Agents to include; all agents by default.
+        fields : collection of str, optional
+            Fields to include, as dotted paths or prefixes ('position' selects
+            'position.x', 'position.y' and 'position.z'); all fields by default.
+        stride : int, optional
+            Keep every `stride`-th selected record of each agent (default = 1).
+            Records stored as JSON are never skipped.
+
+        Returns
+        -------
+        list of tuple
+            Selected (low, high, state_dict) records in their original order.
+
+        Examples
+        --------
+        >>> records = [(float(t), t + 1.0, {'A': {'x': t * 1.0, 'y': 0.0}}) for t in range(6)]
+        >>> ColumnarResults(encode_results(records)).query(t_start=1, t_end=5, fields=['x'], stride=2)
+        [(1.0, 2.0, {'A': {'x': 1.0}}), (3.0, 4.0, {'A': {'x': 3.0}})]
+        """
+        order = self.order()
+        indices: List[np.ndarray] = []
+        selected: List[Record] = []
+        for group, spec in enumerate(self.groups):
+            if bodies is not None and spec['agent'] not in bodies:
+                continue
+            names = [name for name in self.fields(group)[2:] if _matches(name, fields)]
+            if not names:
+                continue
+            mask = np.ones(spec['size'], dtype=bool)
+            if t_start is not None:
+                mask &= self.column(group, 'high') > t_start
+            if t_end is not None:
+                mask &= self.column(group, 'low') < t_end
+            rows = np.flatnonzero(mask)[::stride]
+            indices.append(np.flatnonzero(order == group)[rows])
+            selected.extend(self.group_records(group, rows, names))
+
+        for index, (low, high, state) in self.irregular().items():
+            if (t_start is not None and not high > t_start) or (t_end is not None and not low < t_end):
+                continue
+            projected = {
+                agent: _project(value, fields)
+                for agent, value in state.items() if bodies is None or agent in bodies
+            }
+            projected = {agent: value for agent, value in projected.items() if value}
+            if projected:
+                indices.append(np.array([index]))
+                selected.append((low, high, projected))
+
+        if not selected:
+            return []
+        return [selected[i] for i in np.argsort(np.concatenate(indices), kind='stable').tolist()]
+
+    def group_records(self, group: int, rows: Union[slice, np.ndarray], fields: Optional[Sequence[str]] = None) -> List[Record]:
+        """
+        Decode selected rows of a group into records.
+
+        Parameters
+        ----------
+        group : int
+            Group index.
+        rows : slice or np.ndarray
+            Rows within the group, as a slice or an index array.
+        fields : sequence of str, optional
+            Dotted field paths to include; all fields by default. Only these
+            columns are decompressed.
+
+        Returns
+        -------
+        list of tuple
+            (low, high, state_dict) records of the selected rows.
+        """
+        spec = self.groups[group]
+        paths = [tuple(path) for path in spec['paths']]
+        if fields is not None:
+            wanted = set(fields)
+            paths = [path for path in paths if '.'.join(path) in wanted]
+        names = ['low', 'high', *('.'.join(path) for path in paths)]
+        columns = [self.column(group, name)[rows].tolist() for name in names]
+        build = _record_builder(spec['agent'], tuple(paths))
+        return [build(values) for values in zip(*columns)]
+
+    def _compact_records(self, group: int) -> List[Tuple[float, float, Any]]:
+        """
+        Decode all rows of a group with only float fields into records
+        with CompactStates, without building their dicts.
+        """
+        spec = self.groups[group]
+        fields = self.fields(group)
+        bounds = zip(self.column(group, 'low').tolist(), self.column(group, 'high').tolist())
+        rows = np.column_stack([self.column(group, name) for name in fields[2:]])
+        return compact_records(spec['agent'], tuple(tuple(path) for path in spec['paths']), bounds, rows)
+
+    def _chunk(self, location: Sequence[int]) -> bytes:
+        """
+        Decompress the chunk at the given (offset, length).
+        """
+        offset, length = location
+        start = self._data_start + offset
+        return zlib.decompress(self._blob[start:start + length])
+
+
+def _layout(low: Any, high: Any, state: Any) -> Optional[Tuple[Tuple[str, Tuple[Path, ...], str], List[Any]]]:
+    """
+    Determine the group key and the column values of a record.
+
+    Returns
+    -------
+    tuple or None
+        ((agent, paths, kinds), values), or None if the record does not hold
+        exactly one agent with numeric leaf fields.
+    """
+    if isinstance(state, CompactState):
+        kinds = _kind(low) + _kind(high) + 'f' * len(state.buffer)
+        return (state.layout.agent, state.layout.paths, kinds), [low, high, *state.buffer]
+    if not isinstance(state, dict) or len(state) != 1:
+        return None
+    agent, fields = next(iter(state.items()))
+    if not isinstance(agent, str) or not isinstance(fields, dict):
+        return None
+    paths: List[Path] = []
+    values: List[Any] = [low, high]
+    if not flatten_state(fields, (), paths, values):
+        return None
+    kinds = ''.join(_kind(value) for value in values)
+    if len(kinds) != len(values):
+        return None
+    return (agent, tuple(paths), kinds), values
+
+
+def _matches(name: str, fields: Optional[Collection[str]]) -> bool:
+    """
+    Check whether a dotted field name is selected by a field projection.
+    """
+    return fields is None or any(name == field or name.startswith(field + '.') for field in fields)
+
+
+def _project(value: Any, fields: Optional[Collection[str]], prefix: str = '') -> Any:
+    """
+    Restrict a nested state dict to the selected fields; None if nothing is left.
+    """
+    if fields is None:
+        return value
+    if not isinstance(value, dict):
+        return value if _matches(prefix, fields) else None
+    projected = {}
+    for key, item in value.items():
+        item = _project(item, fields, f'{prefix}.{key}' if prefix else str(key))
+        if item is not None and item != {}:
+            projected[key] = item
+    return projected or None
+
+
+def _kind(value: Any) -> str:
+    """
+    Value kind of a leaf: 'f' for floats, 'i' for int64-range integers and ''
+    for anything that needs JSON.
+    """
+    if type(value) is float:
+        return 'f'
+    if type(value) is int and _INT64_MIN <= value <= _INT64_MAX:
+        return 'i'
+    return ''
+
+
+@lru_cache(maxsize=256)
+def _record_builder(agent: str, paths: Tuple[Path, ...]) -> Callable[[Sequence[Any]], Record]:
+    """
+    Function that builds a record from its column values: low, high and
+    the leaf values in the order of `paths`.
+    """
+    state = state_builder(agent, paths, offset=2)
+    return lambda values: (values[0], values[1], state(values))
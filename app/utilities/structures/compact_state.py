@@ -0,0 +1,256 @@
+"""
+compact_state.py
+----------------
+Defines CompactState, a compact read-only form of one agent's state in a
+simulation record.
+
+A record state such as {'Body1': {'position': {'x': ..}, ..., 'mass': ..}}
+holds one dict per nesting level and one float object per leaf. A
+CompactState keeps the leaf values in a single float64 buffer and shares
+the agent and leaf paths, its StateLayout, with every state of the same
+shape. It is a read-only mapping with the same keys and values as the state
+dict, which is only built when it is read: at serialization boundaries, via
+`to_dict` or the `json_default` hook of `json.dumps`.
+
+States that are not a single agent with float leaves stay dicts.
+"""
+
+from __future__ import annotations
+from array import array
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+import numpy as np
+
+# Path of a leaf field, e.g. ('position', 'x')
+Path = Tuple[str, ...]
+
+
+def flatten_state(node: Dict[str, Any], prefix: Path, paths: List[Path], values: List[Any]) -> bool:
+    """
+    Collect leaf paths and values of a nested dict; False if it has
+    non-string keys or empty dicts.
+    """
+    if not node:
+        return False
+    for key, value in node.items():
+        if not isinstance(key, str):
+            return False
+        if isinstance(value, dict):
+            if not flatten_state(value, (*prefix, key), paths, values):
+                return False
+        else:
+            paths.append((*prefix, key))
+            values.append(value)
+    return True
+
+
+def state_builder(agent: str, paths: Tuple[Path, ...], offset: int = 0) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    """
+    Function that builds the nested state dict `{agent: {...}}` from a
+    sequence of leaf values in the order of `paths`, starting at `offset`.
+
+    The nesting is resolved once: each dict is built by a closure over its
+    keys and the `itemgetter` of its leaf values.
+    """
+    tree: Dict[str, Any] = {}
+    for index, path in enumerate(paths, offset):
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = index
+
+    def builder(node: Dict[str, Any]) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        leaves = {key: value for key, value in node.items() if not isinstance(value, dict)}
+        if len(leaves) == len(node):
+            keys, get = tuple(leaves), itemgetter(*leaves.values())
+            if len(keys) == 1:
+                return lambda values: {keys[0]: get(values)}
+            return lambda values: dict(zip(keys, get(values)))
+        children = [
+            (key, builder(value) if isinstance(value, dict) else itemgetter(value)) for key, value in node.items()
+        ]
+        return lambda values: {key: child(values) for key, child in children}
+
+    fields = builder(tree)
+    return lambda values: {agent: fields(values)}
+
+
+class StateLayout:
+    """
+    StateLayout
+    -----------
+    Shape of a compact state: its agent and leaf paths, and a function
+    that builds the state dict from the leaf values.
+
+    Layouts are interned by `state_layout`, so all states of one shape
+    share a single instance.
+    """
+
+    __slots__ = ('agent', 'paths', 'build')
+
+    def __init__(self, agent: str, paths: Tuple[Path, ...]) -> None:
+        """
+        Initialize the layout and its state builder.
+        """
+        self.agent: str = agent
+        self.paths: Tuple[Path, ...] = paths
+        self.build: Callable[[Sequence[Any]], Dict[str, Any]] = state_builder(agent, paths)
+
+
+@lru_cache(maxsize=256)
+def state_layout(agent: str, paths: Tuple[Path, ...]) -> StateLayout:
+    """
+    Return the shared layout of states of `agent` with the given leaf paths.
+    """
+    return StateLayout(agent, paths)
+
+
+class CompactState(Mapping[str, Any]):
+    """
+    CompactState
+    ------------
+    One agent's state as a float64 buffer of its leaf values.
+
+    Attributes
+    ----------
+    layout : StateLayout
+        Agent and leaf paths of the state.
+    buffer : array
+        Leaf values, in the order of `layout.paths`.
+
+    Examples
+    --------
+    >>> import json
+    >>> state = pack_state({'Body1': {'position': {'x': 1.0, 'y': 2.0}, 'mass': 3.0}})
+    >>> state
+    CompactState({'Body1': {'position': {'x': 1.0, 'y': 2.0}, 'mass': 3.0}})
+    >>> list(state.buffer)
+    [1.0, 2.0, 3.0]
+    >>> state['Body1']['mass'], state == {'Body1': {'position': {'x': 1.0, 'y': 2.0}, 'mass': 3.0}}
+    (3.0, True)
+    >>> json.dumps([0.0, 1.0, state], default=json_default)
+    '[0.0, 1.0, {"Body1": {"position": {"x": 1.0, "y": 2.0}, "mass": 3.0}}]'
+    >>> pack_state({'Body1': {'mass': 3}})
+    {'Body1': {'mass': 3}}
+    """
+
+    __slots__ = ('layout', 'buffer')
+
+    def __init__(self, layout: StateLayout, buffer: array) -> None:
+        """
+        Initialize the state from its layout and leaf values.
+        """
+        self.layout: StateLayout = layout
+        self.buffer: array = buffer
+
+    def __getitem__(self, agent: str) -> Dict[str, Any]:
+        """
+        Build the state of `agent`, the only key.
+        """
+        if agent != self.layout.agent:
+            raise KeyError(agent)
+        return self.layout.build(self.buffer)[agent]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the only key, the agent."""
+        return iter((self.layout.agent,))
+
+    def __len__(self) -> int:
+        """A compact state always holds one agent."""
+        return 1
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Compare with another state; compact states of the same layout
+        compare their buffers without building dicts.
+        """
+        if isinstance(other, CompactState) and other.layout is self.layout:
+            return other.buffer == self.buffer
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        """Represent the state by its dict."""
+        return f'CompactState({self.to_dict()!r})'
+
+    def __reduce__(self) -> Tuple[Callable[..., CompactState], Tuple[Any, ...]]:
+        """
+        Pickle the agent, the paths and the buffer; the layout is interned
+        again on unpickling.
+        """
+        return _restore, (self.layout.agent, self.layout.paths, self.buffer)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Build the state dict.
+
+        Returns
+        -------
+        dict
+            The state as nested dicts, keyed by agent identifier.
+        """
+        return self.layout.build(self.buffer)
+
+
+def pack_state(state: Any) -> Any:
+    """
+    Pack a single-agent state with float leaves into a CompactState.
+
+    Parameters
+    ----------
+    state : any
+        A record state, e.g. {'Body1': {'position': {...}, 'mass': 1.0}}.
+
+    Returns
+    -------
+    CompactState or any
+        The compact state, or `state` itself if it does not consist of a
+        single agent with float leaves.
+    """
+    if type(state) is not dict or len(state) != 1:
+        return state
+    ((agent, fields),) = state.items()
+    if not isinstance(agent, str) or type(fields) is not dict:
+        return state
+    paths: List[Path] = []
+    values: List[Any] = []
+    if not flatten_state(fields, (), paths, values) or any(type(value) is not float for value in values):
+        return state
+    return CompactState(state_layout(agent, tuple(paths)), array('d', values))
+
+
+def compact_records(
+    agent: str, paths: Tuple[Path, ...], bounds: Iterable[Tuple[Any, Any]], rows: np.ndarray
+) -> List[Tuple[Any, Any, CompactState]]:
+    """
+    Build (low, high, CompactState) records of one agent from their bounds
+    and an (n, len(paths)) array of leaf values, without building dicts.
+    """
+    layout = state_layout(agent, paths)
+    data = np.ascontiguousarray(rows, dtype=np.float64).tobytes()
+    width = 8 * len(paths)
+    return [
+        (low, high, CompactState(layout, array('d', data[offset:offset + width])))
+        for (low, high), offset in zip(bounds, range(0, len(data), width))
+    ]
+
+
+def json_default(value: Any) -> Any:
+    """
+    `default` hook for `json.dumps` that serializes compact states as dicts.
+
+    Raises
+    ------
+    TypeError
+        If `value` is not a CompactState, as `json.dumps` does.
+    """
+    if isinstance(value, CompactState):
+        return value.to_dict()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _restore(agent: str, paths: Tuple[Path, ...], buffer: array) -> CompactState:
+    """
+    Rebuild a pickled CompactState.
+    """
+    return CompactState(state_layout(agent, tuple(tuple(path) for path in paths)), buffer)
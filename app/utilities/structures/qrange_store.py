@@ -1,14 +1,18 @@
 """
 qrange_store.py
 ---------------
-Defines QRangeStore, a custom key-value data structure that maps 
+Defines QRangeStore, a custom key-value data structure that maps
 left-inclusive, right-exclusive numeric ranges [low, high) to values.
 
 Used in simulation to store and query agent states efficiently by time ranges.
+Ranges are indexed by their lower bound in a sorted array, with a max-tree of
+upper bounds on top of it, so point and window queries cost O(log n + k)
+instead of a scan over every stored range.
 """
 
 from __future__ import annotations
-from typing import Generic, List, Tuple, TypeVar
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterable, List, Tuple, TypeVar, Union
 
 T = TypeVar('T')
 
@@ -19,7 +23,10 @@ class QRangeStore(Generic[T]):
     -----------
     A key-value store mapping numeric ranges [low, high) to values.
 
-    Querying the store returns all values whose ranges contain the given key.
+    Querying the store with a key returns all values whose ranges contain
+    the key. Querying with a slice `store[t0:t1]` returns all values whose
+    ranges overlap the window [t0, t1). Values are always returned in
+    insertion order.
 
     Examples
     --------
@@ -37,7 +44,7 @@ class QRangeStore(Generic[T]):
     >>> store[8, 9] = 'Record E'
     >>> store[2, 0] = 'Record F'
     Traceback (most recent call last):
-    IndexError: Invalid Range.
+    IndexError: Invalid Range: low must be < high.
     >>> store[2.1]
     ['Record A', 'Record D']
     >>> store[8]
@@ -48,11 +55,29 @@ class QRangeStore(Generic[T]):
     >>> store[9]
     Traceback (most recent call last):
     IndexError: Not found.
+    >>> store[1:3]
+    ['Record A', 'Record C', 'Record D']
+    >>> store[4:8]
+    []
+    >>> store.extend([(4, 6, 'Record G'), (5, 8, 'Record H')])
+    >>> store[4:8]
+    ['Record G', 'Record H']
+    >>> len(store)
+    7
     """
 
     def __init__(self) -> None:
         """Initialize an empty QRangeStore."""
+        # Records in insertion order (the order exposed by `dump`)
         self._store: List[Tuple[float, float, T]] = []
+        # Lower bounds sorted ascending and the matching record positions
+        self._lows: List[float] = []
+        self._order: List[int] = []
+        # Implicit binary max-tree over upper bounds, leaves follow `_order`
+        self._tree: List[float] = []
+        self._capacity: int = 0
+        # Set when an out-of-order insert invalidated the max-tree
+        self._dirty: bool = False
 
     def __setitem__(self, rng: Tuple[float, float], value: T) -> None:
         """
@@ -70,34 +95,49 @@ class QRangeStore(Generic[T]):
         IndexError
             If the provided range is invalid.
         """
-        try:
-            low, high = rng
-        except (TypeError, ValueError):
-            raise IndexError('Invalid Range: must provide a (low, high) tuple.')
-        if not low < high:
-            raise IndexError('Invalid Range: low must be < high.')
+        low, high = self._validate(rng)
+        index = len(self._store)
         self._store.append((low, high, value))
 
-    def __getitem__(self, key: float) -> List[T]:
+        if not self._dirty and (not self._lows or low >= self._lows[-1]):
+            # Fast path: simulations insert in time order, so the record
+            # lands at the end of the index and only its ancestors change
+            position = len(self._lows)
+            self._lows.append(low)
+            self._order.append(index)
+            if position < self._capacity:
+                self._update(position, high)
+            else:
+                self._dirty = True
+        else:
+            position = bisect_right(self._lows, low)
+            self._lows.insert(position, low)
+            self._order.insert(position, index)
+            self._dirty = True
+
+    def __getitem__(self, key: Union[float, slice]) -> List[T]:
         """
-        Retrieve all values valid at the given key.
+        Retrieve all values valid at the given key or within a window.
 
         Parameters
         ----------
-        key : float
-            The point in time or index to query.
+        key : float or slice
+            The point in time to query, or a slice `t0:t1` selecting every
+            range that overlaps the window [t0, t1).
 
         Returns
         -------
         list of T
-            List of values whose ranges contain the key.
+            List of values whose ranges contain the key (or overlap the window).
 
         Raises
         ------
         IndexError
-            If no values are found at the key.
+            If no values are found at the key, or if the window is invalid.
         """
-        ret: List[T] = [v for (l, h, v) in self._store if l <= key < h]
+        if isinstance(key, slice):
+            return self._window(key)
+        ret: List[T] = self._collect(bisect_right(self._lows, key), key)
         if not ret:
             raise IndexError('Not found.')
         return ret
@@ -113,6 +153,38 @@ class QRangeStore(Generic[T]):
         """
         return len(self._store)
 
+    def extend(self, records: Iterable[Tuple[float, float, T]]) -> None:
+        """
+        Bulk-insert (low, high, value) records.
+
+        All ranges are validated before any record is inserted, and the index
+        is rebuilt once instead of being updated per record.
+
+        Parameters
+        ----------
+        records : iterable of tuple
+            Records as produced by `dump`.
+
+        Raises
+        ------
+        IndexError
+            If any of the provided ranges is invalid.
+        """
+        validated: List[Tuple[float, float, T]] = [
+            (*self._validate((low, high)), value) for (low, high, value) in records
+        ]
+        if not validated:
+            return
+        offset = len(self._store)
+        self._store.extend(validated)
+        pairs = sorted(
+            [(low, offset + i) for i, (low, _, _) in enumerate(validated)]
+            + list(zip(self._lows, self._order))
+        )
+        self._lows = [low for (low, _) in pairs]
+        self._order = [index for (_, index) in pairs]
+        self._dirty = True
+
     def dump(self) -> List[Tuple[float, float, T]]:
         """
         Return a shallow copy of all stored ranges and values.
@@ -123,3 +195,90 @@ class QRangeStore(Generic[T]):
             A list of (low, high, value) tuples representing stored ranges.
         """
         return self._store.copy()
+
+    def _validate(self, rng: Tuple[float, float]) -> Tuple[float, float]:
+        """
+        Unpack and validate a (low, high) range.
+
+        Raises
+        ------
+        IndexError
+            If the range is not a pair or low is not strictly below high.
+        """
+        try:
+            low, high = rng
+        except (TypeError, ValueError):
+            raise IndexError('Invalid Range: must provide a (low, high) tuple.')
+        if not low < high:
+            raise IndexError('Invalid Range: low must be < high.')
+        return low, high
+
+    def _window(self, window: slice) -> List[T]:
+        """
+        Retrieve all values whose ranges overlap [window.start, window.stop).
+
+        An open start or stop extends the window to -inf or +inf.
+        """
+        if window.step is not None:
+            raise IndexError('Invalid Range: window queries do not support a step.')
+        start = float('-inf') if window.start is None else window.start
+        stop = float('inf') if window.stop is None else window.stop
+        if not start < stop:
+            raise IndexError('Invalid Range: low must be < high.')
+        # Overlap means low < stop and high > start
+        return self._collect(bisect_left(self._lows, stop), start)
+
+    def _collect(self, end: int, bound: float) -> List[T]:
+        """
+        Collect values among the first `end` indexed ranges whose upper bound
+        exceeds `bound`, in insertion order.
+        """
+        if end == 0:
+            return []
+        self._reindex()
+        tree, capacity, order = self._tree, self._capacity, self._order
+        hits: List[int] = []
+        # Walk the max-tree, pruning subtrees that end at or before `bound`
+        stack: List[Tuple[int, int, int]] = [(1, 0, capacity)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= end or tree[node] <= bound:
+                continue
+            if node >= capacity:
+                hits.append(order[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        hits.sort()
+        store = self._store
+        return [store[i][2] for i in hits]
+
+    def _reindex(self) -> None:
+        """Rebuild the max-tree over upper bounds if it is stale."""
+        if not self._dirty:
+            return
+        size = len(self._order)
+        capacity = 1
+        while capacity < size:
+            capacity *= 2
+        tree = [float('-inf')] * (2 * capacity)
+        store = self._store
+        for position, index in enumerate(self._order):
+            tree[capacity + position] = store[index][1]
+        for node in range(capacity - 1, 0, -1):
+            left, right = tree[2 * node], tree[2 * node + 1]
+            tree[node] = left if left > right else right
+        self._tree = tree
+        self._capacity = capacity
+        self._dirty = False
+
+    def _update(self, position: int, high: float) -> None:
+        """Set the leaf at `position` and refresh its ancestors' maxima."""
+        tree = self._tree
+        node = self._capacity + position
+        tree[node] = high
+        node //= 2
+        while node and tree[node] < high:
+            tree[node] = high
+            node //= 2
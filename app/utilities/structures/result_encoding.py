@@ -0,0 +1,282 @@
+"""
+result_encoding.py
+------------------
+Serialization of simulation results for HTTP responses.
+
+Results are encoded as JSON, with orjson when it is installed and the
+standard library otherwise, or as MessagePack when `msgpack` is installed
+and the client asks for it. Encoded bodies can be compressed with gzip, or
+zstd when `zstandard` is installed, and floats can be rounded to fewer
+significant digits first, which shortens JSON and compresses better.
+
+Components
+----------
+- quantize : Rounds every float of a result to a number of significant digits.
+- encode_json / encode_msgpack : Encode results, compact states included.
+- negotiate_format / negotiate_encoding : Pick the format and content
+  encoding from the Accept and Accept-Encoding request headers.
+- compress : Compress an encoded body.
+- encode_response : All of the above for one response.
+"""
+
+import gzip
+import importlib
+import json
+from array import array
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config.settings import Settings
+from app.utilities.structures.compact_state import CompactState, json_default
+
+
+def _optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import an optional dependency, or None if it is not installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+
+# Optional dependencies; see the optional section of app/requirements.txt
+orjson: Optional[ModuleType] = _optional_import('orjson')
+msgpack: Optional[ModuleType] = _optional_import('msgpack')
+zstandard: Optional[ModuleType] = _optional_import('zstandard')
+
+# Media type of each response format, and the media types a client may ask for it by
+MEDIA_TYPES: Dict[str, str] = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+FORMAT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'json': ('application/json',),
+    'msgpack': ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'),
+}
+
+# Formats and content encodings available here, in order of preference on ties
+FORMATS: List[str] = ['json'] + (['msgpack'] if msgpack is not None else [])
+ENCODINGS: List[str] = (['zstd'] if zstandard is not None else []) + ['gzip']
+
+# Float32 holds every decimal of up to 6 significant digits
+SINGLE_FLOAT_DIGITS: int = 6
+
+
+def quantize(content: Any, digits: int) -> Any:
+    """
+    Round every float of a result to `digits` significant digits.
+
+    Lists and tuples become lists; the floats of all compact states are
+    rounded together in one vectorized pass.
+
+    Parameters
+    ----------
+    content : any
+        Result to round, e.g. a list of (low, high, state) records.
+    digits : int
+        Significant digits to keep, from 1 to 17.
+
+    Returns
+    -------
+    any
+        A rounded copy of `content`.
+
+    Examples
+    --------
+    >>> from app.utilities.structures.compact_state import pack_state
+    >>> quantize([0.0, 1/3, pack_state({'Body1': {'mass': 2/3, 'time': 5000.004}})], 4)
+    [0.0, 0.3333, CompactState({'Body1': {'mass': 0.6667, 'time': 5000.0}})]
+    """
+    spec = f'.{digits}g'
+    states: List[Tuple[CompactState, CompactState]] = []
+
+    def walk(value: Any) -> Any:
+        if type(value) is float:
+            return float(format(value, spec))
+        if isinstance(value, CompactState):
+            rounded = CompactState(value.layout, value.buffer)
+            states.append((value, rounded))
+            return rounded
+        if isinstance(value, dict):
+            return {key: walk(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [walk(item) for item in value]
+        return value
+
+    result = walk(content)
+    if states:
+        data = _round_array(np.frombuffer(b''.join(state.buffer.tobytes() for state, _ in states)), digits).tobytes()
+        offset = 0
+        for state, rounded in states:
+            width = 8 * len(state.buffer)
+            rounded.buffer = array('d', data[offset:offset + width])
+            offset += width
+    return result
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode a result as compact UTF-8 JSON, with orjson if it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(',', ':'), default=json_default
+    ).encode('utf-8')
+
+
+def encode_msgpack(content: Any, single_float: bool = False) -> bytes:
+    """
+    Encode a result as MessagePack.
+
+    Parameters
+    ----------
+    content : any
+        Result to encode.
+    single_float : bool, optional
+        Encode floats as float32 instead of float64.
+
+    Raises
+    ------
+    RuntimeError
+        If `msgpack` is not installed.
+    """
+    if msgpack is None:
+        raise RuntimeError('MessagePack encoding requires the msgpack package')
+    return msgpack.packb(content, default=json_default, use_single_float=single_float)
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Pick the response format from an Accept header.
+
+    The available format with the highest quality wins, JSON on ties;
+    clients that accept no available format get JSON.
+
+    Examples
+    --------
+    >>> negotiate_format('*/*'), negotiate_format(None), negotiate_format('text/html')
+    ('json', 'json', 'json')
+    """
+    qualities = _qualities(accept)
+    ranked = []
+    for format in FORMATS:
+        quality = max(
+            [qualities[media_type] for media_type in FORMAT_ALIASES[format] if media_type in qualities]
+            or [qualities.get('application/*', qualities.get('*/*', 0.0))]
+        )
+        ranked.append((quality, -FORMATS.index(format), format))
+    quality, _, format = max(ranked)
+    return format if quality > 0 else 'json'
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content encoding from an Accept-Encoding header.
+
+    Examples
+    --------
+    >>> negotiate_encoding('gzip, deflate'), negotiate_encoding('br'), negotiate_encoding(None)
+    ('gzip', None, None)
+    """
+    qualities = _qualities(accept_encoding)
+    ranked = [
+        (qualities.get(encoding, qualities.get('*', 0.0)), -ENCODINGS.index(encoding), encoding)
+        for encoding in ENCODINGS
+    ]
+    quality, _, encoding = max(ranked)
+    return encoding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress an encoded body with 'gzip' or 'zstd'.
+
+    Raises
+    ------
+    RuntimeError
+        If 'zstd' is asked for and `zstandard` is not installed.
+    """
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd compression requires the zstandard package')
+        return zstandard.ZstdCompressor(level=Settings.RESPONSE_ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=Settings.RESPONSE_GZIP_LEVEL)
+
+
+def encode_response(
+    content: Any,
+    accept: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    precision: Optional[int] = None,
+) -> Tuple[bytes, str, Optional[str]]:
+    """
+    Encode a result for a response, as negotiated with the client.
+
+    Parameters
+    ----------
+    content : any
+        Result to encode.
+    accept, accept_encoding : str, optional
+        Accept and Accept-Encoding request headers.
+    precision : int, optional
+        Significant digits to round floats to; full precision if omitted.
+        MessagePack encodes floats rounded to at most 6 digits as float32.
+
+    Returns
+    -------
+    tuple
+        The body, its media type, and its content encoding or None. Bodies
+        below `Settings.RESPONSE_COMPRESSION_MIN_BYTES` are not compressed.
+    """
+    if precision is not None:
+        content = quantize(content, precision)
+    format = negotiate_format(accept)
+    if format == 'msgpack':
+        body = encode_msgpack(content, single_float=precision is not None and precision <= SINGLE_FLOAT_DIGITS)
+    else:
+        body = encode_json(content)
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= Settings.RESPONSE_COMPRESSION_MIN_BYTES else None
+    if encoding is not None:
+        body = compress(body, encoding)
+    return body, MEDIA_TYPES[format], encoding
+
+
+def _qualities(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse the quality of every token of an Accept-style header.
+    """
+    qualities: Dict[str, float] = {}
+    for part in (header or '').split(','):
+        token, *parameters = [piece.strip() for piece in part.split(';')]
+        if not token:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+    return qualities
+
+
+def _round_array(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Round float64 values to `digits` significant digits.
+
+    Values are scaled by an exact power of ten, rounded and scaled back, so
+    every result is the float nearest to its rounded decimal; zeros and
+    non-finite values are kept.
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        exponents = np.floor(np.log10(np.abs(values)))
+        shifts = digits - 1 - np.where(np.isfinite(exponents), exponents, 0)
+        scales = 10.0 ** np.abs(shifts)
+        rounded = np.where(
+            shifts >= 0, np.round(values * scales) / scales, np.round(values / scales) * scales
+        )
+    return np.where(np.isfinite(rounded), rounded, values)
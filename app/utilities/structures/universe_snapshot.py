@@ -0,0 +1,120 @@
+"""
+universe_snapshot.py
+--------------------
+Defines UniverseSnapshot, an incrementally updated per-agent view of the
+most recent simulation states.
+
+Used by the SimulationProcessor to assemble the universe an agent sees at the
+current step in O(agents), without querying or merging the full history held
+in the QRangeStore.
+"""
+
+from __future__ import annotations
+from typing import Dict, Generic, List, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class UniverseSnapshot(Generic[T]):
+    """
+    UniverseSnapshot
+    ----------------
+    Keeps, for every agent, its latest states together with the validity
+    interval [low, high) of each. Only the states that can still be read by
+    a running simulation are retained; older ones live in the QRangeStore.
+
+    Examples
+    --------
+    >>> snapshot = UniverseSnapshot[str]()
+    >>> snapshot.commit(-1e9, 0, {'Body1': 'init1', 'Body2': 'init2'})
+    >>> snapshot.commit(0, 100, {'Body1': 'step1'})
+    >>> snapshot.at(-0.001)
+    {'Body1': 'init1', 'Body2': 'init2'}
+    >>> snapshot.at(50)
+    {'Body1': 'step1'}
+    >>> snapshot.validity('Body1')
+    (0, 100)
+    >>> snapshot.prune(50)
+    >>> snapshot.at(-0.001)
+    {'Body2': 'init2'}
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty UniverseSnapshot."""
+        self._states: Dict[str, List[Tuple[float, float, T]]] = {}
+
+    def commit(self, low: float, high: float, record: Mapping[str, T]) -> None:
+        """
+        Record the states in `record` as valid over [low, high).
+
+        Parameters
+        ----------
+        low : float
+            Inclusive lower bound of the validity interval.
+        high : float
+            Exclusive upper bound of the validity interval.
+        record : mapping
+            States keyed by agent identifier, as written to the QRangeStore.
+        """
+        for agent_id, state in record.items():
+            self._states.setdefault(agent_id, []).append((low, high, state))
+
+    def at(self, t: float) -> Dict[str, T]:
+        """
+        Assemble the universe at time `t`.
+
+        For each agent, the most recently committed state whose interval
+        contains `t` is used. Agents without such a state are omitted.
+
+        Parameters
+        ----------
+        t : float
+            The time to read.
+
+        Returns
+        -------
+        dict
+            States valid at `t`, keyed by agent identifier.
+        """
+        universe: Dict[str, T] = {}
+        for agent_id, states in self._states.items():
+            for low, high, state in reversed(states):
+                if low <= t < high:
+                    universe[agent_id] = state
+                    break
+        return universe
+
+    def validity(self, agent_id: str) -> Optional[Tuple[float, float]]:
+        """
+        Return the validity interval of an agent's latest state.
+
+        Parameters
+        ----------
+        agent_id : str
+            Agent identifier.
+
+        Returns
+        -------
+        tuple of (float, float) or None
+            The [low, high) interval, or None if the agent has no state.
+        """
+        states = self._states.get(agent_id)
+        if not states:
+            return None
+        low, high, _ = states[-1]
+        return low, high
+
+    def prune(self, t: float) -> None:
+        """
+        Drop states that ended at or before `t`, keeping each agent's latest.
+
+        Parameters
+        ----------
+        t : float
+            The earliest time that may still be read.
+        """
+        for agent_id, states in self._states.items():
+            if len(states) > 1:
+                kept = [s for s in states[:-1] if s[1] > t]
+                if len(kept) < len(states) - 1:
+                    self._states[agent_id] = kept + [states[-1]]
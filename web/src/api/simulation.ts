@@ -18,3 +18,41 @@ export async function fetchLatestSimulation(): Promise<DataPoint[]> {
     }
     return response.json();
 }
+
+/**
+ * Submits a simulation run and waits until its results are available.
+ *
+ * Cached runs are answered immediately (200). New runs are queued as a job
+ * (202), whose status is polled until it finishes.
+ *
+ * @param params - Initial conditions of the bodies
+ * @param pollInterval - Milliseconds between job status checks
+ * @returns Promise resolving to array of DataPoint
+ * @throws Error if a request fails or the job fails
+ */
+export async function runSimulation(params: unknown, pollInterval = 500): Promise<DataPoint[]> {
+    const baseUrl = 'http://localhost:8000/api/v1/simulation';
+    const response = await fetch(`${baseUrl}/run`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(params),
+    });
+    if (!response.ok) {
+        throw new Error('Network response was not ok');
+    }
+    if (response.status === 200) {
+        return response.json();
+    }
+
+    const { job_id: jobId } = await response.json();
+    for (;;) {
+        await new Promise((resolve) => setTimeout(resolve, pollInterval));
+        const result = await fetch(`${baseUrl}/jobs/${jobId}/result`);
+        if (!result.ok) {
+            throw new Error('Simulation job failed');
+        }
+        if (result.status === 200) {
+            return result.json();
+        }
+    }
+}
@@ -9,6 +9,7 @@ import { Form, FormField, FormLabel } from '@radix-ui/react-form';
 import { Button, Card, Flex, Heading, Separator, TextField } from '@radix-ui/themes';
 import _ from 'lodash';
 import { Routes } from '@/routes'; 
+import { runSimulation } from '@/api/simulation';
 import type { FormData, FormValue } from '@/interfaces/features/simulation/SimulateForm.interface';
 import { container, card } from '@/styles/features/simulation/SimulateForm.styles';
 
@@ -46,21 +47,14 @@ const SimulateForm: React.FC = () => {
      *
      * @param e - Form submit event
      *
-     * Sends POST request to backend API with formData.
+     * Sends POST request to backend API with formData and waits for the job.
      * Navigates to simulation results route if successful.
      */
     const handleSubmit = useCallback(
         async (e: React.FormEvent) => {
             e.preventDefault();
             try {
-                const response = await fetch('http://localhost:8000/api/v1/simulation/run', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(formData),
-                });
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
+                await runSimulation(formData);
                 navigate(Routes.SIMULATION);
             } catch (error) {
                 console.error('Error submitting simulation:', error);